@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import hunter_ip
+from hunter_core.exporters import write_csv, write_excel
+from hunter_core.mock_server import MockHunterServer, synthetic_page
+from hunter_core.results import CompanyAccumulator
+from hunter_core.store import ResultStore
+
+# 压测配置，均可通过命令行参数覆盖
+CONFIG = {
+    "sizes": [100, 1000, 10000],  # 合成输入的目标数量
+    "workers": 8,                 # 批量查询的并发线程数
+    "batch_size": 1,              # 合并查询的目标数，1表示不合并
+    "bulk": False,                # 是否使用批量任务模式（提交整批目标，轮询后下载结果文件）
+    "task_delay": 0.5,            # 模拟API批量任务从提交到完成的时间(秒)
+    "latency": 0.0,               # 模拟API每个请求的延迟(秒)
+    "throttle": 0.0,              # 模拟API返回429限流的比例
+    "keys": 1,                    # 密钥池中的密钥数量
+    "rate_limit": 0,              # 每个密钥的请求速率上限(次/秒)，0表示不限速
+    "results_per_target": 20      # 每个目标的结果数量，决定每个目标需要的页数
+}
+
+
+def make_targets(count, is_domain=True):
+    """
+    生成合成的域名或IP地址列表
+    """
+    if is_domain:
+        return [f"t{i}.bench.test" for i in range(count)]
+    return [f"10.{(i >> 16) % 256}.{(i >> 8) % 256}.{i % 256}" for i in range(count)]
+
+
+@contextlib.contextmanager
+def quiet():
+    """
+    压测期间屏蔽工具本身的逐页输出
+    """
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def bench_process_file(server, targets, workdir, workers, batch_size, is_domain=True, keys=1, rate_limit=0,
+                       bulk=False):
+    """
+    通过模拟API完整运行一次process_file，返回结果和耗时统计
+
+    密钥池在第一次请求时创建，同一次压测中的各个规模使用相同的keys和rate_limit
+    """
+    input_file = os.path.join(workdir, f"targets_{len(targets)}.txt")
+    with open(input_file, 'w', encoding='utf-8') as f:
+        f.write("\n".join(targets))
+
+    hunter_ip.CONFIG.update(api_key="", api_keys=[f"bench-{i}" for i in range(keys)], rate_limit=rate_limit,
+                            api_url=server.url, checkpoint_path=os.path.join(workdir, "checkpoint.sqlite3"),
+                            bulk_poll_interval=0.1)
+    hunter_ip.CLIENT.cache = None
+    server.api.reset_stats()
+
+    start = time.perf_counter()
+    with quiet():
+        results = hunter_ip.process_file(input_file, is_domain, workers=workers, batch_size=batch_size, bulk=bulk)
+    elapsed = time.perf_counter() - start
+    return results, {
+        "seconds": round(elapsed, 3),
+        "targets_per_sec": round(len(targets) / elapsed, 1),
+        "requests": server.api.requests,
+        "pages": server.api.pages,
+        "pages_per_sec": round(server.api.pages / elapsed, 1),
+        "throttled": server.api.throttled
+    }
+
+
+def bench_parse(targets, page_size, results_per_target):
+    """
+    不经过网络，单独测量解析和去重的耗时（不含生成数据的时间）
+    """
+    elapsed = 0.0
+    records = 0
+    for target in targets:
+        query = f'domain="{target}"'
+        page = 1
+        while True:
+            total, arr = synthetic_page(query, page, page_size, results_per_target)
+            start = time.perf_counter()
+            accumulator = CompanyAccumulator()
+            accumulator.add_page(arr)
+            accumulator.to_dicts()
+            elapsed += time.perf_counter() - start
+            records += len(arr)
+            if page * page_size >= total:
+                break
+            page += 1
+    return {
+        "seconds": round(elapsed, 3),
+        "records": records,
+        "records_per_sec": round(records / elapsed, 1) if elapsed else 0
+    }
+
+
+def bench_export(results, workdir):
+    """
+    测量结果展开、写入本地结果库以及导出Excel/CSV的耗时
+    """
+    stats = {}
+    start = time.perf_counter()
+    rows = hunter_ip.build_rows(results)
+    stats["rows"] = len(rows)
+    stats["build_rows_seconds"] = round(time.perf_counter() - start, 3)
+
+    store_path = os.path.join(workdir, f"store_{len(results)}.sqlite3")
+    start = time.perf_counter()
+    store = ResultStore(store_path, hunter_ip.RESULT_TABLE, hunter_ip.RESULT_COLUMNS)
+    store.add_rows(rows)
+    stats["store_seconds"] = round(time.perf_counter() - start, 3)
+
+    with quiet():
+        start = time.perf_counter()
+        write_csv(store.iter_rows(), hunter_ip.RESULT_COLUMNS, os.path.join(workdir, "export.csv"))
+        stats["csv_seconds"] = round(time.perf_counter() - start, 3)
+
+        # 超过单表行数上限时自动分为多个工作表
+        start = time.perf_counter()
+        write_excel(store.iter_rows(), hunter_ip.RESULT_COLUMNS, os.path.join(workdir, "export.xlsx"))
+        stats["excel_seconds"] = round(time.perf_counter() - start, 3)
+
+        # 列式批次导出CSV并生成汇总表
+        start = time.perf_counter()
+        hunter_ip.export_to_excel(store, os.path.join(workdir, "summary.csv"), "csv")
+        stats["summary_seconds"] = round(time.perf_counter() - start, 3)
+    store.close()
+    return stats
+
+
+def run_size(server, size, workdir, args):
+    """
+    对一种输入规模运行全部压测项目
+    """
+    targets = make_targets(size)
+    results, fetch = bench_process_file(server, targets, workdir, args.workers, args.batch_size,
+                                        keys=args.keys, rate_limit=args.rate, bulk=args.bulk)
+    parse = bench_parse(targets, hunter_ip.CONFIG["page_size"], args.results)
+    export = bench_export(results, workdir)
+    return {"targets": size, "fetch": fetch, "parse": parse, "export": export}
+
+
+def print_report(report):
+    """
+    打印一种规模的压测结果
+    """
+    fetch, parse, export = report["fetch"], report["parse"], report["export"]
+    print(f"\n[结果] {report['targets']} 个目标")
+    print(f"  查询: {fetch['seconds']}s，{fetch['targets_per_sec']} 目标/秒，"
+          f"{fetch['pages']} 页，{fetch['pages_per_sec']} 页/秒，请求 {fetch['requests']} 次，限流 {fetch['throttled']} 次")
+    print(f"  解析去重: {parse['seconds']}s，{parse['records']} 条，{parse['records_per_sec']} 条/秒")
+    print(f"  导出: 展开 {export['build_rows_seconds']}s，写入结果库 {export['store_seconds']}s，"
+          f"CSV {export['csv_seconds']}s，Excel {export['excel_seconds']}s，"
+          f"CSV+汇总表 {export['summary_seconds']}s（{export['rows']} 行）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hunter 查询工具离线压测（使用本地模拟API，不消耗积分）")
+    parser.add_argument("-n", "--sizes", type=int, nargs="+", default=CONFIG["sizes"],
+                        help="合成输入的目标数量，可指定多个，如 -n 100 1000 100000")
+    parser.add_argument("-w", "--workers", type=int, default=CONFIG["workers"], help="批量查询的并发线程数")
+    parser.add_argument("-b", "--batch-size", type=int, default=CONFIG["batch_size"], help="合并查询的目标数")
+    parser.add_argument("--bulk", action="store_true", default=CONFIG["bulk"],
+                        help="使用批量任务模式，与-b互斥")
+    parser.add_argument("--latency", type=float, default=CONFIG["latency"], help="模拟API每个请求的延迟(秒)")
+    parser.add_argument("--throttle", type=float, default=CONFIG["throttle"], help="模拟API返回429限流的比例(0-1)")
+    parser.add_argument("--results", type=int, default=CONFIG["results_per_target"], help="每个目标的结果数量")
+    parser.add_argument("--keys", type=int, default=CONFIG["keys"], help="密钥池中的密钥数量")
+    parser.add_argument("--rate", type=float, default=CONFIG["rate_limit"],
+                        help="每个密钥的请求速率上限(次/秒)，配合--keys观察吞吐随密钥数的变化")
+    parser.add_argument("--json", help="将压测结果保存为JSON文件，便于对比不同版本")
+    args = parser.parse_args()
+    if args.bulk and args.batch_size > 1:
+        parser.error("--bulk 不能与 -b 同时使用")
+
+    reports = []
+    with tempfile.TemporaryDirectory() as workdir, \
+            MockHunterServer(latency=args.latency, throttle=args.throttle,
+                             results_per_target=args.results, seed=0, task_delay=CONFIG["task_delay"]) as server:
+        print(f"[信息] 模拟API已启动: {server.url}")
+        for size in args.sizes:
+            print(f"[信息] 正在压测 {size} 个目标...")
+            report = run_size(server, size, workdir, args)
+            print_report(report)
+            reports.append(report)
+
+    if args.json:
+        output_dir = os.path.dirname(args.json)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"config": vars(args), "reports": reports}, f, ensure_ascii=False, indent=2)
+        print(f"\n[成功] 压测结果已保存到 {args.json}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n[警告] 压测已中断")
+        sys.exit(130)
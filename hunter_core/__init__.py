@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Hunter查询工具集的公共组件
+
+可以直接在其他脚本中使用，例如：
+
+    from hunter_core import HunterClient, CompanyAccumulator
+
+    client = HunterClient(CONFIG)
+    accumulator = CompanyAccumulator()
+    client.run_query('domain="example.com"', accumulator.add_page, "example.com")
+
+pandas只在读取Excel和生成汇总表时才会导入，requests在第一次发起请求时才会导入。
+"""
+
+from hunter_core.client import HunterClient
+from hunter_core.exporters import export_batches, export_rows, read_excel_rows, write_csv, write_excel
+from hunter_core.results import AssetRecord, CompanyAccumulator, DomainAccumulator, parse_item, parse_page
+from hunter_core.sinks import open_sink
+from hunter_core.store import ResultStore
+from hunter_core.summary import summarize_reverse_domain, summarize_reverse_icp
+
+__all__ = [
+    "HunterClient",
+    "AssetRecord",
+    "CompanyAccumulator",
+    "DomainAccumulator",
+    "parse_item",
+    "parse_page",
+    "ResultStore",
+    "open_sink",
+    "export_rows",
+    "export_batches",
+    "read_excel_rows",
+    "write_csv",
+    "write_excel",
+    "summarize_reverse_icp",
+    "summarize_reverse_domain",
+]
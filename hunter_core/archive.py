@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+API原始响应归档与离线重放
+
+归档为gzip压缩的JSONL文件，只追加写入：每获取一页（包括缓存命中的页）就写入一行，
+包含查询语句、页码、分页大小、时间范围、来源和完整的原始响应。每次打开归档都会追加一个
+新的gzip成员，多次运行可以写入同一个文件。
+
+重放时把归档加载到内存，按请求参数索引每一页，客户端直接从归档取页而不访问网络，
+企业/备案信息的解析、去重和导出逻辑修改后，可以用旧数据重新生成结果。
+"""
+
+import base64
+import gzip
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+# 单字段查询语句，如 domain="example.com"，合并查询为多个单字段查询用||连接
+_TERM = re.compile(r'^(\w+(?:\.\w+)?)="([^"]*)"$')
+
+
+def _key(search, page, page_size, is_web, time_range):
+    start_time, end_time = time_range or (None, None)
+    return search, int(page), int(page_size), str(is_web), start_time, end_time
+
+
+class ResponseArchive:
+    """
+    追加写入的响应归档，多个线程可以同时写入
+    """
+
+    def __init__(self, path):
+        archive_dir = os.path.dirname(path)
+        if archive_dir and not os.path.exists(archive_dir):
+            os.makedirs(archive_dir, exist_ok=True)
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, 'ab')
+
+    def append(self, search, page, page_size, is_web, time_range, source, data):
+        """
+        写入一页原始响应，source为api或cache
+        """
+        start_time, end_time = time_range or (None, None)
+        record = {
+            "time": round(time.time(), 3),
+            "query": base64.urlsafe_b64decode(search.encode('utf-8')).decode('utf-8'),
+            "search": search,
+            "page": int(page),
+            "page_size": int(page_size),
+            "is_web": str(is_web),
+            "start_time": start_time,
+            "end_time": end_time,
+            "source": source,
+            "response": data
+        }
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+        with self._lock:
+            self._file.write(line)
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _iter_records(path):
+    # 逐行返回(原始行, 解析后的记录)，进程被强制结束导致末尾不完整时，读到完整的最后一行为止
+    with gzip.open(path, 'rb') as f:
+        try:
+            for line in f:
+                try:
+                    yield line, json.loads(line)
+                except ValueError:
+                    # 写入中断的最后一行
+                    break
+        except (EOFError, zlib.error, gzip.BadGzipFile):
+            print(f"[警告] 归档 {path} 末尾不完整，已读取其中完整的记录")
+
+
+def iter_archive(path):
+    """
+    按写入顺序读取归档中的记录
+    """
+    for _, record in _iter_records(path):
+        yield record
+
+
+class ReplaySource:
+    """
+    从归档加载的只读响应源，同一页有多条记录时以最后一条成功的响应为准
+
+    每页的归档记录以zlib压缩后保存在内存中，取页时再解压解析。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = 0
+        self._pages = {}
+        self._queries = {}
+        for line, record in _iter_records(path):
+            self.records += 1
+            response = record.get("response") or {}
+            if response.get("code") != 200:
+                continue
+            key = _key(record["search"], record["page"], record["page_size"], record["is_web"],
+                       (record.get("start_time"), record.get("end_time")) if record.get("start_time") else None)
+            self._pages[key] = zlib.compress(line, 1)
+            self._queries.setdefault(record["query"], None)
+
+    def __len__(self):
+        return len(self._pages)
+
+    def get(self, search, page, page_size, is_web, time_range=None):
+        """
+        返回归档中该页的原始响应，没有时返回None
+        """
+        body = self._pages.get(_key(search, page, page_size, is_web, time_range))
+        if body is None:
+            return None
+        return json.loads(zlib.decompress(body))["response"]
+
+    def queries(self):
+        """
+        归档中有成功响应的查询语句，按第一次出现的顺序
+        """
+        return list(self._queries)
+
+    def targets(self, field):
+        """
+        从归档的查询语句中提取field字段的查询值（合并查询拆分为各个目标），按第一次出现的顺序
+        """
+        targets = {}
+        for query in self._queries:
+            terms = [_TERM.match(part.strip()) for part in query.split("||")]
+            if all(terms):
+                for term in terms:
+                    if term.group(1) == field:
+                        targets.setdefault(term.group(2), None)
+        return list(targets)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+多目标合并查询：将多个目标用||合并为一个查询，再按每条结果的domain/ip字段拆分回各个目标
+"""
+
+
+def build_or_query(field, targets):
+    """
+    构建合并查询语句，如 domain="a.com"||domain="b.com"
+    """
+    return "||".join(f'{field}="{target}"' for target in targets)
+
+
+def pack_targets(targets, field, max_targets, max_length):
+    """
+    按顺序将目标分组，每组不超过max_targets个，且合并后的查询语句长度不超过max_length
+    """
+    groups = []
+    group = []
+    length = 0
+    for target in targets:
+        part = len(f'{field}="{target}"')
+        extra = part + (2 if group else 0)
+        if group and (len(group) >= max_targets or length + extra > max_length):
+            groups.append(group)
+            group = []
+            length = 0
+            extra = part
+        group.append(target)
+        length += extra
+    if group:
+        groups.append(group)
+    return groups
+
+
+class Demultiplexer:
+    """
+    将合并查询返回的记录分配给对应的目标
+
+    IP按完全相同匹配；域名与Hunter的domain="..."查询一致，按包含关系匹配，
+    一条记录可能同时属于多个目标。
+    """
+
+    def __init__(self, field, targets):
+        self.field = field
+        self.targets = list(targets)
+        self._exact = {}
+        for target in self.targets:
+            self._exact.setdefault(target.lower(), []).append(target)
+
+    def match(self, record):
+        value = record.domain if self.field == "domain" else record.ip
+        if not value:
+            return []
+        value = value.lower()
+        if self.field != "domain":
+            return self._exact.get(value, [])
+        return [target for target in self.targets if target.lower() in value]
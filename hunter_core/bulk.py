@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+批量任务：把整批目标作为一个服务端任务提交，轮询进度后下载结果文件
+
+接口路径都在CONFIG["api_url"]（/openApi/search）之下：
+
+    POST {api_url}/batch               上传目标文件（每行一个目标）及search_type、is_web，返回data.task_id
+    GET  {api_url}/batch/{task_id}     任务状态，data.status为running/finished/failed，data.progress为进度，
+                                       data.failed为服务端处理失败的目标
+    GET  {api_url}/download/{task_id}  下载CSV结果文件，每行一条资产，target列为该资产对应的目标
+
+提交、轮询和下载使用同一个API密钥。结果文件先流式写入临时文件，再逐行解析，每个目标的记录按页写入
+断点日志并标记完成，之后的解析、去重和导出与逐个查询完全相同（直接从断点日志还原，不再请求API）。
+任务提交失败、失败或超时时所有目标回退为逐个查询，data.failed中的目标单独回退。
+"""
+
+import csv
+import os
+import tempfile
+import time
+
+from hunter_core.batching import Demultiplexer
+from hunter_core.keypool import NoApiKeyAvailable
+from hunter_core.results import parse_item
+
+# 结果文件的列名，兼容中文表头
+COLUMN_ALIASES = {
+    "查询目标": "target",
+    "目标": "target",
+    "域名": "domain",
+    "IP": "ip",
+    "IP地址": "ip",
+    "端口": "port",
+    "网站标题": "web_title",
+    "备案单位": "company",
+    "企业名称": "company",
+    "备案号": "number",
+    "URL": "url",
+    "更新时间": "updated_at"
+}
+
+# 轮询间隔的上限(秒)，每次轮询后间隔乘以POLL_GROWTH
+MAX_POLL_INTERVAL = 60
+POLL_GROWTH = 1.5
+# 解析结果文件时每次写入断点日志的页数
+WRITE_BATCH = 1000
+
+
+class BulkTaskError(Exception):
+    """
+    批量任务提交、执行或下载失败
+    """
+
+
+class BulkTask:
+    """
+    一批目标对应的服务端批量任务
+
+    field为查询字段（domain、ip或icp.name）。checkpoint为批次的断点日志：任务ID和所用密钥的摘要
+    记录在其中，中断后使用--resume时继续轮询同一个任务而不重新提交（重新提交会再次消耗积分）。
+    """
+
+    def __init__(self, client, targets, field, checkpoint, poll_interval=5, timeout=3600):
+        self.client = client
+        self.targets = list(dict.fromkeys(targets))
+        self.field = field
+        self.checkpoint = checkpoint
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.base_url = client.config["api_url"].rstrip("/")
+        self.task_id = None
+        self.key = None
+        self.rows = 0
+
+    def run(self):
+        """
+        执行批量任务，结果写入断点日志，返回需要回退为逐个查询的目标列表
+        """
+        import requests
+
+        pending = [target for target in self.targets if not self.checkpoint.is_done(target)]
+        if not pending:
+            return []
+        try:
+            self._resume_or_submit(pending)
+            failed = self._wait()
+            path = self._download()
+            try:
+                done = self._load(path, set(pending) - failed)
+            finally:
+                os.remove(path)
+        except (BulkTaskError, NoApiKeyAvailable) as e:
+            print(f"[警告] 批量任务失败：{e}，{len(pending)} 个目标改为逐个查询")
+            self.client.metrics.inc("bulk_fallbacks", len(pending))
+            return pending
+        except requests.exceptions.RequestException as e:
+            print(f"[警告] 批量任务请求异常：{self.client.key_pool.redact(str(e))}，"
+                  f"{len(pending)} 个目标改为逐个查询")
+            self.client.metrics.inc("bulk_fallbacks", len(pending))
+            return pending
+        self._forget()
+        fallback = [target for target in pending if target not in done]
+        print(f"[成功] 批量任务 {self.task_id} 完成：{len(done)} 个目标共 {self.rows} 条记录"
+              + (f"，{len(fallback)} 个目标处理失败，改为逐个查询" if fallback else ""))
+        self.client.metrics.inc("bulk_fallbacks", len(fallback))
+        return fallback
+
+    def _call(self, method, path, params=None, **kwargs):
+        data = self.client.session.request(method, f"{self.base_url}/{path}", params or {},
+                                           api_key=self.key, **kwargs)
+        if not isinstance(data, dict):
+            return data
+        if data.get("code") != 200:
+            self.client.metrics.inc("api_errors")
+            raise BulkTaskError(data.get("message") or f"API返回code={data.get('code')}")
+        return data.get("data") or {}
+
+    def _resume_or_submit(self, pending):
+        task_id = self.checkpoint.get_meta("bulk_task")
+        key = self.client.key_pool.find(self.checkpoint.get_meta("bulk_key") or "")
+        if task_id and key is not None and key.disabled is None:
+            self.task_id, self.key = task_id, key
+            print(f"[信息] 继续等待上次提交的批量任务 {task_id}")
+            return
+        self.key = self.client.key_pool.choose()
+        content = "\n".join(pending).encode("utf-8")
+        body = self._call("POST", "batch", {"search_type": self.field, "is_web": "1"},
+                          files={"file": ("targets.txt", content, "text/plain")})
+        self.task_id = str(body.get("task_id") or "")
+        if not self.task_id:
+            raise BulkTaskError("提交响应中没有task_id")
+        self.checkpoint.set_meta("bulk_task", self.task_id)
+        self.checkpoint.set_meta("bulk_key", self.key.fingerprint)
+        self.client.metrics.inc("bulk_tasks")
+        print(f"[信息] 已提交批量任务 {self.task_id}：{len(pending)} 个目标")
+
+    def _wait(self):
+        """
+        按指数退避轮询任务状态直到完成，返回服务端处理失败的目标集合
+        """
+        deadline = time.monotonic() + self.timeout
+        interval = self.poll_interval
+        while True:
+            body = self._call("GET", f"batch/{self.task_id}")
+            status = str(body.get("status") or "").lower()
+            if status in ("finished", "success", "done"):
+                return set(body.get("failed") or ())
+            if status in ("failed", "error"):
+                raise BulkTaskError(body.get("message") or f"任务 {self.task_id} 执行失败")
+            if time.monotonic() + interval > deadline:
+                raise BulkTaskError(f"任务 {self.task_id} 未在 {self.timeout} 秒内完成")
+            if not self.client.config["quiet"]:
+                print(f"[信息] 批量任务 {self.task_id} 进度 {body.get('progress', '未知')}，"
+                      f"{interval:.1f} 秒后再次查询")
+            time.sleep(interval)
+            interval = min(MAX_POLL_INTERVAL, interval * POLL_GROWTH)
+
+    def _download(self):
+        """
+        将结果文件流式写入临时文件，返回文件路径
+        """
+        response = self._call("GET", f"download/{self.task_id}", raw=True, stream=True)
+        if isinstance(response, dict):
+            raise BulkTaskError("下载的结果不是文件")
+        fd, path = tempfile.mkstemp(prefix="hunter_bulk_", suffix=".csv")
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response.iter_content(chunk_size=1 << 16):
+                    f.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.remove(path)
+            raise
+        finally:
+            response.close()
+        self.client.metrics.inc("bytes_received", size)
+        return path
+
+    def _load(self, path, expected):
+        """
+        逐行解析结果文件，每个目标每满一页写入一次断点日志，返回已完成的目标集合
+
+        结果文件没有target列时按domain/ip字段（与合并查询相同）或企业名称将记录分配给目标
+        """
+        page_size = self.client.config["page_size"]
+        buffers = {}
+        pages = {}
+        ready = []
+        demultiplexer = None
+
+        def flush(target):
+            # 攒够WRITE_BATCH页后在一个事务中写入断点日志
+            pages[target] = pages.get(target, 0) + 1
+            ready.append((target, pages[target], 0, buffers.pop(target)))
+            if len(ready) >= WRITE_BATCH:
+                self.checkpoint.record_pages(ready)
+                ready.clear()
+
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.reader(f)
+            header = [COLUMN_ALIASES.get(name.strip(), name.strip()) for name in next(reader, [])]
+            has_target = "target" in header
+            if not has_target and self.field != "icp.name":
+                demultiplexer = Demultiplexer(self.field, expected)
+            for values in reader:
+                item = dict(zip(header, values))
+                if has_target:
+                    owners = [item.pop("target")]
+                elif demultiplexer is not None:
+                    owners = demultiplexer.match(parse_item(item))
+                else:
+                    owners = [item.get("company")]
+                for target in owners:
+                    if target not in expected:
+                        continue
+                    buffer = buffers.setdefault(target, [])
+                    buffer.append(item)
+                    self.rows += 1
+                    if len(buffer) >= page_size:
+                        flush(target)
+        for target in list(buffers):
+            flush(target)
+        self.checkpoint.record_pages(ready)
+        self.checkpoint.mark_all_done(expected)
+        self.client.metrics.inc("bulk_rows", self.rows)
+        return expected
+
+    def _forget(self):
+        # 任务结果已全部写入断点日志，续查时不再需要任务ID
+        self.checkpoint.set_meta("bulk_task", "")
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+基于SQLite的API响应本地缓存，hunter_ip.py与hunter_icp.py共用同一个缓存文件
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """
+    以(search, page, page_size, is_web)为键缓存API的原始响应
+
+    ttl为缓存有效期(秒)，过期条目在读取时删除；max_entries为最大条目数，
+    超出后按最近访问时间淘汰最久未使用的条目（LRU）。
+    refresh为True时不读取缓存，但仍会写入新的响应。
+    缓存文件可能同时被多个进程使用（如任务队列的多个worker），条目数在每次写入的事务中重新统计。
+    """
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=100000, refresh=False):
+        cache_dir = os.path.dirname(path)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " search TEXT NOT NULL,"
+            " page INTEGER NOT NULL,"
+            " page_size INTEGER NOT NULL,"
+            " is_web TEXT NOT NULL,"
+            " body TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (search, page, page_size, is_web))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    def get(self, search, page, page_size, is_web):
+        """
+        返回缓存的响应字典，未命中、已过期或处于刷新模式时返回None
+        """
+        if self.refresh:
+            return None
+        key = (search, int(page), int(page_size), str(is_web))
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, created_at FROM responses"
+                " WHERE search=? AND page=? AND page_size=? AND is_web=?", key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            body, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE search=? AND page=? AND page_size=? AND is_web=?", key
+                )
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at=?"
+                " WHERE search=? AND page=? AND page_size=? AND is_web=?", (now,) + key
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(body)
+
+    def put(self, search, page, page_size, is_web, data):
+        """
+        写入一条响应，必要时淘汰最久未访问的条目
+        """
+        key = (search, int(page), int(page_size), str(is_web))
+        body = json.dumps(data, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            # 立即获取写锁，其他进程的写入排在本事务之后，统计的条目数在提交前保持准确
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO responses (search, page, page_size, is_web, body, created_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (search, page, page_size, is_web)"
+                    " DO UPDATE SET body=excluded.body, created_at=excluded.created_at,"
+                    " accessed_at=excluded.accessed_at", key + (body, now, now)
+                )
+                if self.max_entries:
+                    count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                    if count > self.max_entries:
+                        self._conn.execute(
+                            "DELETE FROM responses WHERE rowid IN"
+                            " (SELECT rowid FROM responses ORDER BY accessed_at LIMIT ?)",
+                            (count - self.max_entries,)
+                        )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
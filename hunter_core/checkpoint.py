@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+批量查询的断点日志
+
+每获取一页结果就记录该页的原始数据，目标全部页查询完毕后标记为完成。
+中断后使用--resume重新运行时，已完成的目标直接从日志还原，未完成的目标从下一页继续。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class Checkpoint:
+    """
+    以batch区分不同批次（工具、输入文件和查询类型）的断点日志
+    """
+
+    def __init__(self, path, batch):
+        journal_dir = os.path.dirname(path)
+        if journal_dir and not os.path.exists(journal_dir):
+            os.makedirs(journal_dir, exist_ok=True)
+        self.batch = batch
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " batch TEXT NOT NULL, target TEXT NOT NULL, page INTEGER NOT NULL,"
+            " total INTEGER NOT NULL, arr TEXT NOT NULL, fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (batch, target, page))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS targets ("
+            " batch TEXT NOT NULL, target TEXT NOT NULL, done_at REAL NOT NULL,"
+            " PRIMARY KEY (batch, target))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta ("
+            " batch TEXT NOT NULL, name TEXT NOT NULL, value TEXT NOT NULL,"
+            " PRIMARY KEY (batch, name))"
+        )
+        self._conn.commit()
+
+    def pages(self, target):
+        """
+        返回目标已获取的页，格式为[(page, total, arr), ...]，按页码排序
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page, total, arr FROM pages WHERE batch=? AND target=? ORDER BY page",
+                (self.batch, target)
+            ).fetchall()
+        return [(page, total, json.loads(arr)) for page, total, arr in rows]
+
+    def record_page(self, target, page, total, arr):
+        self.record_pages([(target, page, total, arr)])
+
+    def record_pages(self, pages):
+        """
+        在一个事务中记录多页，pages为[(target, page, total, arr), ...]
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages (batch, target, page, total, arr, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [(self.batch, target, int(page), int(total or 0), json.dumps(arr, ensure_ascii=False), now)
+                 for target, page, total, arr in pages]
+            )
+            self._conn.commit()
+
+    def is_done(self, target):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM targets WHERE batch=? AND target=?", (self.batch, target)
+            ).fetchone()
+        return row is not None
+
+    def mark_done(self, target):
+        self.mark_all_done([target])
+
+    def mark_all_done(self, targets):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO targets (batch, target, done_at) VALUES (?, ?, ?)",
+                [(self.batch, target, now) for target in targets]
+            )
+            self._conn.commit()
+
+    def count_done(self, keys):
+        """
+        统计keys中已完成的数量
+        """
+        with self._lock:
+            done = {row[0] for row in self._conn.execute(
+                "SELECT target FROM targets WHERE batch=?", (self.batch,)
+            )}
+        return len(done.intersection(keys))
+
+    def get_meta(self, name):
+        """
+        读取本批次的附加信息（如增量查询的时间窗口），不存在时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE batch=? AND name=?", (self.batch, name)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name, value):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (batch, name, value) VALUES (?, ?, ?)",
+                (self.batch, name, str(value))
+            )
+            self._conn.commit()
+
+    def clear(self):
+        """
+        删除本批次的全部日志
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM pages WHERE batch=?", (self.batch,))
+            self._conn.execute("DELETE FROM targets WHERE batch=?", (self.batch,))
+            self._conn.execute("DELETE FROM meta WHERE batch=?", (self.batch,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Hunter API客户端，两个查询工具和其他脚本共用
+"""
+
+import base64
+import json
+
+from hunter_core.keypool import KeyPool
+from hunter_core.metrics import Metrics
+from hunter_core.paging import paginate
+from hunter_core.session import CircuitBreaker, HunterSession
+
+
+class IncompleteQueryError(Exception):
+    """
+    查询未能获取所有需要的页（请求失败、API返回错误或积分预算不足）
+    """
+
+
+class HunterClient:
+    """
+    统一管理密钥池、HTTP会话、响应缓存和分页的API客户端
+
+    archive不为None时把获取到的每一页原始响应写入归档；replay不为None时所有页都从归档中读取，
+    不访问网络（见hunter_core.archive）。
+    budget不为None时（hunter_core.scheduler.PointBudget），每个请求发出前按整页预留积分，
+    预算不足时不发出请求，该页按失败处理。
+    raise_incomplete为True时，run_query未能获取所有需要的页会抛出IncompleteQueryError而不是返回False，
+    用于不能把部分结果当作完整结果返回的调用方（如hunter_service）。
+
+    config为工具脚本中的CONFIG字典，客户端直接引用该字典，运行时修改CONFIG会立即生效。
+    密钥池在第一次使用时根据CONFIG创建，此后修改密钥配置不再生效。
+    config["quiet"]为True时不输出逐页的进度信息。
+    """
+
+    def __init__(self, config, cache=None):
+        self.config = config
+        self.cache = cache
+        self.archive = None
+        self.replay = None
+        self.budget = None
+        self.raise_incomplete = False
+        self.metrics = Metrics()
+        self._key_pool = None
+        self._session = None
+        self._workers = config["workers"]
+
+    @property
+    def key_pool(self):
+        """
+        API密钥池，第一次使用时从CONFIG、环境变量和密钥文件加载
+        """
+        if self._key_pool is None:
+            self._key_pool = KeyPool.from_config(self.config)
+        return self._key_pool
+
+    def has_api_key(self):
+        """
+        是否可以发起查询：有可用的API密钥，或处于重放模式（不需要密钥）
+        """
+        return self.replay is not None or len(self.key_pool) > 0
+
+    @property
+    def session(self):
+        """
+        共享的HTTP会话，第一次使用时才创建
+        """
+        if self._session is None:
+            config = self.config
+            self._session = HunterSession(
+                key_pool=self.key_pool,
+                breaker=CircuitBreaker(config["breaker_threshold"], config["breaker_cooldown"]),
+                pool_size=self._workers * config["page_workers"],
+                timeout=config["timeout"],
+                max_retries=config["max_retries"],
+                backoff=config["backoff"],
+                metrics=self.metrics
+            )
+        return self._session
+
+    def write_metrics(self, path, run_seconds=None):
+        """
+        输出运行指标摘要，path不为空时同时写入指标文件
+        """
+        if run_seconds is not None:
+            self.metrics.set("run_seconds", round(run_seconds, 3))
+        counters = self.metrics.counters
+        remaining = self.metrics.gauges.get("points_remaining")
+        print(f"[信息] 本次运行：请求 {counters.get('requests', 0)} 次，重试 {counters.get('retries', 0)} 次，"
+              f"缓存命中 {counters.get('cache_hits', 0)} 页，消耗积分 {counters.get('points_consumed', 0)}"
+              + (f"，剩余积分 {remaining}" if remaining is not None else ""))
+        if self.replay is not None:
+            print(f"[信息] 重放：从归档读取 {counters.get('replay_hits', 0)} 页，"
+                  f"归档中缺少 {counters.get('replay_misses', 0)} 页")
+        if self._key_pool is not None and len(self._key_pool) > 1:
+            self.metrics.set("keys_active", len(self._key_pool.active()))
+            for key in self._key_pool.keys:
+                status = f"已停用（{key.disabled}）" if key.disabled else "可用"
+                remaining = f"，剩余积分 {key.remaining}" if key.remaining is not None else ""
+                print(f"[信息] 密钥 {key.masked}：请求 {key.requests} 次{remaining}，{status}")
+        if path:
+            self.metrics.write(path)
+
+    def set_workers(self, workers):
+        """
+        按目标并发数调整连接池大小
+        """
+        self._workers = workers
+        if self._session is not None:
+            self._session.set_pool_size(workers * self.config["page_workers"])
+
+    @staticmethod
+    def encode_query(query):
+        """
+        使用Base64编码处理查询语句
+        """
+        return base64.urlsafe_b64encode(query.encode('utf-8')).decode('utf-8')
+
+    def fetch_page(self, query_base64, page, label, time_range=None):
+        """
+        获取单页结果，优先读取本地缓存；请求失败或API返回错误时返回None
+
+        time_range为(start_time, end_time)时只查询该时间段内更新的资产，此类请求不使用缓存
+        """
+        import requests
+
+        config = self.config
+        metrics = self.metrics
+        try:
+            # 构建查询参数，api-key由会话从密钥池中选取
+            params = {
+                "search": query_base64,  # 使用Base64编码后的查询参数
+                "page": str(page),
+                "page_size": str(config["page_size"]),
+                "is_web": "1"  # 只搜索网站资产
+            }
+            if time_range is not None:
+                params["start_time"], params["end_time"] = time_range
+
+            if not config["quiet"]:
+                print(f"[信息] 正在查询 {label} 的第 {page} 页结果...")
+            if self.replay is not None:
+                return self._replay_page(query_base64, page, label, time_range, params["is_web"])
+            # 优先从本地缓存读取，命中时不消耗积分
+            data = None
+            source = "cache"
+            if self.cache is not None and time_range is None:
+                data = self.cache.get(query_base64, page, config["page_size"], params["is_web"])
+                metrics.inc("cache_hits" if data is not None else "cache_misses")
+            if data is not None:
+                if not config["quiet"]:
+                    print(f"[信息] {label} 第 {page} 页命中本地缓存")
+            else:
+                # 添加请求头
+                headers = {
+                    "Content-Type": "application/x-www-form-urlencoded"
+                }
+                budget = self.budget
+                # 第一页之前不知道total，Hunter最多按整页扣除积分，按整页预留
+                if budget is not None and not budget.reserve(config["page_size"]):
+                    metrics.inc("budget_refusals")
+                    if not config["quiet"]:
+                        print(f"[警告] 积分预算不足，跳过 {label} 的第 {page} 页")
+                    return None
+                try:
+                    data = self.session.get_json(config["api_url"], params, headers)
+                finally:
+                    if budget is not None:
+                        budget.release(config["page_size"])
+                source = "api"
+                # 只缓存成功的响应
+                if self.cache is not None and time_range is None and data.get("code") == 200:
+                    self.cache.put(query_base64, page, config["page_size"], params["is_web"], data)
+            if self.archive is not None:
+                self.archive.append(query_base64, page, config["page_size"], params["is_web"], time_range,
+                                    source, data)
+
+            # 检查API返回状态
+            if data.get("code") != 200:
+                metrics.inc("api_errors")
+                print(f"[错误] API请求失败: {data.get('message', '未知错误')}")
+                return None
+            metrics.inc("pages")
+            return data
+
+        except requests.exceptions.RequestException as e:
+            # 异常信息中包含带api-key的完整URL，输出前隐去密钥
+            message = self.key_pool.redact(str(e))
+            print(f"[错误] 请求异常: {message}")
+        except json.JSONDecodeError:
+            print("[错误] 解析API响应失败")
+        except Exception as e:
+            print(f"[错误] 未知异常: {str(e)}")
+        return None
+
+    def _replay_page(self, query_base64, page, label, time_range, is_web):
+        """
+        从归档中读取单页，归档中没有该页时返回None
+        """
+        data = self.replay.get(query_base64, page, self.config["page_size"], is_web, time_range)
+        if data is None:
+            self.metrics.inc("replay_misses")
+            print(f"[警告] 归档中没有 {label} 第 {page} 页的响应")
+            return None
+        self.metrics.inc("replay_hits")
+        self.metrics.inc("pages")
+        return data
+
+    def run_query(self, query, consume, label, checkpoint=None, key=None, saturation=0, restored=None,
+                  time_range=None):
+        """
+        获取一个查询需要的所有页，consume(arr)按页码顺序处理每页数据，返回是否正常完成
+
+        checkpoint不为None时以key（默认为查询语句）记录每页数据，已完成的查询直接从断点日志还原，
+        未完成的查询只获取缺失的页。restored为调用方已获取的页{page: (total, arr)}。
+        time_range见fetch_page。
+        """
+        query_base64 = self.encode_query(query)
+        key = key or query
+
+        def timed_consume(arr):
+            with self.metrics.timer("parse_dedup"):
+                return consume(arr)
+
+        restored = dict(restored or {})
+        if checkpoint is not None:
+            for page, total, arr in checkpoint.pages(key):
+                restored.setdefault(page, (total, arr))
+            if checkpoint.is_done(key):
+                for page in sorted(restored):
+                    timed_consume(restored[page][1])
+                return True
+            if restored and not self.config["quiet"]:
+                print(f"[信息] {label} 从断点继续，已还原 {len(restored)} 页结果")
+
+        def record(page, total, arr):
+            if checkpoint is not None:
+                checkpoint.record_page(key, page, total, arr)
+
+        # 第一页返回total后，并发获取其余需要的页
+        completed = paginate(
+            lambda page: self.fetch_page(query_base64, page, label, time_range),
+            timed_consume,
+            self.config["page_size"],
+            self.config["max_page"],
+            page_workers=self.config["page_workers"],
+            saturation=saturation,
+            restored=restored,
+            on_page=record
+        )
+
+        # 只有正常查询完所有页的目标才标记为完成，出错的目标在续查时只获取缺失的页
+        if checkpoint is not None and completed:
+            checkpoint.mark_done(key)
+        if not completed and self.raise_incomplete:
+            raise IncompleteQueryError(f"{label} 的部分结果页未能获取")
+        return completed
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+并发请求合并
+
+多个线程同时查询同一个目标时，只有第一个线程真正执行查询，其余线程等待并共享它的结果，
+相同目标在同一时刻最多只有一个查询在进行。查询结束后不保留结果，之后的查询重新执行
+（重复查询由响应缓存负责）。
+"""
+
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Coalescer:
+    """
+    按键合并并发调用，多个线程共享
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def run(self, key, func):
+        """
+        执行func()并返回(结果, 是否与其他调用合并)；func抛出的异常会传给所有等待的调用者
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        """
+        当前正在进行的调用数
+        """
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+批量查询执行引擎
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+def run_batch(func, items, workers=1):
+    """
+    使用线程池并发执行func(item)，按输入顺序返回结果
+
+    workers小于等于1时在当前线程中顺序执行，与原有行为保持一致
+    """
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    pool = ThreadPoolExecutor(max_workers=min(workers, len(items)))
+    try:
+        results = list(pool.map(func, items))
+    except BaseException:
+        # 中断（如Ctrl-C）时取消尚未开始的任务，正在执行的任务完成当前目标后退出
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return results
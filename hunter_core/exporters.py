@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+结果导出
+
+pandas只在读取Excel和生成汇总表时才导入，单次查询和被其他脚本调用时不承担其导入开销。
+写入通过hunter_core.sinks逐行或按列式批次进行，不在内存中构建完整的表格（汇总表需要的列除外）。
+"""
+
+import csv
+import os
+
+from hunter_core.sinks import open_sink
+
+
+def _ensure_dir(output_file):
+    output_dir = os.path.dirname(output_file)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+
+def read_excel_rows(input_file):
+    """
+    读取Excel文件中的所有行，缺失值读取为空字符串
+    """
+    import pandas as pd
+
+    return pd.read_excel(input_file, dtype=str).fillna("").to_dict("records")
+
+
+def write_excel(rows, columns, output_file, alt_prefix="hunter_results"):
+    """
+    将结果行导出到Excel文件
+
+    使用只写模式逐行写入，内存占用与行数无关；超过单个工作表的行数上限时自动新建工作表
+    """
+    export_rows(rows, columns, output_file, "xlsx", alt_prefix)
+
+
+def export_rows(rows, columns, output_file, fmt="xlsx", alt_prefix="hunter_results"):
+    """
+    将结果行按指定格式（见sinks.SINK_FORMATS）流式导出
+    """
+    try:
+        options = {"alt_prefix": alt_prefix} if fmt == "xlsx" else {}
+        with open_sink(fmt, output_file, columns, **options) as sink:
+            sink.write_rows(rows)
+    except Exception as e:
+        print(f"[错误] 导出{fmt.upper()}失败: {str(e)}")
+        return
+    if getattr(sink, "sheets", 1) > 1:
+        print(f"[信息] 共 {sink.rows} 行，超过Excel单表行数上限，已分为 {sink.sheets} 个工作表")
+    print(f"\n[成功] 结果已导出到 {sink.path}")
+
+
+def export_batches(batches, columns, output_file, fmt="xlsx", alt_prefix="hunter_results", summarize=None):
+    """
+    将列式批次（见ResultStore.iter_batches）按指定格式导出，summarize不为None时在同一遍中生成汇总表
+
+    summarize(frame)接收全部结果的DataFrame，返回[(表名, DataFrame), ...]（见hunter_core.summary）。
+    xlsx格式的汇总表写入同一个工作簿中明细表之后的工作表，其他格式写入输出文件旁的“文件名_表名.csv”
+    """
+    from hunter_core.summary import ColumnCollector
+
+    collector = ColumnCollector(columns) if summarize is not None else None
+    written = []
+    try:
+        options = {"alt_prefix": alt_prefix} if fmt == "xlsx" else {}
+        # 出错时sink放弃输出并删除不完整的文件
+        with open_sink(fmt, output_file, columns, **options) as sink:
+            for batch in batches:
+                sink.write_batch(batch)
+                if collector is not None:
+                    collector.add(batch)
+            sheets = summarize(collector.frame()) if collector is not None else []
+            for title, frame in sheets:
+                if fmt == "xlsx":
+                    sink.add_sheet(title, list(frame.columns), frame.itertuples(index=False, name=None))
+                else:
+                    summary_file = f"{os.path.splitext(output_file)[0]}_{title}.csv"
+                    written.append(summary_file)
+                    frame.to_csv(summary_file, index=False, encoding="utf-8-sig")
+    except Exception as e:
+        for summary_file in written:
+            if os.path.exists(summary_file):
+                os.remove(summary_file)
+        print(f"[错误] 导出{fmt.upper()}失败: {str(e)}")
+        return
+    if getattr(sink, "sheets", 1) > 1:
+        print(f"[信息] 共 {sink.rows} 行，超过Excel单表行数上限，已分为 {sink.sheets} 个工作表")
+    if sheets:
+        print("[信息] 汇总表：" + "，".join(f"{title} {len(frame)} 行" for title, frame in sheets))
+    print(f"\n[成功] 结果已导出到 {sink.path}")
+
+
+def write_csv(rows, columns, output_file):
+    """
+    将结果行导出到CSV文件（带BOM，便于Excel直接打开）
+    """
+    _ensure_dir(output_file)
+    with open(output_file, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
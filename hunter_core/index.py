@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+基于本地结果库的离线实体索引
+
+- 域名：按标签倒序（com -> example -> www）组织的前缀树，查询后缀时只遍历对应子树
+- IP：按地址转换为整数后排序，网段和IP范围查询用二分查找定位区间
+- 企业名称和备案号：哈希表
+
+索引在内存中根据结果库一次性构建，之后的查询不访问磁盘。
+"""
+
+import bisect
+import ipaddress
+import os
+import sqlite3
+
+from hunter_core.results import NO_COMPANY, NO_ICP, NO_IP, AssetRecord
+
+# hunter_ip.py和hunter_icp.py在结果库中的结果表
+SOURCE_TABLES = ("reverse_icp", "reverse_domain")
+# 结果表中表示“没有结果”的占位值，不进入索引
+PLACEHOLDERS = {"", "无", "未找到企业信息", "未找到域名", NO_IP}
+
+
+def _value(row, column):
+    value = (row.get(column) or "").strip()
+    return None if value in PLACEHOLDERS else value
+
+
+class _TrieNode:
+    __slots__ = ("children", "records")
+
+    def __init__(self):
+        self.children = {}
+        self.records = []
+
+
+class EntityIndex:
+    """
+    资产记录的内存索引，所有lookup方法返回AssetRecord列表
+    """
+
+    def __init__(self):
+        self.records = []
+        self._trie = _TrieNode()
+        self._companies = {}
+        self._icp_numbers = {}
+        # 每个IP版本一组按地址排序的(地址, 记录序号)
+        self._ips = {4: [], 6: []}
+        self._ip_keys = None
+
+    def __len__(self):
+        return len(self.records)
+
+    @classmethod
+    def from_store(cls, path, tables=SOURCE_TABLES):
+        """
+        从结果库读取所有结果表构建索引，结果库不存在时返回空索引
+        """
+        index = cls()
+        if not os.path.exists(path):
+            return index
+        conn = sqlite3.connect(path, timeout=30)
+        try:
+            existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            for table in tables:
+                if table not in existing:
+                    continue
+                cursor = conn.execute(f'SELECT * FROM "{table}"')
+                columns = [description[0] for description in cursor.description]
+                while True:
+                    rows = cursor.fetchmany(10000)
+                    if not rows:
+                        break
+                    for row in rows:
+                        index.add_row(dict(zip(columns, row)))
+        finally:
+            conn.close()
+        return index
+
+    def add_row(self, row):
+        """
+        加入一行结果（两个工具结果表中的列名），返回是否加入了索引
+        """
+        domain = _value(row, "域名")
+        ip = _value(row, "IP地址")
+        if not domain and not ip:
+            return False
+        company = _value(row, "企业名称")
+        if company == NO_COMPANY:
+            company = None
+        icp_number = _value(row, "备案号")
+        record = AssetRecord(company, icp_number or (NO_ICP if company else None),
+                             domain, ip, row.get("网站标题") or "")
+        self.add(record)
+        return True
+
+    def add(self, record):
+        record_id = len(self.records)
+        self.records.append(record)
+        if record.domain:
+            node = self._trie
+            for label in reversed(record.domain.lower().rstrip(".").split(".")):
+                node = node.children.setdefault(label, _TrieNode())
+            node.records.append(record_id)
+        if record.ip:
+            try:
+                address = ipaddress.ip_address(record.ip)
+            except ValueError:
+                address = None
+            if address is not None:
+                self._ips[address.version].append((int(address), record_id))
+                self._ip_keys = None
+        if record.company:
+            self._companies.setdefault(record.company.strip(), []).append(record_id)
+        if record.icp_number and record.icp_number != NO_ICP:
+            self._icp_numbers.setdefault(record.icp_number.strip(), []).append(record_id)
+
+    def _get(self, record_ids):
+        return [self.records[record_id] for record_id in record_ids]
+
+    def lookup_domain(self, suffix):
+        """
+        返回域名等于suffix或为其子域名的记录，suffix可以写成*.example.com
+        """
+        suffix = suffix.strip().lower().rstrip(".")
+        if suffix.startswith("*."):
+            suffix = suffix[2:]
+        node = self._trie
+        for label in reversed(suffix.split(".")):
+            node = node.children.get(label)
+            if node is None:
+                return []
+        record_ids = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            record_ids.extend(node.records)
+            stack.extend(node.children.values())
+        return self._get(sorted(record_ids))
+
+    def _sorted_ips(self):
+        # 索引构建完成后第一次查询IP时排序，之后新增记录时重新排序
+        if self._ip_keys is None:
+            for entries in self._ips.values():
+                entries.sort()
+            self._ip_keys = {version: [key for key, _ in entries] for version, entries in self._ips.items()}
+        return self._ip_keys
+
+    def lookup_network(self, network):
+        """
+        返回IP属于该网段（ipaddress网段对象或CIDR字符串）的记录
+        """
+        if isinstance(network, str):
+            network = ipaddress.ip_network(network.strip(), strict=False)
+        keys = self._sorted_ips()[network.version]
+        entries = self._ips[network.version]
+        start = bisect.bisect_left(keys, int(network.network_address))
+        end = bisect.bisect_right(keys, int(network.broadcast_address))
+        return self._get(record_id for _, record_id in entries[start:end])
+
+    def lookup_ip(self, ip):
+        try:
+            address = ipaddress.ip_address(ip.strip())
+        except ValueError:
+            return []
+        return self.lookup_network(ipaddress.ip_network(address))
+
+    def lookup_company(self, name):
+        return self._get(self._companies.get(name.strip(), ()))
+
+    def lookup_icp(self, number):
+        return self._get(self._icp_numbers.get(number.strip(), ()))
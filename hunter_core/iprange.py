@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+IP网段和IP范围的解析
+
+支持IPv4/IPv6的CIDR网段（1.2.3.0/24、2001:db8::/120）和起止范围（1.2.3.4-1.2.3.80，
+IPv4可简写为1.2.3.4-80）。范围会被拆成覆盖它的最少数量的CIDR网段，每个网段作为一个
+ip="网段"查询。
+"""
+
+import ipaddress
+
+
+def is_ip_address(value):
+    """
+    判断是否为单个IPv4或IPv6地址
+    """
+    try:
+        ipaddress.ip_address(value.strip())
+        return True
+    except ValueError:
+        return False
+
+
+def parse_ip_range(value):
+    """
+    解析CIDR网段或IP范围，返回覆盖该范围的网段列表；不是合法的网段或范围时返回None
+    """
+    value = value.strip()
+    try:
+        if "/" in value:
+            return [ipaddress.ip_network(value, strict=False)]
+        if "-" in value:
+            start, end = (part.strip() for part in value.split("-", 1))
+            first = ipaddress.ip_address(start)
+            if first.version == 4 and end.isdigit():
+                end = f"{start.rsplit('.', 1)[0]}.{end}"
+            last = ipaddress.ip_address(end)
+            if last < first:
+                first, last = last, first
+            return list(ipaddress.summarize_address_range(first, last))
+    except (ValueError, TypeError):
+        return None
+    return None
+
+
+def is_ip_range(value):
+    """
+    判断是否为包含多个地址的网段或范围
+    """
+    networks = parse_ip_range(value)
+    return bool(networks) and sum(network.num_addresses for network in networks) > 1
+
+
+def split_network(network):
+    """
+    将网段对半拆分
+    """
+    return list(network.subnets(prefixlen_diff=1))
+
+
+def in_network(ip, network):
+    """
+    判断结果中的IP是否属于该网段
+    """
+    try:
+        return ipaddress.ip_address(ip) in network
+    except (TypeError, ValueError):
+        return False
+
+
+def ip_sort_key(ip):
+    """
+    按地址大小排序IP
+    """
+    address = ipaddress.ip_address(ip)
+    return address.version, address
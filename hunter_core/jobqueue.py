@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+基于SQLite的本地任务队列
+
+enqueue将目标写入任务库，多个worker进程（可以在不同主机上，通过共享文件系统访问同一个
+任务库）以租约方式领取目标，查询完成后把结果写回任务库。worker中断或崩溃时，租约到期的
+目标会被其他worker重新领取。
+
+任务库不使用WAL模式：WAL依赖同一主机上的共享内存，不能用于网络文件系统。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueue:
+    """
+    以queue区分不同批次的任务表，kind为目标类型（domain、ip、icp）
+    """
+
+    def __init__(self, path, queue="default"):
+        queue_dir = os.path.dirname(path)
+        if queue_dir and not os.path.exists(queue_dir):
+            os.makedirs(queue_dir, exist_ok=True)
+        self.path = path
+        self.queue = queue
+        self._lock = threading.Lock()
+        # 自行管理事务，领取任务时用BEGIN IMMEDIATE保证多个进程不会领到同一个目标
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, queue TEXT NOT NULL, kind TEXT NOT NULL,"
+            " target TEXT NOT NULL, status TEXT NOT NULL, worker TEXT, lease_until REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, result TEXT, error TEXT, updated_at REAL NOT NULL,"
+            " UNIQUE (queue, kind, target))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (queue, status, id)")
+
+    def _transaction(self, func):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def enqueue(self, targets, kind):
+        """
+        写入目标，已在队列中的目标会被忽略，返回实际新增的数量
+        """
+        now = time.time()
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (queue, kind, target, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+                ((self.queue, kind, target, PENDING, now) for target in targets)
+            )
+            return conn.total_changes - before
+        return self._transaction(insert)
+
+    def claim(self, worker, limit=10, lease=600, max_attempts=3):
+        """
+        领取最多limit个待处理或租约已到期的目标，返回[(id, kind, target), ...]
+
+        已领取max_attempts次仍未完成的目标标记为失败，不再分配
+        """
+        now = time.time()
+
+        def lease_jobs(conn):
+            conn.execute(
+                "UPDATE jobs SET status=?, error=?, updated_at=?"
+                " WHERE queue=? AND status=? AND lease_until<? AND attempts>=?",
+                (FAILED, "租约多次过期", now, self.queue, LEASED, now, max_attempts)
+            )
+            rows = conn.execute(
+                "SELECT id, kind, target FROM jobs WHERE queue=?"
+                " AND (status=? OR (status=? AND lease_until<?)) ORDER BY id LIMIT ?",
+                (self.queue, PENDING, LEASED, now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET status=?, worker=?, lease_until=?, attempts=attempts+1, updated_at=? WHERE id=?",
+                ((LEASED, worker, now + lease, now, row[0]) for row in rows)
+            )
+            return rows
+        return self._transaction(lease_jobs)
+
+    def renew(self, worker, lease=600):
+        """
+        延长worker持有的所有租约，返回延长的数量
+        """
+        now = time.time()
+
+        def extend(conn):
+            return conn.execute(
+                "UPDATE jobs SET lease_until=?, updated_at=? WHERE queue=? AND status=? AND worker=?",
+                (now + lease, now, self.queue, LEASED, worker)
+            ).rowcount
+        return self._transaction(extend)
+
+    def complete(self, job_id, result):
+        """
+        写回目标的查询结果；租约过期后被其他worker重复完成时以最后一次为准
+        """
+        now = time.time()
+        self._transaction(lambda conn: conn.execute(
+            "UPDATE jobs SET status=?, result=?, error=NULL, lease_until=NULL, updated_at=? WHERE id=?",
+            (DONE, json.dumps(result, ensure_ascii=False), now, job_id)
+        ))
+
+    def fail(self, job_id, error, max_attempts=3):
+        """
+        目标未能完成查询：领取次数未达到max_attempts时放回队列，否则标记为失败
+        """
+        now = time.time()
+        self._transaction(lambda conn: conn.execute(
+            "UPDATE jobs SET status=CASE WHEN attempts>=? THEN ? ELSE ? END,"
+            " error=?, worker=NULL, lease_until=NULL, updated_at=? WHERE id=? AND status=?",
+            (max_attempts, FAILED, PENDING, error, now, job_id, LEASED)
+        ))
+
+    def release(self, worker):
+        """
+        worker被中断时交还持有的租约，目标立即回到队列且不计入领取次数，返回数量
+        """
+        now = time.time()
+        return self._transaction(lambda conn: conn.execute(
+            "UPDATE jobs SET status=?, worker=NULL, lease_until=NULL, attempts=MAX(attempts-1, 0), updated_at=?"
+            " WHERE queue=? AND status=? AND worker=?",
+            (PENDING, now, self.queue, LEASED, worker)
+        ).rowcount)
+
+    def retry_failed(self):
+        """
+        将失败的目标重新放回队列，返回数量
+        """
+        now = time.time()
+        return self._transaction(lambda conn: conn.execute(
+            "UPDATE jobs SET status=?, attempts=0, error=NULL, updated_at=? WHERE queue=? AND status=?",
+            (PENDING, now, self.queue, FAILED)
+        ).rowcount)
+
+    def stats(self):
+        """
+        返回各状态的目标数量，租约已到期的目标计入pending
+        """
+        now = time.time()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT CASE WHEN status=? AND lease_until<? THEN ? ELSE status END, COUNT(*)"
+                " FROM jobs WHERE queue=? GROUP BY 1",
+                (LEASED, now, PENDING, self.queue)
+            ).fetchall()
+        for status, count in rows:
+            counts[status] = count
+        return counts
+
+    def workers(self):
+        """
+        返回当前持有有效租约的worker及其目标数
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT worker, COUNT(*) FROM jobs WHERE queue=? AND status=? AND lease_until>=?"
+                " GROUP BY worker ORDER BY worker",
+                (self.queue, LEASED, time.time())
+            ).fetchall()
+
+    def iter_results(self, kind=None):
+        """
+        按入队顺序读取已完成目标的结果，返回(kind, target, result)
+        """
+        sql = "SELECT kind, target, result FROM jobs WHERE queue=? AND status=?"
+        params = [self.queue, DONE]
+        if kind is not None:
+            sql += " AND kind=?"
+            params.append(kind)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY id", params).fetchall()
+        for row_kind, target, result in rows:
+            yield row_kind, target, json.loads(result)
+
+    def clear(self):
+        """
+        删除本队列的全部目标
+        """
+        self._transaction(lambda conn: conn.execute("DELETE FROM jobs WHERE queue=?", (self.queue,)))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+API密钥池：每个密钥独立限速和统计剩余积分，请求路由到余量最多的密钥
+
+密钥来源（按顺序合并去重）：CONFIG["api_key"]、CONFIG["api_keys"]、环境变量HUNTER_API_KEYS
+（逗号或空白分隔）以及CONFIG["api_keys_file"]指定的密钥文件（每行一个密钥，#开头为注释）。
+密钥被API拒绝（无效或积分用完）时在本次运行中停用，请求自动切换到其他密钥。
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+
+from hunter_core.ratelimit import TokenBucket
+
+# 提供密钥的环境变量
+ENV_KEYS = "HUNTER_API_KEYS"
+# API返回这些code时表示密钥无效或积分不足，需要换用其他密钥
+INVALID_KEY_CODES = {401}
+EXHAUSTED_KEY_CODES = {403}
+
+
+class NoApiKeyAvailable(Exception):
+    """
+    密钥池中没有可用的密钥
+    """
+
+
+def mask_key(key):
+    """
+    输出时隐去密钥的大部分字符
+    """
+    return f"{key[:4]}****" if len(key) > 8 else "****"
+
+
+def load_keys(config):
+    """
+    从CONFIG、环境变量和密钥文件读取所有密钥，去重后保持原有顺序
+    """
+    keys = [config.get("api_key") or ""]
+    keys.extend(config.get("api_keys") or [])
+    keys.extend(re.split(r"[\s,;]+", os.environ.get(ENV_KEYS, "")))
+    path = config.get("api_keys_file")
+    if path:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                keys.extend(line.split("#", 1)[0] for line in f)
+        else:
+            print(f"[警告] 密钥文件 {path} 不存在")
+    return list(dict.fromkeys(key.strip() for key in keys if key and key.strip()))
+
+
+def rejection_reason(data):
+    """
+    判断API响应是否表示密钥被拒绝，返回停用原因，未被拒绝时返回None
+    """
+    code = data.get("code")
+    if code == 200:
+        return None
+    if code in INVALID_KEY_CODES:
+        return "无效"
+    if code in EXHAUSTED_KEY_CODES or "积分" in str(data.get("message") or ""):
+        return "积分已用完"
+    return None
+
+
+def _priority(key):
+    # 尚未请求过的密钥排在最前，其余按剩余积分从多到少
+    return key.remaining is not None, -(key.remaining or 0)
+
+
+class ApiKey:
+    """
+    密钥池中的一个密钥
+    """
+
+    def __init__(self, key, rate):
+        self.key = key
+        self.limiter = TokenBucket(rate)
+        # 最近一次响应中的剩余积分，尚未请求过时为None
+        self.remaining = None
+        # 停用原因，可用时为None
+        self.disabled = None
+        self.requests = 0
+
+    @property
+    def masked(self):
+        return mask_key(self.key)
+
+    @property
+    def fingerprint(self):
+        """
+        密钥的摘要，用于在断点日志等文件中指代密钥而不保存密钥本身
+        """
+        return hashlib.sha256(self.key.encode("utf-8")).hexdigest()[:16]
+
+
+class KeyPool:
+    """
+    线程共享的密钥池
+
+    acquire优先选择剩余积分最多的密钥（尚未请求过的密钥视为最多），该密钥的限速器没有令牌时
+    依次尝试其他密钥，因此多个密钥的总请求速率约为单个密钥的倍数。
+    """
+
+    def __init__(self, keys, rate):
+        self.keys = [ApiKey(key, rate) for key in keys]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(load_keys(config), config["rate_limit"])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def active(self):
+        with self._lock:
+            return [key for key in self.keys if key.disabled is None]
+
+    def acquire(self, key=None):
+        """
+        阻塞直到某个可用密钥取得令牌，返回该密钥；所有密钥都已停用时抛出NoApiKeyAvailable
+
+        指定key时只等待该密钥的令牌（批量任务的提交、轮询和下载必须使用同一个密钥），
+        该密钥已停用时抛出NoApiKeyAvailable
+        """
+        if key is not None:
+            if key.disabled is not None:
+                raise NoApiKeyAvailable(f"API密钥 {key.masked} {key.disabled}")
+            key.limiter.acquire()
+            with self._lock:
+                key.requests += 1
+            return key
+        while True:
+            active = self.active()
+            if not active:
+                raise NoApiKeyAvailable("没有可用的API密钥（均已无效或积分用完）")
+            active.sort(key=_priority)
+            for key in active:
+                if key.limiter.try_acquire():
+                    with self._lock:
+                        key.requests += 1
+                    return key
+            time.sleep(max(0.001, min(key.limiter.wait_time() for key in active)))
+
+    def choose(self):
+        """
+        不取令牌地选出当前优先使用的密钥，所有密钥都已停用时抛出NoApiKeyAvailable
+        """
+        active = self.active()
+        if not active:
+            raise NoApiKeyAvailable("没有可用的API密钥（均已无效或积分用完）")
+        return min(active, key=_priority)
+
+    def record_remaining(self, key, remaining):
+        """
+        记录响应中的剩余积分，积分用完的密钥随即停用
+        """
+        with self._lock:
+            key.remaining = remaining
+        if remaining <= 0:
+            self.disable(key, "积分已用完")
+
+    def disable(self, key, reason):
+        with self._lock:
+            if key.disabled is not None:
+                return
+            key.disabled = reason
+            if reason == "积分已用完":
+                key.remaining = 0
+            left = sum(1 for item in self.keys if item.disabled is None)
+        if len(self.keys) > 1:
+            print(f"[警告] API密钥 {key.masked} {reason}，已停用，剩余 {left} 个可用密钥")
+
+    def total_remaining(self):
+        """
+        所有可用密钥的剩余积分之和，有密钥尚未请求过（剩余积分未知）时返回None
+        """
+        with self._lock:
+            active = [key for key in self.keys if key.disabled is None]
+            if any(key.remaining is None for key in active):
+                return None
+            return sum(key.remaining for key in active)
+
+    def find(self, fingerprint):
+        """
+        按fingerprint查找密钥，找不到时返回None
+        """
+        for key in self.keys:
+            if key.fingerprint == fingerprint:
+                return key
+        return None
+
+    def redact(self, text):
+        """
+        隐去文本（如异常信息中的URL）中出现的所有密钥
+        """
+        for key in self.keys:
+            text = text.replace(key.key, "***")
+        return text
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+批量运行内的资产知识表
+
+记录本次运行中每个查询返回的全部条目（按域名和IP索引），以及哪些查询的结果已被完整获取。
+后续目标被某个完整获取的查询覆盖时（域名是其子域名，或IP在其网段内），该目标的全部结果
+已经在知识表中，不需要再请求API。
+
+只有结果总数小于分页上限（page_size * max_page）且未因饱和提前停止的查询才算完整获取。
+"""
+
+import ipaddress
+import threading
+
+from hunter_core.index import EntityIndex
+
+
+class KnowledgeTable:
+    """
+    多个工作线程共享的知识表，生命周期为一次批量运行
+    """
+
+    def __init__(self, page_size, max_page):
+        self.capacity = page_size * max_page
+        self.satisfied = set()
+        self._index = EntityIndex()
+        self._domains = set()
+        self._networks = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._index)
+
+    def observe(self, records):
+        """
+        记录一页解析后的条目
+        """
+        with self._lock:
+            for record in records:
+                if record.domain or record.ip:
+                    self._index.add(record)
+
+    def complete(self, target, is_domain, rows):
+        """
+        查询target共获取rows条结果且正常完成：未达到分页上限时记为完整获取
+        """
+        if rows >= self.capacity:
+            return False
+        with self._lock:
+            if is_domain:
+                self._domains.add(target.lower().rstrip("."))
+            else:
+                self._networks.append(ipaddress.ip_network(target, strict=False))
+        return True
+
+    def _covered(self, target, is_domain):
+        if is_domain:
+            labels = target.lower().rstrip(".").split(".")
+            return any(".".join(labels[i:]) in self._domains for i in range(len(labels) - 1))
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+        except ValueError:
+            return False
+        return any(network.version == covered.version and network.subnet_of(covered)
+                   for covered in self._networks)
+
+    def lookup(self, target, is_domain):
+        """
+        target已被完整获取的查询覆盖时返回其全部条目（可能为空列表），否则返回None
+        """
+        with self._lock:
+            if not self._covered(target, is_domain):
+                return None
+            self.satisfied.add(target)
+            if is_domain:
+                return self._index.lookup_domain(target)
+            return self._index.lookup_network(target)
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+运行指标：请求耗时分布、重试、接收字节数、各阶段耗时和积分消耗
+
+运行结束后可输出为JSON摘要，或Prometheus textfile格式（文件名以.prom结尾时）。
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# 请求耗时直方图的分桶上限(秒)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# 指标说明，用于Prometheus的HELP行
+DESCRIPTIONS = {
+    "requests": "发出的HTTP请求数（含重试）",
+    "retries": "重试次数",
+    "throttled": "被限流的次数（HTTP 429或code=429）",
+    "server_errors": "服务端5xx错误次数",
+    "network_errors": "网络异常次数",
+    "bytes_received": "接收的响应字节数",
+    "pages": "成功获取的页数（含缓存命中）",
+    "api_errors": "API返回非200状态码的次数",
+    "cache_hits": "本地缓存命中次数",
+    "cache_misses": "本地缓存未命中次数",
+    "duplicate_targets": "输入规范化后重复、未再查询的目标数",
+    "reused_targets": "被本次运行中其他目标的完整结果覆盖、未请求API的目标数",
+    "replay_hits": "重放模式下从归档读取的页数",
+    "replay_misses": "重放模式下归档中缺少的页数",
+    "bulk_tasks": "提交的服务端批量任务数",
+    "bulk_rows": "从批量任务结果文件中读取的记录数",
+    "bulk_fallbacks": "批量任务失败后改为逐个查询的目标数",
+    "lookups": "常驻查询服务处理的查询数",
+    "coalesced_lookups": "与进行中的相同查询合并、未单独请求API的查询数",
+    "offline_hits": "离线索引命中的目标数",
+    "offline_misses": "离线索引未命中、需要请求API的目标数",
+    "budget_refusals": "积分预算不足、未发出的请求数",
+    "points_consumed": "API响应中累计的消耗积分",
+    "points_remaining": "API响应中最近一次的剩余积分（使用多个密钥时为所有可用密钥之和）",
+    "key_failovers": "密钥被拒绝后换用其他密钥重发的次数",
+    "keys_active": "密钥池中仍可用的密钥数",
+    "run_seconds": "本次运行总耗时(秒)",
+    "request_seconds": "单次HTTP请求耗时(秒)"
+}
+
+
+class Metrics:
+    """
+    线程安全的指标收集器，包含计数器、瞬时值、阶段耗时和直方图
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.stages = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS):
+        """
+        将一次观测值计入直方图
+        """
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = {
+                    "buckets": list(buckets), "counts": [0] * len(buckets), "sum": 0.0, "count": 0
+                }
+            for i, bound in enumerate(histogram["buckets"]):
+                if value <= bound:
+                    histogram["counts"][i] += 1
+                    break
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def add_stage(self, name, seconds):
+        with self._lock:
+            stage = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            stage["seconds"] += seconds
+            stage["calls"] += 1
+
+    @contextmanager
+    def timer(self, name):
+        """
+        统计代码块的耗时，累计到阶段name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        """
+        返回可直接序列化为JSON的指标摘要
+        """
+        with self._lock:
+            histograms = {}
+            for name, histogram in self.histograms.items():
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip(histogram["buckets"], histogram["counts"]):
+                    cumulative += count
+                    buckets[str(bound)] = cumulative
+                buckets["+Inf"] = histogram["count"]
+                histograms[name] = {
+                    "buckets": buckets,
+                    "sum": round(histogram["sum"], 6),
+                    "count": histogram["count"],
+                    "avg": round(histogram["sum"] / histogram["count"], 6) if histogram["count"] else 0
+                }
+            return {
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "stages": {name: {"seconds": round(stage["seconds"], 6), "calls": stage["calls"]}
+                           for name, stage in self.stages.items()},
+                "histograms": histograms
+            }
+
+    def to_prometheus(self, prefix="hunter_"):
+        """
+        按Prometheus textfile格式输出
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def header(name, kind, help_key):
+            if help_key in DESCRIPTIONS:
+                lines.append(f"# HELP {name} {DESCRIPTIONS[help_key]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for key, value in sorted(snapshot["counters"].items()):
+            name = f"{prefix}{key}_total"
+            header(name, "counter", key)
+            lines.append(f"{name} {value}")
+        for key, value in sorted(snapshot["gauges"].items()):
+            if value is None:
+                continue
+            name = f"{prefix}{key}"
+            header(name, "gauge", key)
+            lines.append(f"{name} {value}")
+        if snapshot["stages"]:
+            header(f"{prefix}stage_seconds_total", "counter", "")
+            for stage, values in sorted(snapshot["stages"].items()):
+                lines.append(f'{prefix}stage_seconds_total{{stage="{stage}"}} {values["seconds"]}')
+            header(f"{prefix}stage_calls_total", "counter", "")
+            for stage, values in sorted(snapshot["stages"].items()):
+                lines.append(f'{prefix}stage_calls_total{{stage="{stage}"}} {values["calls"]}')
+        for key, histogram in sorted(snapshot["histograms"].items()):
+            name = f"{prefix}{key}"
+            header(name, "histogram", key)
+            for bound, count in histogram["buckets"].items():
+                lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f"{name}_sum {histogram['sum']}")
+            lines.append(f"{name}_count {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        写入指标文件，.prom结尾时使用Prometheus格式，否则为JSON
+        """
+        output_dir = os.path.dirname(path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        if path.endswith(".prom"):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        # 先写临时文件再替换，避免node_exporter读到写了一半的文件
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+        print(f"[成功] 运行指标已保存到 {path}")
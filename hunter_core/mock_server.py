@@ -0,0 +1,453 @@
+# -*- coding: utf-8 -*-
+"""
+本地模拟的Hunter API服务，用于在不消耗积分的情况下测试和压测查询工具
+
+返回结构与 /openApi/search 一致（code、message、data.total、data.arr、消耗/剩余积分），
+结果根据查询语句确定性地生成，同一查询每次返回相同的数据。支持模拟网络延迟、限流（429）、
+服务端错误（503）和积分用尽。同时模拟批量任务接口（提交、轮询进度和下载CSV结果，见hunter_core.bulk）。
+
+单独运行：
+
+    python -m hunter_core.mock_server --port 18080 --latency 0.05 --throttle 0.1
+
+然后将工具CONFIG中的api_url改为 http://127.0.0.1:18080/openApi/search 即可。
+"""
+
+import argparse
+import base64
+import csv
+import email
+import hashlib
+import io
+import ipaddress
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TERM_PATTERN = re.compile(r'([\w.]+)\s*=\s*"([^"]*)"')
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# 结果的更新时间分布在基准时间之前的90天内
+BASE_TIME = time.time()
+UPDATE_SPREAD = 90 * 24 * 3600
+
+
+def _digest(value):
+    return int(hashlib.md5(value.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def synthetic_item(field, value, index, companies=50, now=None):
+    """
+    生成查询条件 field="value" 的第index条结果
+
+    domain查询返回包含该域名的子域名，ip查询返回该IP上的网站，icp.name查询返回该企业的网站。
+    每10条中有1条没有备案信息，用于覆盖企业名称的兜底逻辑。更新时间分布在now之前的90天内。
+    """
+    h = _digest(f"{field}={value}#{index}")
+    if field == "domain":
+        domain = value if index == 0 else f"www{index}.{value}"
+        ip = f"10.{h % 256}.{(h >> 8) % 256}.{(h >> 16) % 256}"
+    elif field == "ip" and "/" in value:
+        network = ipaddress.ip_network(value, strict=False)
+        ip = str(network.network_address + h % network.num_addresses)
+        domain = f"site{index}.ip-{ip.replace('.', '-').replace(':', '-')}.example"
+    elif field == "ip":
+        domain = f"site{index}.ip-{value.replace('.', '-').replace(':', '-')}.example"
+        ip = value
+    else:
+        domain = f"d{index}.c{_digest(value) % 100000}.example"
+        ip = f"172.16.{h % 256}.{(h >> 8) % 256}"
+
+    if field == "icp.name":
+        company, number = value, f"京ICP备{_digest(value) % 100000000:08d}号"
+    elif index % 10 == 9:
+        company, number = "", ""
+    else:
+        company_id = h % companies
+        company, number = f"测试企业{company_id}有限公司", f"京ICP备{company_id:08d}号"
+
+    return {
+        "ip": ip,
+        "port": 443,
+        "domain": domain,
+        "web_title": f"{domain} 首页",
+        "company": company,
+        "number": number,
+        "url": f"https://{domain}",
+        "updated_at": time.strftime(TIME_FORMAT, time.localtime((now or BASE_TIME) - h % UPDATE_SPREAD))
+    }
+
+
+def synthetic_page(query, page, page_size, results_per_target=20, companies=50,
+                   start_time=None, end_time=None, now=None):
+    """
+    按查询语句生成一页结果，返回(total, arr)
+
+    ||合并的查询中每个条件各有results_per_target条结果，按条件顺序排列；
+    ip="网段"条件的结果数随网段大小增长，每16个地址results_per_target条。
+    指定start_time/end_time时只返回更新时间在该范围内的结果。
+    """
+    terms = TERM_PATTERN.findall(query) or [("keyword", query)]
+    counts = [_term_count(field, value, results_per_target) for field, value in terms]
+    if start_time or end_time:
+        items = [synthetic_item(field, value, index, companies, now)
+                 for (field, value), count in zip(terms, counts) for index in range(count)]
+        items = [item for item in items
+                 if (not start_time or item["updated_at"] >= start_time)
+                 and (not end_time or item["updated_at"] <= end_time)]
+        start = (page - 1) * page_size
+        return len(items), items[start:start + page_size]
+    total = sum(counts)
+    start = (page - 1) * page_size
+    arr = []
+    term, offset = 0, 0
+    for position in range(start, min(start + page_size, total)):
+        while position >= offset + counts[term]:
+            offset += counts[term]
+            term += 1
+        field, value = terms[term]
+        arr.append(synthetic_item(field, value, position - offset, companies, now))
+    return total, arr
+
+
+def _term_count(field, value, results_per_target):
+    if field == "ip" and "/" in value:
+        try:
+            network = ipaddress.ip_network(value, strict=False)
+        except ValueError:
+            return results_per_target
+        return results_per_target * max(1, network.num_addresses // 16)
+    return results_per_target
+
+
+class MockHunterAPI:
+    """
+    模拟API的配置和请求统计，多个请求线程共享
+
+    api_key为空时接受任意非空密钥，多个密钥用逗号分隔；quota为每个密钥的可用积分，0表示积分不限。
+    """
+
+    def __init__(self, api_key="", latency=0.0, throttle=0.0, error_rate=0.0,
+                 results_per_target=20, companies=50, quota=0, seed=None, task_delay=1.0, task_errors=0.0):
+        self.api_key = api_key
+        self.api_keys = {key.strip() for key in api_key.split(",") if key.strip()}
+        self.latency = latency
+        self.throttle = throttle
+        self.error_rate = error_rate
+        self.results_per_target = results_per_target
+        self.companies = companies
+        self.quota = quota
+        # 批量任务从提交到完成的时间(秒)，以及任务中被标记为处理失败的目标比例
+        self.task_delay = task_delay
+        self.task_errors = task_errors
+        self.tasks = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests = 0
+            self.pages = 0
+            self.throttled = 0
+            self.errors = 0
+            self.points_consumed = 0
+            # 每个密钥消耗的积分
+            self.key_points = {}
+            self.task_requests = 0
+
+    def _reject(self, params):
+        """
+        模拟延迟、限流、服务端错误和密钥校验，需要拒绝时返回(HTTP状态码, 响应头, 响应体)，否则返回None
+        """
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if roll < self.throttle:
+            with self._lock:
+                self.throttled += 1
+            # 交替模拟HTTP 429和响应体中的code=429两种限流形式
+            if roll < self.throttle / 2:
+                return 429, {"Retry-After": "0.1"}, {"code": 429, "message": "请求太多啦，稍后再试试"}
+            return 200, {}, {"code": 429, "message": "请求太多啦，稍后再试试"}
+        if roll < self.throttle + self.error_rate:
+            with self._lock:
+                self.errors += 1
+            return 503, {}, {"code": 503, "message": "服务暂不可用"}
+
+        api_key = params.get("api-key", "")
+        if not api_key or (self.api_keys and api_key not in self.api_keys):
+            return 200, {}, {"code": 401, "message": "令牌无效"}
+        return None
+
+    def _charge(self, api_key, points):
+        # 扣除积分，积分不足时返回None，否则返回剩余积分
+        with self._lock:
+            used = self.key_points.get(api_key, 0)
+            if self.quota and used + points > self.quota:
+                return None
+            self.points_consumed += points
+            self.key_points[api_key] = used + points
+            return self.quota - used - points if self.quota else 999999
+
+    def handle(self, params):
+        """
+        处理一次查询，返回(HTTP状态码, 响应头, 响应体)
+        """
+        rejected = self._reject(params)
+        if rejected is not None:
+            return rejected
+        api_key = params["api-key"]
+
+        try:
+            query = base64.urlsafe_b64decode(params.get("search", "")).decode("utf-8")
+            page = max(int(params.get("page", "1")), 1)
+            page_size = max(int(params.get("page_size", "10")), 1)
+        except ValueError:
+            return 200, {}, {"code": 400, "message": "参数错误"}
+
+        total, arr = synthetic_page(query, page, page_size, self.results_per_target, self.companies,
+                                    params.get("start_time"), params.get("end_time"))
+        rest = self._charge(api_key, len(arr))
+        if rest is None:
+            return 200, {}, {"code": 403, "message": "今日积分已用完"}
+        with self._lock:
+            self.pages += 1
+
+        return 200, {}, {
+            "code": 200,
+            "message": "success",
+            "data": {
+                "total": total,
+                "arr": arr,
+                "consume_quota": f"消耗积分：{len(arr)}",
+                "rest_quota": f"今日剩余积分：{rest}"
+            }
+        }
+
+    def submit_task(self, params, targets):
+        """
+        提交批量任务，所有目标的结果在提交时一次扣除积分，返回(HTTP状态码, 响应头, 响应体)
+        """
+        rejected = self._reject(params)
+        if rejected is not None:
+            return rejected
+        field = params.get("search_type", "domain")
+        if field not in ("domain", "ip", "icp.name") or not targets:
+            return 200, {}, {"code": 400, "message": "参数错误"}
+        points = sum(_term_count(field, target, self.results_per_target) for target in targets)
+        rest = self._charge(params["api-key"], points)
+        if rest is None:
+            return 200, {}, {"code": 403, "message": "今日积分已用完"}
+        task_id = hashlib.md5(f"{time.time()}#{len(self.tasks)}".encode("utf-8")).hexdigest()[:16]
+        failed = [target for target in targets if _digest(f"task#{target}") % 10000 < self.task_errors * 10000]
+        with self._lock:
+            self.task_requests += 1
+            self.tasks[task_id] = {"key": params["api-key"], "field": field, "targets": targets,
+                                   "failed": failed, "created": time.monotonic()}
+        return 200, {}, {
+            "code": 200,
+            "message": "success",
+            "data": {
+                "task_id": task_id,
+                "consume_quota": f"消耗积分：{points}",
+                "rest_quota": f"今日剩余积分：{rest}"
+            }
+        }
+
+    def _task(self, params, task_id):
+        task = self.tasks.get(task_id)
+        if task is None or task["key"] != params.get("api-key"):
+            return None
+        with self._lock:
+            self.task_requests += 1
+        return task
+
+    def task_status(self, params, task_id):
+        """
+        查询批量任务进度，提交task_delay秒后完成
+        """
+        rejected = self._reject(params)
+        if rejected is not None:
+            return rejected
+        task = self._task(params, task_id)
+        if task is None:
+            return 200, {}, {"code": 404, "message": "任务不存在"}
+        elapsed = time.monotonic() - task["created"]
+        finished = elapsed >= self.task_delay
+        progress = 100 if finished else int(elapsed / self.task_delay * 100)
+        body = {"task_id": task_id, "status": "finished" if finished else "running", "progress": f"{progress}%"}
+        if finished:
+            body["failed"] = task["failed"]
+        return 200, {}, {"code": 200, "message": "success", "data": body}
+
+    def download_task(self, params, task_id):
+        """
+        下载已完成任务的CSV结果，响应体为bytes
+        """
+        rejected = self._reject(params)
+        if rejected is not None:
+            return rejected
+        task = self._task(params, task_id)
+        if task is None:
+            return 200, {}, {"code": 404, "message": "任务不存在"}
+        if time.monotonic() - task["created"] < self.task_delay:
+            return 200, {}, {"code": 400, "message": "任务尚未完成"}
+        columns = ["target", "ip", "port", "domain", "web_title", "company", "number", "url", "updated_at"]
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, columns)
+        writer.writeheader()
+        failed = set(task["failed"])
+        field = task["field"]
+        for target in task["targets"]:
+            if target in failed:
+                continue
+            for index in range(_term_count(field, target, self.results_per_target)):
+                writer.writerow(dict(synthetic_item(field, target, index, self.companies), target=target))
+        return 200, {"Content-Type": "text/csv; charset=utf-8"}, buffer.getvalue().encode("utf-8")
+
+
+def _read_targets(content_type, body):
+    # 从multipart/form-data请求体中取出file字段，每行一个目标
+    message = email.message_from_bytes(f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body)
+    for part in message.walk():
+        if part.get_param("name", header="content-disposition") == "file":
+            content = part.get_payload(decode=True).decode("utf-8-sig")
+            return [line.strip() for line in content.splitlines() if line.strip()]
+    return []
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parts = url.path.split("/")
+        if url.path == "/openApi/search":
+            status, headers, body = self.server.api.handle(params)
+        elif len(parts) == 5 and url.path.startswith("/openApi/search/batch/"):
+            status, headers, body = self.server.api.task_status(params, parts[4])
+        elif len(parts) == 5 and url.path.startswith("/openApi/search/download/"):
+            status, headers, body = self.server.api.download_task(params, parts[4])
+        else:
+            status, headers, body = 404, {}, {"code": 404, "message": "接口不存在"}
+        self._send(status, headers, body)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if url.path != "/openApi/search/batch":
+            status, headers, body = 404, {}, {"code": 404, "message": "接口不存在"}
+        else:
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            targets = _read_targets(self.headers.get("Content-Type", ""), body)
+            status, headers, body = self.server.api.submit_task(params, targets)
+        self._send(status, headers, body)
+
+    def _send(self, status, headers, body):
+        headers = dict(headers)
+        if isinstance(body, bytes):
+            payload = body
+        else:
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", headers.pop("Content-Type", "application/json; charset=utf-8"))
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # 并发线程较多时避免连接被拒绝
+    request_queue_size = 128
+
+
+class MockHunterServer:
+    """
+    在后台线程中运行的模拟API服务，port为0时自动选择空闲端口
+
+        with MockHunterServer(latency=0.05) as server:
+            CONFIG["api_url"] = server.url
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, **options):
+        self.api = MockHunterAPI(**options)
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.api = self.api
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/openApi/search"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """
+        在当前线程中运行，直到被中断
+        """
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟的Hunter API服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=18080, help="监听端口")
+    parser.add_argument("--api-key", default="", help="要求的API密钥，多个用逗号分隔（默认接受任意非空密钥）")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的模拟延迟(秒)")
+    parser.add_argument("--throttle", type=float, default=0.0, help="返回429限流的比例(0-1)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回503错误的比例(0-1)")
+    parser.add_argument("--results", type=int, default=20, help="每个查询条件的结果数量")
+    parser.add_argument("--companies", type=int, default=50, help="结果中不同企业的数量")
+    parser.add_argument("--quota", type=int, default=0, help="每个密钥的可用积分（0表示不限）")
+    parser.add_argument("--task-delay", type=float, default=1.0, help="批量任务从提交到完成的时间(秒)")
+    parser.add_argument("--task-errors", type=float, default=0.0, help="批量任务中标记为处理失败的目标比例(0-1)")
+    args = parser.parse_args()
+
+    server = MockHunterServer(args.host, args.port, api_key=args.api_key, latency=args.latency,
+                              throttle=args.throttle, error_rate=args.error_rate,
+                              results_per_target=args.results, companies=args.companies, quota=args.quota,
+                              task_delay=args.task_delay, task_errors=args.task_errors)
+    print(f"[信息] 模拟Hunter API已启动: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+输入规范化与查询前去重
+
+在目标进入查询流程之前统一写法，使同一个目标的不同写法只消耗一次查询：
+- URL只保留主机名，域名转为小写并编码为punycode，可选归并到可注册域名
+- 企业名称统一全角/半角字符、括号和常见英文后缀写法
+"""
+
+import re
+import unicodedata
+from urllib.parse import urlsplit
+
+from hunter_core.iprange import is_ip_address, parse_ip_range
+
+# 常见的多级公共后缀，归并到可注册域名时这些后缀视为一个整体（不依赖完整的公共后缀列表）
+MULTI_LEVEL_SUFFIXES = {
+    "com.cn", "net.cn", "org.cn", "gov.cn", "edu.cn", "ac.cn", "mil.cn",
+    "bj.cn", "sh.cn", "tj.cn", "cq.cn", "he.cn", "sx.cn", "nm.cn", "ln.cn", "jl.cn", "hl.cn", "js.cn",
+    "zj.cn", "ah.cn", "fj.cn", "jx.cn", "sd.cn", "ha.cn", "hb.cn", "hn.cn", "gd.cn", "gx.cn", "hi.cn",
+    "sc.cn", "gz.cn", "yn.cn", "xz.cn", "sn.cn", "gs.cn", "qh.cn", "nx.cn", "xj.cn", "tw.cn", "hk.cn",
+    "mo.cn",
+    "com.hk", "edu.hk", "gov.hk", "org.hk", "net.hk", "com.tw", "edu.tw", "gov.tw", "org.tw",
+    "com.mo", "co.uk", "org.uk", "ac.uk", "gov.uk", "co.jp", "ac.jp", "or.jp", "ne.jp", "go.jp",
+    "co.kr", "or.kr", "com.au", "net.au", "org.au", "edu.au", "gov.au", "com.sg", "edu.sg",
+    "com.my", "co.in", "co.nz", "com.br", "com.ru",
+}
+
+_COMPANY_SUFFIXES = [
+    (re.compile(r"\s*,?\s*co\s*\.?\s*,?\s*ltd\s*\.?$", re.IGNORECASE), " Co., Ltd."),
+    (re.compile(r"\s*,?\s*inc\s*\.?$", re.IGNORECASE), " Inc."),
+    (re.compile(r"\s*,?\s*corp\s*\.?$", re.IGNORECASE), " Corp."),
+]
+_CJK = r"[　-〿一-鿿（）]"
+_SPACE_AROUND_CJK = re.compile(rf"\s+(?={_CJK})|(?<={_CJK})\s+")
+
+
+def normalize_domain(value, registrable=False):
+    """
+    将URL或域名规范化为小写的punycode主机名，registrable为True时归并到可注册域名
+
+    IP地址、CIDR网段和IP范围只去掉URL部分；无法得到主机名时返回空字符串
+    """
+    value = unicodedata.normalize("NFKC", value).strip()
+    if not value or parse_ip_range(value) or is_ip_address(value):
+        return value
+    host = value
+    if "://" in host or "/" in host or "?" in host or "#" in host or ":" in host:
+        try:
+            host = urlsplit(host if "://" in host else f"//{host}").hostname or ""
+        except ValueError:
+            return ""
+    host = host.strip().rstrip(".").lower()
+    if host.startswith("*."):
+        host = host[2:]
+    if is_ip_address(host):
+        return host
+    # domain="example.com"同时匹配其所有子域名，www前缀不会带来额外结果
+    if host.startswith("www.") and host.count(".") >= 2:
+        host = host[4:]
+    try:
+        host = host.encode("idna").decode("ascii")
+    except UnicodeError:
+        pass
+    if registrable:
+        host = registrable_domain(host)
+    return host
+
+
+def registrable_domain(host):
+    """
+    返回主机名的可注册域名，如 a.b.example.com.cn -> example.com.cn
+    """
+    labels = host.split(".")
+    if len(labels) <= 2:
+        return host
+    keep = 3 if ".".join(labels[-2:]) in MULTI_LEVEL_SUFFIXES else 2
+    return ".".join(labels[-keep:])
+
+
+def normalize_company(value):
+    """
+    规范化企业名称：全角字母数字转半角，括号统一为全角（与备案信息的写法一致），
+    去掉多余空白和末尾标点，统一常见英文后缀的写法
+    """
+    value = unicodedata.normalize("NFKC", value)
+    value = value.replace("(", "（").replace(")", "）")
+    value = re.sub(r"\s+", " ", value).strip()
+    value = _SPACE_AROUND_CJK.sub("", value)
+    value = value.rstrip(" .,;:，。；：、")
+    for pattern, suffix in _COMPANY_SUFFIXES:
+        if pattern.search(value):
+            value = pattern.sub(suffix, value)
+            break
+    return value
+
+
+class InputNormalizer:
+    """
+    流式的输入规范化与去重：逐行读取目标，跳过空行、无法解析的行和规范化后重复的目标
+
+    kind为domain、ip或company。统计信息用于报告节省的查询次数。
+    """
+
+    def __init__(self, kind="domain", registrable=False, enabled=True):
+        self.kind = kind
+        self.registrable = registrable
+        self.enabled = enabled
+        self.total = 0
+        self.rewritten = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self._seen = set()
+
+    def normalize(self, value):
+        value = value.strip()
+        if not self.enabled:
+            return value
+        if self.kind == "company":
+            return normalize_company(value)
+        return normalize_domain(value, self.registrable and self.kind == "domain")
+
+    def feed(self, lines):
+        """
+        逐行规范化并去重，按首次出现的顺序产出目标
+        """
+        for line in lines:
+            if not line.strip():
+                continue
+            self.total += 1
+            target = self.normalize(line)
+            if not target:
+                self.invalid += 1
+                continue
+            if target != line.strip():
+                self.rewritten += 1
+            if target in self._seen:
+                self.duplicates += 1
+                continue
+            self._seen.add(target)
+            yield target
+
+    def read(self, file_path):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            yield from self.feed(f)
+
+    @property
+    def saved(self):
+        """
+        去重节省的查询次数
+        """
+        return self.duplicates
+
+    def report(self):
+        unique = self.total - self.invalid - self.duplicates
+        message = f"[信息] 输入规范化：共 {self.total} 个目标，去重后 {unique} 个，节省 {self.saved} 次查询"
+        details = []
+        if self.rewritten:
+            details.append(f"改写 {self.rewritten} 个")
+        if self.invalid:
+            details.append(f"无法解析 {self.invalid} 个")
+        print(message + (f"（{'，'.join(details)}）" if details else ""))
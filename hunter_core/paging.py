@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+分页计划：根据第一页返回的total并发获取其余页
+"""
+
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 所有目标共用的翻页线程池，与目标级线程池分开，避免互相等待造成死锁
+_page_pool = None
+_page_pool_size = 0
+_page_pool_lock = threading.Lock()
+
+
+def _submit_pages(fetch, pages, workers):
+    """
+    在共用线程池中提交翻页任务，需要更多线程时换用更大的线程池并关闭旧线程池
+
+    提交在锁内进行，旧线程池关闭后不会再有新任务提交给它；已提交的任务照常完成，之后空闲线程退出
+    """
+    global _page_pool, _page_pool_size
+    with _page_pool_lock:
+        if _page_pool is None or _page_pool_size < workers:
+            old_pool = _page_pool
+            _page_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hunter-page")
+            _page_pool_size = workers
+            if old_pool is not None:
+                old_pool.shutdown(wait=False)
+        return [_page_pool.submit(fetch, page) for page in pages]
+
+
+def remaining_pages(total, page_size, max_page):
+    """
+    根据第一页返回的total计算还需要获取的页码（不含第1页）
+    """
+    last_page = min(max_page, max(1, math.ceil((total or 0) / page_size)))
+    return list(range(2, last_page + 1))
+
+
+def _fetch_all(fetch, pages, workers):
+    if workers <= 1 or len(pages) <= 1:
+        return [fetch(page) for page in pages]
+    futures = _submit_pages(fetch, pages, workers)
+    try:
+        return [future.result() for future in futures]
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+
+
+def paginate(fetch, consume, page_size, max_page, page_workers=1, saturation=0,
+             restored=None, on_page=None):
+    """
+    获取一个查询的所有需要的页，返回是否正常完成
+
+    fetch(page)返回API响应数据，失败时返回None；consume(arr)按页码顺序处理每页数据，
+    返回本页新增的数量。restored为断点日志中已获取的页{page: (total, arr)}，
+    on_page(page, total, arr)在每获取一页新数据后调用。
+
+    saturation大于0时，连续saturation页没有新增数据即停止翻页，此时按saturation页一批获取，
+    避免为多余的页消耗积分；否则在第一页返回后一次性并发获取其余所有页。
+    """
+    pages = dict(restored or {})
+
+    def store(page, data):
+        body = data.get("data") or {}
+        total = body.get("total", 0) or 0
+        arr = body.get("arr") or []
+        pages[page] = (total, arr)
+        if on_page is not None:
+            on_page(page, total, arr)
+
+    if 1 not in pages:
+        data = fetch(1)
+        if data is None:
+            return False
+        store(1, data)
+
+    order = [1] + remaining_pages(pages[1][0], page_size, max_page)
+    missing = [page for page in order if page not in pages]
+    state = {"position": 0, "stale": 0}
+
+    def drain(skip_missing=False):
+        # 按页码顺序处理已获取的页，返回是否达到饱和
+        while state["position"] < len(order):
+            page = order[state["position"]]
+            if page not in pages:
+                if not skip_missing:
+                    return False
+                state["position"] += 1
+                continue
+            state["position"] += 1
+            added = consume(pages[page][1])
+            state["stale"] = 0 if added else state["stale"] + 1
+            if saturation and state["stale"] >= saturation:
+                return True
+        return False
+
+    if drain():
+        return True
+
+    batch_size = max(1, min(page_workers, saturation)) if saturation else max(1, len(missing))
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        failed = False
+        for page, data in zip(batch, _fetch_all(fetch, batch, page_workers)):
+            if data is None:
+                failed = True
+            else:
+                store(page, data)
+        if failed:
+            # 出错时不再获取后续页，但已获取的页仍然保留
+            drain(skip_missing=True)
+            return False
+        if drain():
+            return True
+    return True
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+令牌桶限速器，每个API密钥对应一个实例，所有工作线程共享
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶
+
+    rate为每秒补充的令牌数（即每秒允许的请求数），capacity为桶容量（允许的突发请求数）。
+    rate小于等于0表示不限速。
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = max(float(capacity), 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens=1):
+        """
+        阻塞直到取得指定数量的令牌
+        """
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def try_acquire(self, tokens=1):
+        """
+        不阻塞地尝试取得令牌，成功返回True
+        """
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def wait_time(self, tokens=1):
+        """
+        距离可以取得令牌还需等待的秒数
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill()
+            return max(0.0, (tokens - self._tokens) / self.rate)
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+查询结果的解析与去重
+
+每页返回的arr只遍历一次，解析为紧凑的AssetRecord；累加器使用哈希索引去重，
+避免每条记录都线性扫描已有结果。
+"""
+
+# 网站标题中包含这些关键词时，可能是教育机构，将标题作为企业名称
+EDU_KEYWORDS = ("学院", "大学", "学校")
+
+NO_ICP = "未获取到备案号"
+NO_IP = "未获取到IP"
+NO_COMPANY = "未获取到企业名称"
+
+
+class AssetRecord:
+    """
+    单条资产记录
+    """
+
+    __slots__ = ("company", "icp_number", "domain", "ip", "web_title")
+
+    def __init__(self, company=None, icp_number=None, domain=None, ip=None, web_title=""):
+        self.company = company
+        self.icp_number = icp_number
+        self.domain = domain
+        self.ip = ip
+        self.web_title = web_title
+
+    def __repr__(self):
+        return f"AssetRecord({self.company!r}, {self.icp_number!r}, {self.domain!r}, {self.ip!r})"
+
+
+def parse_item(item):
+    """
+    将API返回的单条数据解析为AssetRecord，企业名称和备案号按以下顺序获取：
+
+    1. company和number字段（API返回的主要格式）
+    2. icp字段（兼容旧格式）
+    3. icp_info字段（兼容旧格式）
+    4. 网站标题中包含学院/大学等关键词时，使用网站标题
+    """
+    web_title = item.get("web_title", "")
+    company_name = item.get("company") or None
+    icp_number = item.get("number") or None
+
+    if not company_name:
+        for field in ("icp", "icp_info"):
+            info = item.get(field)
+            if info and isinstance(info, dict):
+                company_name = info.get("name")
+                icp_number = info.get("number")
+                if company_name:
+                    break
+
+    # 有企业名称但没有备案号，设置默认值
+    if company_name and not icp_number:
+        icp_number = NO_ICP
+
+    if not company_name and web_title and any(keyword in web_title for keyword in EDU_KEYWORDS):
+        company_name = web_title
+        icp_number = NO_ICP
+
+    return AssetRecord(company_name, icp_number, item.get("domain"), item.get("ip"), web_title)
+
+
+def parse_page(arr):
+    """
+    一次遍历解析整页数据
+    """
+    return [parse_item(item) for item in arr or ()]
+
+
+class CompanyAccumulator:
+    """
+    域名/IP反查企业的结果累加器：相同企业名称只记录一次，没有企业名称的记录按域名去重
+    """
+
+    def __init__(self):
+        self.records = []
+        self._companies = set()
+        self._domains = set()
+        self._ips = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def _append(self, record):
+        self.records.append(record)
+        self._companies.add(record.company)
+        if record.domain:
+            self._domains.add(record.domain)
+        if record.ip:
+            self._ips.setdefault(record.ip, []).append(record)
+
+    def add(self, record):
+        """
+        加入一条记录，返回是否为新记录
+        """
+        if record.company and record.company not in self._companies:
+            self._append(AssetRecord(
+                record.company,
+                record.icp_number or NO_ICP,
+                record.domain or "",
+                record.ip or NO_IP,
+                record.web_title
+            ))
+            return True
+        # 即使没有企业名称，也记录IP和域名信息，但确保域名不重复
+        if record.domain and record.domain not in self._domains:
+            self._append(AssetRecord(
+                record.web_title if record.web_title else NO_COMPANY,
+                NO_ICP,
+                record.domain,
+                record.ip or NO_IP,
+                record.web_title
+            ))
+            return True
+        return False
+
+    def add_page(self, arr):
+        """
+        解析并加入整页数据，返回新增的记录数
+        """
+        return sum(1 for record in parse_page(arr) if self.add(record))
+
+    @property
+    def company_count(self):
+        """
+        已记录的不同企业名称数量
+        """
+        return len(self._companies)
+
+    def has_company(self, company):
+        return company in self._companies
+
+    def has_domain(self, domain):
+        return domain in self._domains
+
+    def find_by_ip(self, ip):
+        return list(self._ips.get(ip, ()))
+
+    def to_dicts(self):
+        return [
+            {
+                "企业名称": record.company,
+                "备案号": record.icp_number,
+                "域名": record.domain,
+                "IP地址": record.ip,
+                "网站标题": record.web_title
+            }
+            for record in self.records
+        ]
+
+
+class DomainAccumulator:
+    """
+    ICP反查域名的结果累加器：按域名去重
+    """
+
+    def __init__(self):
+        self.records = []
+        self._domains = set()
+        self._ips = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, record):
+        """
+        加入一条记录，返回是否为新记录
+        """
+        if not record.domain or record.domain in self._domains:
+            return False
+        self.records.append(record)
+        self._domains.add(record.domain)
+        if record.ip:
+            self._ips.setdefault(record.ip, []).append(record)
+        return True
+
+    def add_page(self, arr):
+        """
+        解析并加入整页数据，返回新增的记录数
+        """
+        return sum(1 for record in parse_page(arr) if self.add(record))
+
+    def has_domain(self, domain):
+        return domain in self._domains
+
+    def find_by_ip(self, ip):
+        return list(self._ips.get(ip, ()))
+
+    def to_dicts(self):
+        return [{"domain": record.domain, "ip": record.ip} for record in self.records]
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+按积分预算调度批量查询
+
+先为所有目标获取第一页（第一页的total即可估算该目标还需要的积分），再按页码一轮一轮地获取
+后续页，保证每个目标都拿到第一页之后才会有目标获取第二页。每个请求发出前按预估消耗预留积分，
+预算不足时停止发起新请求，已获取的页都记录在断点日志中，可以使用--resume继续。
+"""
+
+import threading
+
+from hunter_core.engine import run_batch
+from hunter_core.paging import remaining_pages
+
+
+class PointBudget:
+    """
+    积分预算
+
+    以API响应中的消耗积分为准统计已用积分，请求发出前按预估消耗预留，
+    预留加已用超过预算或超过API返回的剩余积分时拒绝，保证实际消耗不超出预算。
+    第一次拒绝后exhausted为True。
+    """
+
+    def __init__(self, session, budget):
+        self.session = session
+        self.budget = budget
+        self._start = session.points_consumed
+        self._reserved = 0
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    @property
+    def spent(self):
+        return self.session.points_consumed - self._start
+
+    def reserve(self, cost):
+        with self._lock:
+            available = self.budget - self.spent - self._reserved
+            if self.session.points_remaining is not None:
+                available = min(available, self.session.points_remaining - self._reserved)
+            if cost > available:
+                self.exhausted = True
+                return False
+            self._reserved += cost
+            return True
+
+    def release(self, cost):
+        with self._lock:
+            self._reserved -= cost
+
+
+class QuotaScheduler:
+    """
+    将一批查询的所有页按页码分轮获取并写入断点日志
+
+    run()返回所有页都已获取（或此前已完成）的查询key，调用方随后用同一个断点日志
+    正常处理这些查询即可，此时不会再发出请求。
+    """
+
+    def __init__(self, client, checkpoint, budget, workers=1):
+        self.client = client
+        self.checkpoint = checkpoint
+        self.budget = PointBudget(client.session, budget)
+        self.workers = workers
+        self.stopped = False
+
+    def _page_cost(self, page, total):
+        # Hunter按返回的结果条数扣除积分，第一页之前不知道total，按整页预留
+        page_size = self.client.config["page_size"]
+        if page == 1:
+            return page_size
+        return max(0, min(page_size, total - (page - 1) * page_size))
+
+    def _fetch(self, task):
+        key, page, cost, state = task
+        if self.stopped:
+            return
+        if not self.budget.reserve(cost):
+            if not self.stopped:
+                self.stopped = True
+                print(f"[警告] 积分预算即将用尽（已消耗 {self.budget.spent} / 预算 {self.budget.budget}），"
+                      f"停止发起新的请求")
+            return
+        try:
+            data = self.client.fetch_page(self.client.encode_query(state["query"]), page, state["label"],
+                                          state["time_range"])
+        finally:
+            self.budget.release(cost)
+        if data is None:
+            return
+        body = data.get("data") or {}
+        total = body.get("total", 0) or 0
+        self.checkpoint.record_page(key, page, total, body.get("arr") or [])
+        state["pages"][page] = total
+
+    def _needed_pages(self, state):
+        total = state["pages"].get(1)
+        if total is None:
+            return [1]
+        config = self.client.config
+        return [1] + remaining_pages(total, config["page_size"], config["max_page"])
+
+    def run(self, queries, time_ranges=None):
+        """
+        queries为[(key, 查询语句, 显示名称), ...]，返回已完成的key集合
+
+        time_ranges为{key: (start_time, end_time)}，用于增量查询
+        """
+        completed = set()
+        states = {}
+        for key, query, label in queries:
+            if key in states or key in completed:
+                continue
+            if self.checkpoint.is_done(key):
+                completed.add(key)
+                continue
+            states[key] = {
+                "query": query,
+                "label": label,
+                "time_range": (time_ranges or {}).get(key),
+                "pages": {page: total for page, total, _ in self.checkpoint.pages(key)}
+            }
+
+        for page in range(1, self.client.config["max_page"] + 1):
+            tasks = []
+            for key, state in states.items():
+                if page in state["pages"] or (page > 1 and 1 not in state["pages"]):
+                    continue
+                if page in self._needed_pages(state):
+                    tasks.append((key, page, self._page_cost(page, state["pages"].get(1, 0)), state))
+            if not tasks:
+                continue
+            print(f"[信息] 积分调度：第 {page} 轮，{len(tasks)} 个目标，"
+                  f"预计最多消耗 {sum(task[2] for task in tasks)} 积分")
+            run_batch(self._fetch, tasks, self.workers)
+            if self.stopped:
+                break
+
+        for key, state in states.items():
+            if all(page in state["pages"] for page in self._needed_pages(state)):
+                completed.add(key)
+        total = len({key for key, _, _ in queries})
+        print(f"[信息] 积分调度：{len(completed)}/{total} 个目标已获取全部页，本次消耗积分 {self.budget.spent}")
+        return completed
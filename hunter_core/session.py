@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+复用连接的HTTP会话：连接池、指数退避重试、限流感知与熔断
+"""
+
+import random
+import re
+import threading
+import time
+
+from hunter_core.keypool import NoApiKeyAvailable, rejection_reason
+from hunter_core.metrics import Metrics
+
+# 表示被限流的状态码（HTTP状态码或API返回的code）
+THROTTLE_CODES = {429}
+# 可重试的服务端错误
+RETRY_CODES = {500, 502, 503, 504}
+
+
+class CircuitBreaker:
+    """
+    熔断器：连续被限流达到threshold次后打开，cooldown秒内所有线程暂停发起请求
+    """
+
+    def __init__(self, threshold=3, cooldown=60):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """
+        熔断打开期间阻塞调用线程
+        """
+        while True:
+            with self._lock:
+                remaining = self._open_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+
+    def record_throttle(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.threshold and self._open_until <= time.monotonic():
+                self._open_until = time.monotonic() + self.cooldown
+                self._failures = 0
+                print(f"[警告] API持续限流，暂停所有请求 {self.cooldown} 秒")
+
+
+class HunterSession:
+    """
+    线程共享的API会话
+
+    每次请求（包括重试）都会先通过熔断器和限速器；遇到网络异常、限流或5xx错误时
+    按指数退避加随机抖动重试，重试耗尽后抛出最后一次的异常或返回最后一次的响应。
+    指定key_pool时每次请求从密钥池选取密钥（使用该密钥自己的限速器），密钥被拒绝时
+    停用该密钥并立即换用其他密钥重发，不计入重试次数。
+    """
+
+    def __init__(self, limiter=None, breaker=None, pool_size=1, timeout=30,
+                 max_retries=3, backoff=1.0, max_backoff=60, metrics=None, key_pool=None):
+        self.limiter = limiter
+        self.key_pool = key_pool
+        self.metrics = metrics or Metrics()
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # 根据API响应中的积分字段统计的已消耗积分和剩余积分
+        self.points_consumed = 0
+        self._points_remaining = None
+        self._quota_lock = threading.Lock()
+        # requests在创建会话时才导入，避免拖慢只做本地操作（如导出）的命令
+        import requests
+        self.session = requests.Session()
+        self.set_pool_size(pool_size)
+
+    def set_pool_size(self, pool_size):
+        """
+        按并发线程数调整连接池大小
+        """
+        from requests.adapters import HTTPAdapter
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @property
+    def points_remaining(self):
+        """
+        剩余积分，使用密钥池时为所有可用密钥之和
+        """
+        if self.key_pool is not None:
+            return self.key_pool.total_remaining()
+        return self._points_remaining
+
+    def _retry_delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return retry_after
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def get_json(self, url, params, headers=None):
+        """
+        发起GET请求并返回解析后的JSON
+        """
+        return self.request("GET", url, params, headers)
+
+    def request(self, method, url, params, headers=None, api_key=None, raw=False, **kwargs):
+        """
+        发起请求并返回解析后的JSON，kwargs原样传给requests（如上传文件的files、流式下载的stream）
+
+        api_key为密钥池中的某个密钥时固定使用该密钥，被拒绝时不换用其他密钥；
+        raw为True时响应不是JSON（如下载的结果文件）则直接返回Response对象，由调用方读取内容
+        """
+        import requests
+
+        last_error = None
+        data = None
+        retry_after = None
+        metrics = self.metrics
+        attempt = 0
+        retry = False
+        while True:
+            if retry:
+                attempt += 1
+                if attempt > self.max_retries:
+                    break
+                delay = self._retry_delay(attempt - 1, retry_after)
+                print(f"[警告] 第 {attempt}/{self.max_retries} 次重试，等待 {delay:.1f} 秒...")
+                metrics.inc("retries")
+                time.sleep(delay)
+            retry = True
+            retry_after = None
+            self.breaker.wait()
+            key = None
+            request_params = params
+            if self.key_pool is not None:
+                try:
+                    key = self.key_pool.acquire(api_key)
+                except NoApiKeyAvailable as e:
+                    return data or {"code": 403, "message": str(e)}
+                request_params = dict(params, **{"api-key": key.key})
+            elif self.limiter is not None:
+                self.limiter.acquire()
+            metrics.inc("requests")
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, params=request_params, headers=headers,
+                                                timeout=self.timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                metrics.observe("request_seconds", time.perf_counter() - start)
+                metrics.inc("network_errors")
+                last_error = e
+                continue
+            metrics.observe("request_seconds", time.perf_counter() - start)
+            if raw and response.ok and "json" not in response.headers.get("Content-Type", ""):
+                # 下载的文件由调用方流式读取，接收字节数也由调用方统计
+                return response
+            metrics.inc("bytes_received", len(response.content))
+
+            if response.status_code in THROTTLE_CODES or response.status_code in RETRY_CODES:
+                if response.status_code in THROTTLE_CODES:
+                    metrics.inc("throttled")
+                    self.breaker.record_throttle()
+                    retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                else:
+                    metrics.inc("server_errors")
+                last_error = requests.exceptions.HTTPError(
+                    f"{response.status_code} Error for url: {response.url}", response=response)
+                continue
+            response.raise_for_status()
+            data = response.json()
+
+            code = data.get("code")
+            if code in THROTTLE_CODES:
+                metrics.inc("throttled")
+                self.breaker.record_throttle()
+                last_error = None
+                continue
+            if code in RETRY_CODES:
+                metrics.inc("server_errors")
+                last_error = None
+                continue
+            self.breaker.record_success()
+            if key is not None:
+                reason = rejection_reason(data)
+                if reason is not None:
+                    # 密钥被拒绝时换用其他密钥，所有密钥都不可用或指定了密钥时返回该响应
+                    self.key_pool.disable(key, reason)
+                    if api_key is None and self.key_pool.active():
+                        metrics.inc("key_failovers")
+                        last_error = None
+                        retry = False
+                        continue
+                    return data
+            self._record_quota(data, key)
+            return data
+
+        if last_error is not None:
+            raise last_error
+        return data
+
+    def _record_quota(self, data, api_key=None):
+        body = data.get("data") or {}
+        consumed = _parse_quota(body.get("consume_quota"))
+        remaining = _parse_quota(body.get("rest_quota"))
+        with self._quota_lock:
+            if consumed is not None:
+                self.points_consumed += consumed
+                self.metrics.inc("points_consumed", consumed)
+            if remaining is not None and api_key is not None:
+                self.key_pool.record_remaining(api_key, remaining)
+                remaining = self.key_pool.total_remaining()
+            if remaining is not None:
+                if api_key is None:
+                    self._points_remaining = remaining
+                self.metrics.set("points_remaining", remaining)
+
+
+def _parse_quota(value):
+    # 积分字段形如"消耗积分：100"或"今日剩余积分：4900"
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.search(r"\d+", str(value or ""))
+    return int(match.group()) if match else None
+
+
+def _parse_retry_after(value):
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
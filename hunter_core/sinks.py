@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+流式结果输出
+
+每种格式的sink逐行写入，内存占用与结果总数无关，可以在每个目标完成时立即写入该目标的结果；
+也可以用write_batch写入列式批次（如ResultStore.iter_batches的输出），不为每行构建字典：
+- xlsx：openpyxl只写模式，超过Excel单表行数上限时自动新建工作表
+- csv：带BOM，便于Excel直接打开
+- jsonl：每行一个JSON对象
+- parquet：按批写入行组，所有列使用字典编码，需要安装pyarrow
+"""
+
+import csv
+import importlib.util
+import json
+import os
+import threading
+import time
+
+# 支持的输出格式及对应的扩展名
+SINK_FORMATS = {"xlsx": ".xlsx", "csv": ".csv", "jsonl": ".jsonl", "parquet": ".parquet"}
+# Excel单个工作表最多1048576行，其中一行为表头
+EXCEL_MAX_ROWS = 1048575
+
+
+def _ensure_dir(output_file):
+    output_dir = os.path.dirname(output_file)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+
+
+def _cell(value):
+    return "" if value is None else value
+
+
+def format_from_path(path, default="xlsx"):
+    """
+    根据文件扩展名判断输出格式
+    """
+    ext = os.path.splitext(path)[1].lower()
+    for fmt, fmt_ext in SINK_FORMATS.items():
+        if ext == fmt_ext:
+            return fmt
+    return default
+
+
+def output_path(path, fmt):
+    """
+    将输出路径的扩展名改为fmt对应的扩展名
+    """
+    return os.path.splitext(path)[0] + SINK_FORMATS[fmt]
+
+
+def parquet_available():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+class Sink:
+    """
+    输出的基类：write_rows可以被多个线程同时调用，close后文件才完整；出错时调用abort放弃输出
+    """
+
+    def __init__(self, path, columns):
+        _ensure_dir(path)
+        self.path = path
+        self.columns = list(columns)
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    def write_rows(self, rows):
+        with self._lock:
+            for row in rows:
+                self._write(row)
+                self.rows += 1
+
+    def write_batch(self, batch):
+        """
+        写入一批列式数据{列名: 值列表}，batch中没有的列写为空
+        """
+        size = max((len(values) for values in batch.values()), default=0)
+        columns = [batch.get(column) or [""] * size for column in self.columns]
+        with self._lock:
+            self._write_columns(columns, size)
+            self.rows += size
+
+    def _write_columns(self, columns, size):
+        for values in zip(*columns):
+            self._write(dict(zip(self.columns, values)))
+
+    def _write(self, row):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def abort(self):
+        """
+        放弃输出：关闭文件并删除已写入的部分内容
+        """
+        with self._lock:
+            self._release()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class CsvSink(Sink):
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        self._file = open(path, 'w', encoding='utf-8-sig', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction='ignore')
+        self._writer.writeheader()
+
+    def _write(self, row):
+        self._writer.writerow(row)
+
+    def _write_columns(self, columns, size):
+        self._writer.writer.writerows(zip(*columns))
+
+    def _release(self):
+        self._file.close()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class JsonlSink(Sink):
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def _write(self, row):
+        self._file.write(json.dumps({column: _cell(row.get(column)) for column in self.columns},
+                                    ensure_ascii=False) + "\n")
+
+    def _release(self):
+        self._file.close()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class XlsxSink(Sink):
+    """
+    只写模式的Excel输出，行数据随时写入临时文件，不在内存中保留
+
+    先保存到同目录的临时文件再替换目标文件；目标文件被占用（如在Excel中打开）时重试，
+    仍失败则保存到当前目录下以alt_prefix开头的备用文件。
+    """
+
+    def __init__(self, path, columns, max_rows=EXCEL_MAX_ROWS, alt_prefix="hunter_results"):
+        from openpyxl import Workbook
+
+        super().__init__(path, columns)
+        self.max_rows = max_rows
+        self.alt_prefix = alt_prefix
+        self.sheets = 0
+        self._workbook = Workbook(write_only=True)
+        self._new_sheet()
+
+    def _new_sheet(self):
+        self.sheets += 1
+        self._sheet = self._workbook.create_sheet("Sheet1" if self.sheets == 1 else f"Sheet{self.sheets}")
+        self._sheet.append(self.columns)
+        self._sheet_rows = 0
+
+    def _write(self, row):
+        self._append([_cell(row.get(column)) for column in self.columns])
+
+    def _write_columns(self, columns, size):
+        for values in zip(*columns):
+            self._append(values)
+
+    def _append(self, values):
+        if self._sheet_rows >= self.max_rows:
+            self._new_sheet()
+        self._sheet.append(values)
+        self._sheet_rows += 1
+
+    def add_sheet(self, title, columns, rows):
+        """
+        在明细表之后追加一个独立的工作表（如汇总表），行数超过上限时续写到“标题2”等工作表，返回写入的行数
+
+        调用后不应再写入明细行
+        """
+        count = 0
+        number = 0
+        sheet_rows = self.max_rows
+        with self._lock:
+            for values in rows:
+                if sheet_rows >= self.max_rows:
+                    number += 1
+                    sheet = self._workbook.create_sheet(title if number == 1 else f"{title}{number}")
+                    sheet.append(list(columns))
+                    sheet_rows = 0
+                sheet.append(values)
+                sheet_rows += 1
+                count += 1
+            if number == 0:
+                self._workbook.create_sheet(title).append(list(columns))
+        return count
+
+    def abort(self):
+        # 工作簿只在close时写入目标文件，已有的目标文件保持不变；保存到临时文件再删除，
+        # 以便openpyxl清理各工作表的临时文件
+        with self._lock:
+            base, ext = os.path.splitext(self.path)
+            temp_file = f"{base}.tmp{ext}"
+            try:
+                self._workbook.save(temp_file)
+            finally:
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
+
+    def close(self):
+        with self._lock:
+            base, ext = os.path.splitext(self.path)
+            temp_file = f"{base}.tmp{ext}"
+            self._workbook.save(temp_file)
+            max_attempts = 3
+            for attempt in range(max_attempts):
+                try:
+                    os.replace(temp_file, self.path)
+                    return
+                except PermissionError:
+                    if attempt < max_attempts - 1:
+                        print(f"[警告] 文件 {self.path} 可能被占用，正在重试...({attempt+1}/{max_attempts})")
+                        time.sleep(2)  # 等待2秒后重试
+            print(f"[错误] 无法写入文件 {self.path}，请确保该文件未被其他程序打开")
+            # 使用不同的文件名
+            alt_output_file = f"{self.alt_prefix}_{int(time.time())}{ext}"
+            os.replace(temp_file, alt_output_file)
+            self.path = alt_output_file
+            print(f"[信息] 已将结果保存到备用文件: {alt_output_file}")
+
+
+class ParquetSink(Sink):
+    """
+    Parquet输出，每batch_rows行写入一个行组，只缓存当前行组的数据
+    """
+
+    def __init__(self, path, columns, batch_rows=100000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("导出Parquet需要先安装pyarrow：pip install pyarrow")
+
+        super().__init__(path, columns)
+        self.batch_rows = batch_rows
+        self._pa = pa
+        self._schema = pa.schema([(column, pa.string()) for column in self.columns])
+        self._writer = pq.ParquetWriter(path, self._schema, use_dictionary=True, compression="snappy")
+        self._buffer = {column: [] for column in self.columns}
+        self._buffered = 0
+
+    def _write(self, row):
+        for column in self.columns:
+            value = row.get(column)
+            self._buffer[column].append("" if value is None else str(value))
+        self._buffered += 1
+        if self._buffered >= self.batch_rows:
+            self._flush()
+
+    def _write_columns(self, columns, size):
+        for column, values in zip(self.columns, columns):
+            self._buffer[column].extend("" if value is None else str(value) for value in values)
+        self._buffered += size
+        if self._buffered >= self.batch_rows:
+            self._flush()
+
+    def _flush(self):
+        if self._buffered:
+            self._writer.write_table(self._pa.Table.from_pydict(self._buffer, schema=self._schema))
+            self._buffer = {column: [] for column in self.columns}
+            self._buffered = 0
+
+    def _release(self):
+        self._writer.close()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._writer.close()
+
+
+def open_sink(fmt, path, columns, **options):
+    """
+    按格式创建sink，options传给对应的sink（如XlsxSink的alt_prefix）
+    """
+    if fmt == "xlsx":
+        return XlsxSink(path, columns, **options)
+    if fmt == "csv":
+        return CsvSink(path, columns)
+    if fmt == "jsonl":
+        return JsonlSink(path, columns)
+    if fmt == "parquet":
+        return ParquetSink(path, columns)
+    raise ValueError(f"不支持的输出格式: {fmt}")
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+基于SQLite的追加式结果库
+
+每次查询只插入新结果，依靠唯一约束在插入时去重，不再读取并重写整个Excel文件。
+Excel只在需要时从结果库导出。
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+
+class ResultStore:
+    """
+    追加式结果表，columns中的所有列共同构成唯一键
+
+    空值统一存为空字符串，保证唯一约束对缺失字段同样生效。
+    """
+
+    def __init__(self, path, table, columns):
+        store_dir = os.path.dirname(path)
+        if store_dir and not os.path.exists(store_dir):
+            os.makedirs(store_dir, exist_ok=True)
+        self.path = path
+        self.table = table
+        self.columns = list(columns)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        column_defs = ", ".join(f'"{column}" TEXT NOT NULL DEFAULT \'\'' for column in self.columns)
+        unique = ", ".join(f'"{column}"' for column in self.columns)
+        self._conn.execute(
+            f'CREATE TABLE IF NOT EXISTS "{table}" ('
+            f" id INTEGER PRIMARY KEY AUTOINCREMENT, {column_defs},"
+            f" created_at REAL NOT NULL, UNIQUE ({unique}))"
+        )
+        self._conn.commit()
+        quoted = ", ".join(f'"{column}"' for column in self.columns)
+        placeholders = ", ".join("?" for _ in self.columns)
+        self._insert_sql = f'INSERT OR IGNORE INTO "{table}" ({quoted}, created_at) VALUES ({placeholders}, ?)'
+        self._select_sql = f'SELECT {quoted} FROM "{table}" ORDER BY id'
+
+    def _values(self, row, now):
+        values = []
+        for column in self.columns:
+            value = row.get(column)
+            values.append("" if value is None else str(value))
+        values.append(now)
+        return values
+
+    def add_rows(self, rows):
+        """
+        插入多行结果，已存在的行会被忽略，返回实际新增的行数
+        """
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(self._insert_sql, (self._values(row, now) for row in rows))
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def insert_new(self, rows):
+        """
+        插入多行结果，返回实际新增的行（已存在的行不包含在内），用于报告增量
+        """
+        now = time.time()
+        inserted = []
+        with self._lock:
+            for row in rows:
+                if self._conn.execute(self._insert_sql, self._values(row, now)).rowcount == 1:
+                    inserted.append(row)
+            self._conn.commit()
+        return inserted
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM "{self.table}"').fetchone()[0]
+
+    def iter_rows(self, batch_size=10000):
+        """
+        按插入顺序逐批读取所有结果，每行为一个字典
+        """
+        # 使用独立连接读取，导出期间不阻塞写入
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            cursor = conn.execute(self._select_sql)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(self.columns, row))
+        finally:
+            conn.close()
+
+    def iter_batches(self, batch_size=10000):
+        """
+        按插入顺序逐批读取所有结果，每批为{列名: 值列表}的列式字典，不为每行构建字典
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            cursor = conn.execute(self._select_sql)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield dict(zip(self.columns, map(list, zip(*rows))))
+        finally:
+            conn.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
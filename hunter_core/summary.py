@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+结果汇总表：导出明细的同一遍中按列收集结果，再用pandas分组聚合生成汇总表，无需在表格软件中手动透视
+
+- 反查ICP（hunter_ip）：企业资产汇总、备案号IP汇总、无备案目标、多企业共用IP
+- 反查域名（hunter_icp）：企业资产汇总、无结果企业、多企业共用IP
+
+pandas只在生成汇总表时才导入。
+"""
+
+from hunter_core.results import NO_COMPANY, NO_ICP, NO_IP
+
+# 两个工具写入的“没有查到”占位行
+NOT_FOUND_COMPANY = "未找到企业信息"
+NOT_FOUND_DOMAIN = "未找到域名"
+# 表示没有取到值的占位文本，统计个数时不计入
+PLACEHOLDERS = {"", "无", NO_ICP, NO_IP, NO_COMPANY, NOT_FOUND_COMPANY, NOT_FOUND_DOMAIN}
+# 合并多个名称时使用的分隔符
+JOINER = "、"
+
+
+class ColumnCollector:
+    """
+    按列累积导出的批次（{列名: 值列表}）
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self._data = {column: [] for column in self.columns}
+
+    def add(self, batch):
+        for column in self.columns:
+            self._data[column].extend(batch.get(column) or ())
+
+    def frame(self):
+        """
+        生成DataFrame，之后不再保留收集的列表
+
+        所有列转换为分类类型，每列只编码一次，之后的分组、去重和isin都在整数编码上进行
+        """
+        import numpy as np
+        import pandas as pd
+
+        columns = {}
+        for column in self.columns:
+            codes, uniques = pd.factorize(np.array(self._data[column], dtype=object))
+            columns[column] = pd.Categorical.from_codes(codes, uniques)
+        self._data = {column: [] for column in self.columns}
+        return pd.DataFrame(columns, columns=self.columns)
+
+
+def _valid(series):
+    return ~series.isin(PLACEHOLDERS)
+
+
+def _distinct(frame, by, column):
+    # 每组中不同有效值的个数
+    return frame.loc[_valid(frame[column])].groupby(by, observed=True, sort=False)[column].nunique()
+
+
+def _joined(frame, by, column):
+    # 每组中不同有效值用分隔符合并
+    values = frame.loc[_valid(frame[column]), [by, column]].drop_duplicates()
+    # 字符串列的分组求和即拼接，比逐组调用join快得多
+    names = values[column].astype(str) + JOINER
+    return names.groupby(values[by], observed=True, sort=False).sum().str[:-len(JOINER)]
+
+
+def _counts(index, columns):
+    """
+    以index为行、columns中各个Series为列组成汇总表，缺失的计数填0
+    """
+    import pandas as pd
+
+    table = pd.DataFrame(columns, index=index)
+    for name, series in columns.items():
+        if pd.api.types.is_numeric_dtype(series):
+            table[name] = table[name].fillna(0).astype(int)
+    return table.fillna("")
+
+
+def _assets_per_company(assets, company, extra=()):
+    """
+    每个企业的资产数和不同域名、IP数，extra为附加的(列名, Series)
+    """
+    assets = assets.loc[_valid(assets[company])]
+    groups = assets.groupby(company, observed=True, sort=False)
+    columns = dict(extra)
+    columns["域名数"] = _distinct(assets, company, "域名")
+    columns["IP数"] = _distinct(assets, company, "IP地址")
+    columns["资产数"] = groups.size()
+    table = _counts(groups.size().index, columns)
+    table.index.name = company
+    return table.reset_index().sort_values(["资产数", company], ascending=[False, True], kind="stable")
+
+
+def _shared_ips(assets, company):
+    """
+    被多个企业共用的IP，按企业数从多到少排列
+    """
+    pairs = assets.loc[_valid(assets["IP地址"]) & _valid(assets[company]), ["IP地址", company, "域名"]]
+    companies = pairs.groupby("IP地址", observed=True, sort=False)[company].nunique()
+    shared = pairs.loc[pairs["IP地址"].isin(companies.index[companies > 1])]
+    table = _counts(companies.index[companies > 1], {
+        "企业数": companies[companies > 1],
+        "企业名称": _joined(shared, "IP地址", company),
+        "域名数": _distinct(shared, "IP地址", "域名")
+    })
+    table.index.name = "IP地址"
+    return table.reset_index().sort_values(["企业数", "IP地址"], ascending=[False, True], kind="stable")
+
+
+def summarize_reverse_icp(frame):
+    """
+    hunter_ip结果（查询目标、企业名称、备案号、域名、IP地址等列）的汇总表，返回[(表名, DataFrame), ...]
+    """
+    assets = frame.loc[frame["企业名称"] != NOT_FOUND_COMPANY]
+
+    per_company = _assets_per_company(assets, "企业名称", [
+        ("备案号", _joined(assets, "企业名称", "备案号")),
+        ("查询目标数", assets.groupby("企业名称", observed=True, sort=False)["查询目标"].nunique())
+    ])
+
+    licensed = assets.loc[_valid(assets["备案号"])]
+    per_icp = _counts(licensed.groupby("备案号", observed=True, sort=False).size().index, {
+        "企业名称": _joined(licensed, "备案号", "企业名称"),
+        "IP数": _distinct(licensed, "备案号", "IP地址"),
+        "域名数": _distinct(licensed, "备案号", "域名"),
+        "资产数": licensed.groupby("备案号", observed=True, sort=False).size()
+    })
+    per_icp.index.name = "备案号"
+    per_icp = per_icp.reset_index().sort_values(["IP数", "备案号"], ascending=[False, True], kind="stable")
+
+    # 没有任何一条结果带有效备案号的目标，包括完全没有查到结果的目标
+    targets = frame.groupby("查询目标", observed=True, sort=False)
+    has_icp = _valid(frame["备案号"]).groupby(frame["查询目标"], observed=True, sort=False).any()
+    records = assets.groupby("查询目标", observed=True, sort=False).size()
+    unlicensed = has_icp.index[~has_icp]
+    no_icp = _counts(unlicensed, {
+        "查询类型": targets["查询类型"].first(),
+        "记录数": records
+    })
+    no_icp["原因"] = no_icp["记录数"].eq(0).map({True: NOT_FOUND_COMPANY, False: "结果中没有备案号"})
+    no_icp.index.name = "查询目标"
+    no_icp = no_icp.reset_index()
+
+    return [
+        ("企业资产汇总", per_company),
+        ("备案号IP汇总", per_icp),
+        ("无备案目标", no_icp),
+        ("多企业共用IP", _shared_ips(assets, "企业名称"))
+    ]
+
+
+def summarize_reverse_domain(frame):
+    """
+    hunter_icp结果（企业名称、域名、IP地址）的汇总表，返回[(表名, DataFrame), ...]
+    """
+    assets = frame.loc[frame["域名"] != NOT_FOUND_DOMAIN]
+    found = assets.groupby("企业名称", observed=True, sort=False).size()
+    companies = frame["企业名称"].drop_duplicates()
+    no_result = companies.loc[~companies.isin(found.index)].to_frame().reset_index(drop=True)
+    return [
+        ("企业资产汇总", _assets_per_company(assets, "企业名称")),
+        ("无结果企业", no_result),
+        ("多企业共用IP", _shared_ips(assets, "企业名称"))
+    ]
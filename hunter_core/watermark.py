@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+增量监控的水位线
+
+每个目标记录上一次完整查询的时间，下次运行时只查询该时间之后更新的资产
+（Hunter API的start_time/end_time参数）。同一次运行的所有目标使用同一个结束时间，
+中断后续查时沿用原来的结束时间，保证相邻两次运行的时间窗口首尾相接。
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+# Hunter API的时间参数格式
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def format_time(timestamp=None):
+    return time.strftime(TIME_FORMAT, time.localtime(timestamp))
+
+
+class Watermarks:
+    """
+    按scope（工具和查询类型）区分的水位线表，与结果库保存在同一个SQLite文件中
+    """
+
+    def __init__(self, path, scope, run_time=None):
+        store_dir = os.path.dirname(path)
+        if store_dir and not os.path.exists(store_dir):
+            os.makedirs(store_dir, exist_ok=True)
+        self.scope = scope
+        # 本次运行的时间窗口结束时间，查询完成后成为目标新的水位线
+        self.run_time = run_time or format_time()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS watermarks ("
+            " scope TEXT NOT NULL, target TEXT NOT NULL, last_run TEXT NOT NULL,"
+            " PRIMARY KEY (scope, target))"
+        )
+        self._conn.commit()
+
+    def get(self, target):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_run FROM watermarks WHERE scope=? AND target=?", (self.scope, target)
+            ).fetchone()
+        return row[0] if row else None
+
+    def window(self, target):
+        """
+        返回目标本次查询的时间窗口(start_time, end_time)，从未查询过的目标返回None（全量查询）
+        """
+        since = self.get(target)
+        if since is None:
+            return None
+        return since, self.run_time
+
+    def merged_window(self, targets):
+        """
+        合并查询的时间窗口：取各目标中最早的水位线，任一目标从未查询过时返回None
+        """
+        windows = [self.window(target) for target in targets]
+        if not windows or any(window is None for window in windows):
+            return None
+        return min(window[0] for window in windows), self.run_time
+
+    def advance(self, target):
+        """
+        目标查询完成后将水位线推进到本次运行的结束时间
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_run FROM watermarks WHERE scope=? AND target=?", (self.scope, target)
+            ).fetchone()
+            # 时间格式固定，可以直接按字符串比较；续查旧批次时不回退水位线
+            if row is not None and row[0] >= self.run_time:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO watermarks (scope, target, last_run) VALUES (?, ?, ?)",
+                (self.scope, target, self.run_time)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
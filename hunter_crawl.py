@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import re
+import sys
+import threading
+import time
+
+import hunter_icp
+import hunter_ip
+from hunter_core.cache import ResponseCache
+from hunter_core.engine import run_batch
+from hunter_core.exporters import write_csv
+from hunter_core.results import NO_ICP, NO_IP
+from hunter_core.scheduler import PointBudget
+
+# 配置信息（API密钥、限速等沿用hunter_ip.py中的CONFIG）
+CONFIG = {
+    "max_depth": 2,     # 最大扩展深度，种子为第0层
+    "point_budget": 0,  # 本次运行最多消耗的积分，0表示不限制
+    "follow_ip": True,  # 是否继续扩展新发现的IP地址
+    "workers": 1        # 同一层内并发扩展的线程数
+}
+
+NODE_DOMAIN = "域名"
+NODE_IP = "IP地址"
+NODE_COMPANY = "企业"
+
+EDGE_COLUMNS = ["源类型", "源", "关系", "目标类型", "目标", "深度"]
+
+DOMAIN_PATTERN = re.compile(r'^[A-Za-z0-9-]+(\.[A-Za-z0-9-]+)+$')
+
+
+class AssetGraph:
+    """
+    资产关系图，记录去重后的边和已发现的节点
+    """
+
+    def __init__(self):
+        self.edges = []
+        self._edge_keys = set()
+        self._nodes = {}
+        self._lock = threading.Lock()
+
+    def add_node(self, node_type, value, depth):
+        """
+        记录节点，返回是否为新节点
+        """
+        key = (node_type, value.lower())
+        with self._lock:
+            if key in self._nodes:
+                return False
+            self._nodes[key] = depth
+            return True
+
+    def add_edge(self, source_type, source, relation, target_type, target, depth):
+        key = (source_type, source.lower(), relation, target_type, target.lower())
+        with self._lock:
+            if key in self._edge_keys:
+                return
+            self._edge_keys.add(key)
+            self.edges.append({
+                "源类型": source_type, "源": source, "关系": relation,
+                "目标类型": target_type, "目标": target, "深度": depth
+            })
+
+    @property
+    def node_count(self):
+        return len(self._nodes)
+
+
+def share_client():
+    """
+    让hunter_icp与hunter_ip共用同一个客户端，两者的请求使用同一个密钥池和限速器
+    """
+    hunter_icp.CLIENT = hunter_ip.CLIENT
+
+
+def detect_node_type(value):
+    """
+    判断种子是IP地址、域名还是企业名称
+    """
+    if not hunter_ip.is_domain(value):
+        return NODE_IP
+    if DOMAIN_PATTERN.match(value):
+        return NODE_DOMAIN
+    return NODE_COMPANY
+
+
+def expand(graph, node_type, value, depth):
+    """
+    扩展单个节点，返回新发现的节点列表[(类型, 值), ...]
+    """
+    discovered = []
+
+    def found(new_type, new_value, expand_later=True):
+        if new_value and graph.add_node(new_type, new_value, depth + 1) and expand_later:
+            discovered.append((new_type, new_value))
+
+    if node_type == NODE_COMPANY:
+        for asset in hunter_icp.search_by_icp(value):
+            domain, ip = asset["domain"], asset["ip"]
+            graph.add_edge(NODE_COMPANY, value, "备案域名", NODE_DOMAIN, domain, depth + 1)
+            found(NODE_DOMAIN, domain)
+            if ip and ip != NO_IP:
+                graph.add_edge(NODE_DOMAIN, domain, "解析IP", NODE_IP, ip, depth + 1)
+                found(NODE_IP, ip)
+    else:
+        for company in hunter_ip.search_by_domain_or_ip(value, node_type == NODE_DOMAIN):
+            # 只沿真实的ICP备案企业扩展，网站标题等兜底名称只作为记录
+            if company["备案号"] != NO_ICP:
+                graph.add_edge(node_type, value, "备案企业", NODE_COMPANY, company["企业名称"], depth + 1)
+                found(NODE_COMPANY, company["企业名称"])
+            domain, ip = company["域名"], company["IP地址"]
+            if domain and domain.lower() != value.lower():
+                graph.add_edge(node_type, value, "关联域名", NODE_DOMAIN, domain, depth + 1)
+                # domain="..."按包含关系匹配，子域名的结果已包含在当前查询中，无需再次扩展
+                found(NODE_DOMAIN, domain, expand_later=value.lower() not in domain.lower())
+            if domain and ip and ip != NO_IP:
+                graph.add_edge(NODE_DOMAIN, domain, "解析IP", NODE_IP, ip, depth + 1)
+                found(NODE_IP, ip)
+    return discovered
+
+
+def crawl(seeds, max_depth=2, point_budget=0, follow_ip=True, workers=1):
+    """
+    从种子出发按层（BFS）扩展资产关系图
+
+    每个节点只查询一次；达到max_depth或积分预算不足时停止扩展。point_budget大于0时每个请求
+    发出前都按整页预留积分（见hunter_core.scheduler.PointBudget），并发扩展时消耗也不会超出预算。
+    """
+    graph = AssetGraph()
+    client = hunter_ip.CLIENT
+    session = client.session
+    start_points = session.points_consumed
+    budget = PointBudget(session, point_budget) if point_budget else None
+
+    frontier = []
+    for node_type, value in seeds:
+        if graph.add_node(node_type, value, 0):
+            frontier.append((node_type, value))
+
+    def budget_exhausted():
+        return budget is not None and budget.exhausted
+
+    depth = 0
+    while frontier and depth < max_depth:
+        print(f"\n[信息] 开始扩展第 {depth} 层，共 {len(frontier)} 个节点")
+
+        def expand_node(node):
+            if budget_exhausted():
+                return []
+            node_type, value = node
+            print(f"[信息] 扩展{node_type}: {value}")
+            return expand(graph, node_type, value, depth)
+
+        next_frontier = []
+        client.budget = budget
+        try:
+            layer = run_batch(expand_node, frontier, workers)
+        finally:
+            client.budget = None
+        for discovered in layer:
+            for node_type, value in discovered:
+                if node_type == NODE_IP and not follow_ip:
+                    continue
+                next_frontier.append((node_type, value))
+
+        if budget_exhausted():
+            print(f"[警告] 积分预算 {point_budget} 已不足以再获取一页（已消耗 {budget.spent}），停止扩展")
+            break
+        frontier = next_frontier
+        depth += 1
+
+    print(f"\n[成功] 共发现 {graph.node_count} 个节点、{len(graph.edges)} 条关系，"
+          f"消耗积分 {session.points_consumed - start_points}")
+    return graph
+
+
+def load_seeds(args):
+    """
+    读取命令行或文件中的种子
+    """
+    seeds = []
+    if args.domain:
+        seeds.append((NODE_DOMAIN, args.domain))
+    if args.ip:
+        seeds.append((NODE_IP, args.ip))
+    if args.company:
+        seeds.append((NODE_COMPANY, args.company))
+    if args.file:
+        if not os.path.exists(args.file):
+            print(f"[错误] 文件不存在: {args.file}")
+            sys.exit(1)
+        with open(args.file, 'r', encoding='utf-8') as f:
+            for line in f:
+                value = line.strip()
+                if value:
+                    seeds.append((detect_node_type(value), value))
+    return seeds
+
+
+def export_edges(graph, output_file="结果/资产图谱.csv"):
+    """
+    将关系图以边列表的形式导出为CSV文件
+    """
+    write_csv(graph.edges, EDGE_COLUMNS, output_file)
+    print(f"[成功] 关系图已导出到 {output_file}")
+
+
+def main():
+    # 先打印banner
+    hunter_ip.print_banner()
+
+    parser = argparse.ArgumentParser(description="Hunter 资产关系递归扩展工具")
+    parser.add_argument("-d", "--domain", help="种子域名")
+    parser.add_argument("-i", "--ip", help="种子IP地址")
+    parser.add_argument("-c", "--company", help="种子企业名称")
+    parser.add_argument("-f", "--file", help="包含种子的文本文件，每行一个域名、IP或企业名称（自动识别）")
+    parser.add_argument("-o", "--output", default="结果/资产图谱.csv", help="输出CSV文件路径")
+    parser.add_argument("--depth", type=int, default=CONFIG["max_depth"], help="最大扩展深度")
+    parser.add_argument("--budget", type=int, default=CONFIG["point_budget"],
+                        help="本次运行最多消耗的积分（0表示不限制）")
+    parser.add_argument("--no-ip", dest="follow_ip", action="store_false", default=CONFIG["follow_ip"],
+                        help="不继续扩展新发现的IP地址")
+    parser.add_argument("-w", "--workers", type=int, default=CONFIG["workers"], help="同一层内并发扩展的线程数")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", default=hunter_ip.CONFIG["cache"],
+                        help="禁用本地响应缓存")
+    parser.add_argument("--refresh", action="store_true", help="忽略已有缓存重新查询，并用新结果更新缓存")
+    parser.add_argument("-q", "--quiet", action="store_true", help="省略逐页的进度输出")
+    parser.add_argument("--keys-file", default=hunter_ip.CONFIG["api_keys_file"],
+                        help="API密钥文件，每行一个密钥，多个密钥时请求分配到剩余积分最多的密钥")
+    parser.add_argument("--metrics", help="运行结束后将运行指标写入该文件（.prom结尾为Prometheus格式，否则为JSON）")
+
+    args = parser.parse_args()
+    hunter_ip.CONFIG["quiet"] = args.quiet
+    hunter_ip.CONFIG["api_keys_file"] = args.keys_file
+    start_time = time.time()
+    seeds = load_seeds(args)
+    if not seeds:
+        parser.error("必须通过 -d/-i/-c/-f 至少指定一个种子")
+
+    if args.cache:
+        hunter_ip.CLIENT.cache = ResponseCache(hunter_ip.CONFIG["cache_path"], ttl=hunter_ip.CONFIG["cache_ttl"],
+                                               max_entries=hunter_ip.CONFIG["cache_max_entries"],
+                                               refresh=args.refresh)
+    share_client()
+    hunter_ip.CLIENT.set_workers(args.workers)
+
+    try:
+        graph = crawl(seeds, max_depth=args.depth, point_budget=args.budget,
+                      follow_ip=args.follow_ip, workers=args.workers)
+    except KeyboardInterrupt:
+        print("\n[警告] 扩展已中断")
+        hunter_ip.CLIENT.write_metrics(args.metrics, time.time() - start_time)
+        sys.exit(130)
+    with hunter_ip.CLIENT.metrics.timer("export"):
+        export_edges(graph, args.output)
+    hunter_ip.CLIENT.write_metrics(args.metrics, time.time() - start_time)
+
+
+if __name__ == "__main__":
+    main()
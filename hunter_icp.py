@@ -2,116 +2,129 @@
 # -*- coding: utf-8 -*-
 
 import argparse
-import base64
-import json
 import os
 import random
 import sys
 import time
-from urllib.parse import quote, urlencode
 
-import pandas as pd
-import requests
-from colorama import init, Fore, Style
-
-# 初始化colorama
-init(autoreset=True, convert=True)
+from hunter_core.archive import ReplaySource, ResponseArchive
+from hunter_core.bulk import BulkTask
+from hunter_core.cache import ResponseCache
+from hunter_core.checkpoint import Checkpoint
+from hunter_core.client import HunterClient
+from hunter_core.engine import run_batch
+from hunter_core.exporters import export_batches, read_excel_rows, write_csv
+from hunter_core.index import EntityIndex
+from hunter_core.normalize import InputNormalizer, normalize_company
+from hunter_core.results import DomainAccumulator
+from hunter_core.scheduler import QuotaScheduler
+from hunter_core.sinks import SINK_FORMATS, format_from_path, open_sink, output_path, parquet_available
+from hunter_core.store import ResultStore
+from hunter_core.summary import summarize_reverse_domain
+from hunter_core.watermark import Watermarks, format_time
 
 # 配置信息
 CONFIG = {
     "api_key": "",  # 在此处填写您的奇安信Hunter API密钥
+    "api_keys": [],   # 多个API密钥（密钥池），请求自动分配到剩余积分最多的密钥
+    "api_keys_file": "",  # 密钥文件路径，每行一个密钥；也可通过环境变量HUNTER_API_KEYS提供（逗号分隔）
     "api_url": "https://hunter.qianxin.com/openApi/search",  # 更新为正确的API接口地址
     "page_size": 100,  # 每页结果数量
     "max_page": 5,    # 最大查询页数
-    "delay": 1        # 请求间隔时间(秒)
+    "rate_limit": 1,  # 每个API密钥的请求速率上限(次/秒)，所有并发线程共享
+    "workers": 1,     # 批量查询时的并发线程数
+    "page_workers": 5,  # 单个目标内并发获取分页的线程数，第一页返回total后其余页同时获取
+    "point_budget": 0,  # 批量查询最多消耗的积分，0表示不限制
+    "bulk_poll_interval": 5,  # 批量任务模式下首次轮询任务进度的间隔(秒)，之后逐次延长
+    "bulk_timeout": 3600,  # 批量任务最长等待时间(秒)，超时后改为逐个查询
+    "cache": True,    # 是否启用本地响应缓存
+    "cache_path": "结果/hunter_cache.sqlite3",  # 缓存文件路径，两个工具共用
+    "cache_ttl": 7 * 24 * 3600,  # 缓存有效期(秒)
+    "cache_max_entries": 100000,  # 缓存最大条目数，超出后淘汰最久未使用的条目
+    "timeout": 30,    # 单次请求超时时间(秒)
+    "max_retries": 3,  # 网络异常、限流或服务端错误时的最大重试次数
+    "backoff": 1,     # 重试退避的基础时间(秒)，每次重试翻倍并加入随机抖动
+    "breaker_threshold": 3,  # 连续被限流多少次后暂停整个批次
+    "breaker_cooldown": 60,  # 暂停时长(秒)
+    "quiet": False,   # 是否省略逐页的进度输出
+    "normalize": True,  # 批量查询前规范化企业名称（全角/半角、括号、英文后缀）并去重
+    "summary": True,  # 导出本地结果库时生成汇总表（Excel中为附加的工作表，其他格式为单独的CSV文件）
+    "archive_path": "",  # 原始响应归档路径（gzip压缩的JSONL，如 结果/hunter_archive.jsonl.gz），为空时不归档
+    "store_path": "结果/hunter_results.sqlite3",  # 本地结果库路径，两个工具共用
+    "checkpoint_path": "结果/hunter_checkpoint.sqlite3"  # 批量查询的断点日志路径
 }
 
+# 本地结果库中的表名和列，所有列共同构成唯一键
+RESULT_TABLE = "reverse_domain"
+RESULT_COLUMNS = ["企业名称", "域名", "IP地址"]
+
+# 所有线程共享的API客户端，统一管理限速器、连接池和本地响应缓存（缓存在main中根据参数创建）
+CLIENT = HunterClient(CONFIG)
+
+# 离线索引，使用--offline时在main中根据本地结果库构建，命中的公司不再请求API
+OFFLINE_INDEX = None
+# 离线索引命中的结果带有此标记，其内容本来就来自本地结果库，不再写回
+OFFLINE_MARK = "离线"
+
+
+def build_query(company_name):
+    """
+    构建企业名称的查询字符串
+    """
+    return f'icp.name="{company_name}"'
+
 
-def search_by_icp(company_name):
+def search_by_icp(company_name, checkpoint=None, watermarks=None):
     """
     根据公司名称搜索ICP备案信息，返回域名和IP地址
+
+    watermarks不为None时只查询该公司上次运行之后更新的资产，查询完成后推进水位线
     """
-    if not CONFIG["api_key"]:
-        print("[错误] 请先在脚本中配置API密钥")
+    if not CLIENT.has_api_key():
+        print("[错误] 请先在脚本中配置API密钥，或通过--keys-file、环境变量HUNTER_API_KEYS提供")
         sys.exit(1)
 
-    results = []
-    # 构建查询字符串
-    query = f'icp.name="{company_name}"'
+    accumulator = DomainAccumulator()
+    query = build_query(company_name)
     
-    # 尝试使用Base64编码处理查询参数
-    query_base64 = base64.urlsafe_b64encode(query.encode('utf-8')).decode('utf-8')
-    
-    for page in range(1, CONFIG["max_page"] + 1):
-        try:
-            # 构建查询参数
-            params = {
-                "api-key": CONFIG["api_key"],
-                "search": query_base64,  # 使用Base64编码后的查询参数
-                "page": str(page),
-                "page_size": str(CONFIG["page_size"]),
-                "is_web": "1"  # 只搜索网站资产
-            }
-            
-            # 打印完整URL以便调试
-            print(f"[调试] 请求URL: {CONFIG['api_url']}?" + "&".join([f"{k}={v}" for k, v in params.items()]))
-
-            print(f"[信息] 正在查询 {company_name} 的第 {page} 页结果...")
-            # 添加请求头
-            headers = {
-                "Content-Type": "application/x-www-form-urlencoded"
-            }
-            response = requests.get(CONFIG["api_url"], params=params, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-
-            # 检查API返回状态
-            if data.get("code") != 200:
-                print(f"[错误] API请求失败: {data.get('message', '未知错误')}")
-                break
-
-            # 提取域名和IP信息
-            for item in data.get("data", {}).get("arr", []):
-                domain = item.get("domain")
-                ip = item.get("ip")
-                
-                # 检查是否已存在该域名
-                domain_exists = False
-                for result in results:
-                    if result["domain"] == domain:
-                        domain_exists = True
-                        break
-                
-                if domain and not domain_exists:
-                    results.append({"domain": domain, "ip": ip})
-
-            # 检查是否有更多页
-            total = data.get("data", {}).get("total", 0)
-            if page * CONFIG["page_size"] >= total:
-                break
-
-            # 添加延迟，避免请求过快
-            time.sleep(CONFIG["delay"])
-
-        except requests.exceptions.RequestException as e:
-            print(f"[错误] 请求异常: {str(e)}")
-            break
-        except json.JSONDecodeError:
-            print("[错误] 解析API响应失败")
-            break
-        except Exception as e:
-            print(f"[错误] 未知异常: {str(e)}")
-            break
+    def consume(arr):
+        # 提取域名和IP信息，通过哈希索引按域名去重
+        return accumulator.add_page(arr)
 
-    return results
+    time_range = watermarks.window(company_name) if watermarks is not None else None
+    completed = CLIENT.run_query(query, consume, company_name, checkpoint=checkpoint, key=company_name,
+                                 time_range=time_range)
+    if watermarks is not None and completed:
+        watermarks.advance(company_name)
+    return accumulator.to_dicts()
+
+
+def lookup_offline(company_name):
+    """
+    从离线索引中按企业名称（或备案号）查找，命中时返回与process_company相同格式的结果（带OFFLINE_MARK标记），
+    未命中或未启用离线索引时返回None
+    """
+    if OFFLINE_INDEX is None:
+        return None
+    accumulator = DomainAccumulator()
+    for record in OFFLINE_INDEX.lookup_company(company_name) or OFFLINE_INDEX.lookup_icp(company_name):
+        accumulator.add(record)
+    CLIENT.metrics.inc("offline_hits" if len(accumulator) else "offline_misses")
+    if not len(accumulator):
+        return None
+    if not CONFIG["quiet"]:
+        print(f"[信息] {company_name} 命中离线索引，共 {len(accumulator)} 个域名")
+    return {"企业名称": company_name, "资产列表": accumulator.to_dicts(), OFFLINE_MARK: True}
 
 
-def process_company(company_name):
+def process_company(company_name, checkpoint=None, watermarks=None):
     """
     处理单个公司名称
     """
     print(f"\n[信息] 开始查询公司: {company_name}")
-    results = search_by_icp(company_name)
+    if watermarks is not None and watermarks.get(company_name):
+        print(f"[信息] 增量查询：只获取 {watermarks.get(company_name)} 之后更新的资产")
+    results = search_by_icp(company_name, checkpoint, watermarks)
     
     if results:
         print(f"[成功] 找到 {len(results)} 个域名")
@@ -121,9 +134,24 @@ def process_company(company_name):
         return {"企业名称": company_name, "资产列表": []}
 
 
-def process_file(file_path):
+def open_watermarks(run_time=None):
+    """
+    打开增量查询的水位线表，与本地结果库保存在同一个文件中
+    """
+    return Watermarks(CONFIG["store_path"], "hunter_icp", run_time)
+
+
+def process_file(file_path, workers=1, resume=False, point_budget=0, since_last_run=False, sink=None, targets=None,
+                 bulk=False):
     """
-    处理包含多个公司名称的文件
+    处理包含多个公司名称的文件，workers大于1时并发查询多个公司
+
+    每获取一页都会记录到断点日志，resume为True时跳过已完成的公司，未完成的公司从下一页继续。
+    point_budget大于0时按积分预算调度，先为所有公司获取第一页，预算不足时停止并保留断点日志。
+    since_last_run为True时每个公司只查询上次运行之后更新的资产。
+    sink不为None时每个公司完成后立即将其结果行写入sink（见hunter_core.sinks）
+    targets不为None时查询该列表中的公司而不读取文件，file_path只用于区分断点日志
+    bulk为True时将所有公司作为一个服务端批量任务提交（见hunter_core.bulk），任务失败的公司逐个查询
     """
     if not os.path.exists(file_path):
         print(f"[错误] 文件不存在: {file_path}")
@@ -131,13 +159,74 @@ def process_file(file_path):
 
     results = []
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            companies = [line.strip() for line in f if line.strip()]
+        normalizer = InputNormalizer("company", enabled=CONFIG["normalize"])
+        companies = list(normalizer.read(file_path) if targets is None else normalizer.feed(targets))
         
         print(f"[信息] 从文件中读取到 {len(companies)} 个公司名称")
-        for company in companies:
-            result = process_company(company)
-            results.append(result)
+        if normalizer.enabled:
+            normalizer.report()
+            CLIENT.metrics.inc("duplicate_targets", normalizer.saved)
+        checkpoint = Checkpoint(CONFIG["checkpoint_path"], f"hunter_icp:{os.path.abspath(file_path)}")
+        if resume:
+            print(f"[信息] 断点续查：已完成 {checkpoint.count_done(set(companies))} 个公司")
+        else:
+            checkpoint.clear()
+        watermarks = None
+        if since_last_run:
+            # 续查时沿用中断前的时间窗口，保证同一批次的所有页来自同一个窗口
+            run_time = checkpoint.get_meta("run_time") or format_time()
+            checkpoint.set_meta("run_time", run_time)
+            watermarks = open_watermarks(run_time)
+        CLIENT.set_workers(workers)
+
+        def emit(result):
+            # 公司完成后立即写入流式输出
+            if sink is not None:
+                sink.write_rows(build_rows([result]))
+            return result
+
+        # 离线索引命中的公司直接使用索引中的结果，不进入后续的查询流程
+        offline = {}
+        if OFFLINE_INDEX is not None:
+            for company in dict.fromkeys(companies):
+                hit = lookup_offline(company)
+                if hit is not None:
+                    offline[company] = emit(hit)
+            print(f"[信息] 离线索引命中 {len(offline)} 个公司，其余 {len(set(companies)) - len(offline)} 个将请求API")
+            companies = [company for company in companies if company not in offline]
+
+        if bulk and companies:
+            fallback = set(BulkTask(CLIENT, companies, "icp.name", checkpoint, CONFIG["bulk_poll_interval"],
+                                    CONFIG["bulk_timeout"]).run())
+
+            def finish(company):
+                # 只为批量任务失败的公司请求API，其余公司的结果已由批量任务写入断点日志，直接还原
+                if company in fallback:
+                    return process_company(company, checkpoint)
+                return {"企业名称": company, "资产列表": search_by_icp(company, checkpoint)}
+
+            results = run_batch(lambda company: emit(finish(company)), companies, workers)
+        elif point_budget > 0:
+            scheduler = QuotaScheduler(CLIENT, checkpoint, point_budget, workers)
+            time_ranges = {}
+            if watermarks is not None:
+                time_ranges = {company: watermarks.window(company) for company in companies}
+            completed = scheduler.run([(company, build_query(company), company) for company in companies],
+                                      time_ranges)
+            # 所有页都已记录在断点日志中，以下处理不会再发出请求
+            companies_ready = [company for company in companies if company in completed]
+            results = run_batch(lambda company: emit(process_company(company, checkpoint, watermarks)),
+                                companies_ready, workers)
+            if scheduler.stopped:
+                print(f"[警告] 还有 {len(set(companies) - completed)} 个公司未查询完，"
+                      f"已获取的页已记录到断点日志，使用 --resume 参数继续")
+        else:
+            results = run_batch(lambda company: emit(process_company(company, checkpoint, watermarks)),
+                                companies, workers)
+        results.extend(offline.values())
+        # 所有公司都已完成时清除断点日志
+        if checkpoint.count_done(set(companies)) == len(set(companies)):
+            checkpoint.clear()
     except Exception as e:
         print(f"[错误] 读取文件失败: {str(e)}")
         sys.exit(1)
@@ -145,15 +234,10 @@ def process_file(file_path):
     return results
 
 
-def export_to_excel(results, output_file="结果/反查域名.xlsx"):
+def build_rows(results):
     """
-    将结果导出到Excel文件
+    将查询结果展开为表格行
     """
-    # 确保输出目录存在
-    output_dir = os.path.dirname(output_file)
-    if output_dir and not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    # 准备数据
     data = []
     for result in results:
         company = result["企业名称"]
@@ -168,55 +252,63 @@ def export_to_excel(results, output_file="结果/反查域名.xlsx"):
                 })
         else:
             data.append({"企业名称": company, "域名": "未找到域名", "IP地址": "无"})
-    
-    # 创建DataFrame
-    new_df = pd.DataFrame(data)
-    
-    # 检查文件是否存在，如果存在则追加数据而不是覆盖
-    if os.path.exists(output_file):
-        try:
-            # 尝试读取现有文件
-            existing_df = pd.read_excel(output_file)
-            # 合并现有数据和新数据
-            combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-            # 去除可能的重复项
-            combined_df = combined_df.drop_duplicates()
-            df = combined_df
-            print(f"[信息] 已将新数据追加到现有文件 {output_file}")
-        except Exception as e:
-            print(f"[警告] 无法读取现有文件: {str(e)}，将创建新文件")
-            # 如果读取失败，使用时间戳创建新文件
-            file_name, file_ext = os.path.splitext(output_file)
-            output_file = f"{file_name}_{int(time.time())}{file_ext}"
-            df = new_df
-    else:
-        df = new_df
-    
-    try:
-        # 尝试多次保存，以应对文件可能被占用的情况
-        max_attempts = 3
-        for attempt in range(max_attempts):
-            try:
-                df.to_excel(output_file, index=False)
-                print(f"\n[成功] 结果已导出到 {output_file}")
-                return
-            except PermissionError:
-                if attempt < max_attempts - 1:
-                    print(f"[警告] 文件 {output_file} 可能被占用，正在重试...({attempt+1}/{max_attempts})")
-                    time.sleep(2)  # 等待2秒后重试
-                else:
-                    raise
-    except PermissionError:
-        print(f"[错误] 无法写入文件 {output_file}，请确保该文件未被其他程序打开")
-        # 尝试使用不同的文件名
-        alt_output_file = f"hunter_results_{int(time.time())}.xlsx"
+    return data
+
+
+def open_result_store(store_path=None, output_file="结果/反查域名.xlsx"):
+    """
+    打开本地结果库；首次使用时导入已有Excel文件中的历史结果
+    """
+    store = ResultStore(store_path or CONFIG["store_path"], RESULT_TABLE, RESULT_COLUMNS)
+    if store.count() == 0 and output_file.lower().endswith(".xlsx") and os.path.exists(output_file):
         try:
-            df.to_excel(alt_output_file, index=False)
-            print(f"[信息] 已将结果保存到备用文件: {alt_output_file}")
+            imported = store.add_rows(read_excel_rows(output_file))
+            print(f"[信息] 已从 {output_file} 导入 {imported} 条历史结果到本地结果库")
         except Exception as e:
-            print(f"[错误] 导出到备用文件也失败: {str(e)}")
-    except Exception as e:
-        print(f"[错误] 导出Excel失败: {str(e)}")
+            print(f"[警告] 无法导入现有文件: {str(e)}")
+    return store
+
+
+def save_results(results, store):
+    """
+    将结果追加到本地结果库，插入时自动去重；离线索引命中的结果本来就在结果库中，不再写入
+    """
+    with CLIENT.metrics.timer("store"):
+        rows = build_rows([result for result in results if not result.get(OFFLINE_MARK)])
+        inserted = store.add_rows(rows)
+    print(f"\n[成功] 本地结果库新增 {inserted} 条结果（重复 {len(rows) - inserted} 条），共 {store.count()} 条")
+    return inserted
+
+
+def save_delta(results, store, delta_file):
+    """
+    增量模式：将新发现的资产合并到本地结果库，并把新增部分单独导出为CSV
+    """
+    with CLIENT.metrics.timer("store"):
+        # 时间窗口内没有更新不代表公司没有资产，不写入“未找到域名”的占位行
+        rows = build_rows([result for result in results if result["资产列表"] and not result.get(OFFLINE_MARK)])
+        new_rows = store.insert_new(rows)
+    print(f"\n[成功] 增量查询：新增 {len(new_rows)} 条资产（已存在 {len(rows) - len(new_rows)} 条），"
+          f"本地结果库共 {store.count()} 条")
+    for row in new_rows[:20]:
+        print(f"  [新增] {row['企业名称']}: {row['域名']} {row['IP地址']}")
+    if len(new_rows) > 20:
+        print(f"  ...... 共 {len(new_rows)} 条")
+    if new_rows:
+        write_csv(new_rows, RESULT_COLUMNS, delta_file)
+        print(f"[成功] 新增资产已导出到 {delta_file}")
+    return new_rows
+
+
+def export_to_excel(store, output_file="结果/反查域名.xlsx", fmt="xlsx", summary=True):
+    """
+    将本地结果库导出到Excel文件，fmt为其他格式（csv、jsonl、parquet）时按该格式导出
+
+    结果库按列式批次读取，summary为True时在同一遍中生成汇总表（见hunter_core.summary）
+    """
+    with CLIENT.metrics.timer("export"):
+        export_batches(store.iter_batches(), RESULT_COLUMNS, output_file, fmt, alt_prefix="hunter_results",
+                       summarize=summarize_reverse_domain if summary else None)
 
 
 
@@ -224,6 +316,9 @@ def export_to_excel(results, output_file="结果/反查域名.xlsx"):
 
 def print_banner():
     """打印ASCII艺术字横幅，使用随机颜色"""
+    # colorama只用于横幅，在此处导入以加快脚本被其他工具调用时的加载速度
+    from colorama import init, Fore, Style
+    init(autoreset=True, convert=True)
     # 定义可用的颜色列表
     colors = [Fore.RED, Fore.GREEN, Fore.BLUE, Fore.YELLOW, Fore.MAGENTA, Fore.CYAN]
     # 随机选择颜色
@@ -255,22 +350,141 @@ def main():
     print_banner()
     
     parser = argparse.ArgumentParser(description="Hunter ICP备案反查工具")
-    group = parser.add_mutually_exclusive_group(required=True)
+    group = parser.add_mutually_exclusive_group()
     group.add_argument("-c", "--company", help="指定单个企业名称")
     group.add_argument("-f", "--file", help="指定包含企业名称的文本文件路径")
-    parser.add_argument("-o", "--output", default="结果/反查域名.xlsx", help="输出Excel文件路径")
+    parser.add_argument("-o", "--output", default="结果/反查域名.xlsx", help="输出文件路径（默认为Excel文件）")
+    parser.add_argument("--format", choices=list(SINK_FORMATS),
+                        help="输出格式：xlsx（超过单表行数上限自动分表）、csv、jsonl、parquet（需安装pyarrow）。"
+                             "不使用-e时按公司完成顺序将本次结果流式写入-o，使用-e时导出整个本地结果库")
+    parser.add_argument("-e", "--export", action="store_true",
+                        help="将本地结果库导出到输出文件（可单独使用，也可与查询参数一起使用）")
+    parser.add_argument("--no-summary", dest="summary", action="store_false", default=CONFIG["summary"],
+                        help="使用-e导出时不生成汇总表，只导出明细")
+    parser.add_argument("--store", default=CONFIG["store_path"], help="本地结果库路径")
+    parser.add_argument("--keys-file", default=CONFIG["api_keys_file"],
+                        help="API密钥文件，每行一个密钥，多个密钥时请求分配到剩余积分最多的密钥")
+    parser.add_argument("--point-budget", type=int, default=CONFIG["point_budget"],
+                        help="批量查询最多消耗的积分，先为所有公司获取第一页，预算不足时停止并可用--resume继续（与-f一起使用）")
+    parser.add_argument("--since-last-run", action="store_true",
+                        help="增量监控：每个公司只查询上次运行之后更新的资产，并单独导出新增部分")
+    parser.add_argument("--bulk", action="store_true",
+                        help="将文件中的所有公司作为一个服务端批量任务提交，完成后下载结果文件，适合数千个公司（与-f一起使用）")
+    parser.add_argument("--resume", action="store_true",
+                        help="从上次中断的位置继续批量查询（与-f一起使用）")
+    parser.add_argument("--no-normalize", dest="normalize", action="store_false", default=CONFIG["normalize"],
+                        help="不规范化企业名称，按原样查询每个公司")
+    parser.add_argument("--offline", action="store_true",
+                        help="优先从本地结果库构建的离线索引中按企业名称或备案号查找，未命中时才请求API")
+    parser.add_argument("--archive", default=CONFIG["archive_path"],
+                        help="将获取到的每一页原始响应追加写入该归档文件（gzip压缩的JSONL）")
+    parser.add_argument("--replay", help="从归档文件重放：重新解析、去重和导出，不访问网络；"
+                                         "不指定-c/-f时重放归档中的全部公司")
+    parser.add_argument("-w", "--workers", type=int, default=CONFIG["workers"],
+                        help="批量查询时的并发线程数（与-f一起使用），总请求速率仍受rate_limit限制")
+    
+    parser.add_argument("--cache", dest="cache", action="store_true", default=CONFIG["cache"],
+                        help="启用本地响应缓存（默认启用）")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="禁用本地响应缓存")
+    parser.add_argument("--refresh", action="store_true", help="忽略已有缓存重新查询，并用新结果更新缓存")
+    parser.add_argument("-q", "--quiet", action="store_true", default=CONFIG["quiet"], help="省略逐页的进度输出")
+    parser.add_argument("--metrics", help="运行结束后将运行指标写入该文件（.prom结尾为Prometheus格式，否则为JSON）")
     
     args = parser.parse_args()
+    CONFIG["quiet"] = args.quiet
+    CONFIG["normalize"] = args.normalize
+    start_time = time.time()
+    if not (args.company or args.file or args.export or args.replay):
+        parser.error("必须指定 -c/-f 之一，或使用 -e 导出本地结果库")
+    if args.replay and not os.path.exists(args.replay):
+        parser.error(f"归档文件不存在: {args.replay}")
+    if args.replay and (args.archive or args.since_last_run):
+        parser.error("--replay 不能与 --archive、--since-last-run 同时使用")
+    if args.bulk and (args.point_budget > 0 or args.since_last_run or args.replay):
+        parser.error("--bulk 不能与 --point-budget、--since-last-run、--replay 同时使用")
+    if args.company and args.normalize:
+        args.company = normalize_company(args.company) or args.company
+    if args.format:
+        args.output = output_path(args.output, args.format)
+    output_format = args.format or format_from_path(args.output)
+    if output_format == "parquet" and not parquet_available():
+        parser.error("导出Parquet需要先安装pyarrow：pip install pyarrow")
     
+    if args.replay:
+        replay_start = time.time()
+        CLIENT.replay = ReplaySource(args.replay)
+        print(f"[信息] 重放模式：从 {args.replay} 加载 {len(CLIENT.replay)} 页响应，"
+              f"耗时 {time.time() - replay_start:.2f} 秒，不访问网络")
+        # 重放不消耗积分，也不需要断点日志和响应缓存
+        CONFIG["checkpoint_path"] = ":memory:"
+        args.cache = False
+        # 归档中的查询值就是当时实际查询的目标，直接重放不再规范化
+        CONFIG["normalize"] = CONFIG["normalize"] and bool(args.file)
+    elif args.archive:
+        CLIENT.archive = ResponseArchive(args.archive)
+    if args.cache:
+        CLIENT.cache = ResponseCache(CONFIG["cache_path"], ttl=CONFIG["cache_ttl"],
+                                     max_entries=CONFIG["cache_max_entries"], refresh=args.refresh)
+    
+    # 水位线与本地结果库保存在同一个文件中
+    CONFIG["store_path"] = args.store
+    CONFIG["api_keys_file"] = args.keys_file
+
+    # 先打开结果库，避免首次使用时把本次流式写入的输出文件当作历史结果导入
+    store = open_result_store(args.store, args.output)
+    if args.offline:
+        global OFFLINE_INDEX
+        index_start = time.time()
+        OFFLINE_INDEX = EntityIndex.from_store(args.store)
+        print(f"[信息] 已从本地结果库构建离线索引：{len(OFFLINE_INDEX)} 条资产，耗时 {time.time() - index_start:.2f} 秒")
+    sink = None
+    if args.format and not args.export and (args.company or args.file or args.replay):
+        sink = open_sink(args.format, args.output, RESULT_COLUMNS, **(
+            {"alt_prefix": "hunter_results"} if args.format == "xlsx" else {}))
+
     results = []
-    if args.company:
-        result = process_company(args.company)
+    offline_hit = lookup_offline(args.company) if args.company else None
+    if offline_hit is not None:
+        results.append(offline_hit)
+        if not CONFIG["quiet"]:
+            for asset in offline_hit["资产列表"]:
+                print(f"  [离线] {asset['domain']} {asset['ip']}")
+    elif args.company:
+        result = process_company(args.company, watermarks=open_watermarks() if args.since_last_run else None)
         results.append(result)
-    elif args.file:
-        results = process_file(args.file)
-    
-    if results:
-        export_to_excel(results, args.output)
+    elif args.file or args.replay:
+        try:
+            results = process_file(args.file or args.replay, workers=args.workers, resume=args.resume,
+                                   point_budget=args.point_budget, since_last_run=args.since_last_run, sink=sink,
+                                   bulk=args.bulk,
+                                   targets=None if args.file else CLIENT.replay.targets("icp.name"))
+        except KeyboardInterrupt:
+            print("\n[警告] 查询已中断，已获取的结果已记录到断点日志，使用 --resume 参数继续")
+            if sink is not None:
+                sink.close()
+                print(f"[信息] 中断前完成的公司已写入 {sink.path}（{sink.rows} 行）")
+            if CLIENT.archive is not None:
+                CLIENT.archive.close()
+            CLIENT.write_metrics(args.metrics, time.time() - start_time)
+            sys.exit(130)
+
+    if CLIENT.archive is not None:
+        CLIENT.archive.close()
+        print(f"[信息] 本次获取的 {CLIENT.archive.records} 页原始响应已追加到归档 {CLIENT.archive.path}")
+    if sink is not None:
+        if not (args.file or args.replay):
+            sink.write_rows(build_rows(results))
+        sink.close()
+        print(f"\n[成功] 本次结果已写入 {sink.path}（{sink.rows} 行）")
+    if results and args.since_last_run:
+        save_delta(results, store, f"{os.path.splitext(args.output)[0]}_增量_{time.strftime('%Y%m%d_%H%M%S')}.csv")
+    elif results:
+        save_results(results, store)
+    if args.export:
+        export_to_excel(store, args.output, output_format, args.summary)
+    elif results and sink is None:
+        print(f"[信息] 使用 -e 参数可将本地结果库导出到 {args.output}")
+    CLIENT.write_metrics(args.metrics, time.time() - start_time)
 
 
 if __name__ == "__main__":
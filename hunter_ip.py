@@ -2,169 +2,338 @@
 # -*- coding: utf-8 -*-
 
 import argparse
-import base64
-import json
 import os
 import random
 import sys
 import time
-from urllib.parse import quote, urlencode
 
-import pandas as pd
-import requests
-from colorama import init, Fore, Style
-
-# 初始化colorama
-init(autoreset=True, convert=True)
+from hunter_core.archive import ReplaySource, ResponseArchive
+from hunter_core.batching import Demultiplexer, build_or_query, pack_targets
+from hunter_core.bulk import BulkTask
+from hunter_core.cache import ResponseCache
+from hunter_core.checkpoint import Checkpoint
+from hunter_core.client import HunterClient
+from hunter_core.engine import run_batch
+from hunter_core.exporters import export_batches, read_excel_rows, write_csv
+from hunter_core.index import EntityIndex
+from hunter_core.iprange import in_network, ip_sort_key, is_ip_address, is_ip_range, parse_ip_range, split_network
+from hunter_core.knowledge import KnowledgeTable
+from hunter_core.normalize import InputNormalizer, normalize_domain
+from hunter_core.results import CompanyAccumulator, parse_page
+from hunter_core.scheduler import QuotaScheduler
+from hunter_core.sinks import SINK_FORMATS, format_from_path, open_sink, output_path, parquet_available
+from hunter_core.store import ResultStore
+from hunter_core.summary import summarize_reverse_icp
+from hunter_core.watermark import Watermarks, format_time
 
 # 配置信息
 CONFIG = {
     "api_key": "",  # 在此处填写您的奇安信Hunter API密钥
+    "api_keys": [],   # 多个API密钥（密钥池），请求自动分配到剩余积分最多的密钥
+    "api_keys_file": "",  # 密钥文件路径，每行一个密钥；也可通过环境变量HUNTER_API_KEYS提供（逗号分隔）
     "api_url": "https://hunter.qianxin.com/openApi/search",  # API接口地址
     "page_size": 100,  # 每页结果数量
     "max_page": 5,    # 最大查询页数
-    "delay": 1        # 请求间隔时间(秒)
+    "rate_limit": 1,  # 每个API密钥的请求速率上限(次/秒)，所有并发线程共享
+    "workers": 1,     # 批量查询时的并发线程数
+    "page_workers": 5,  # 单个目标内并发获取分页的线程数，第一页返回total后其余页同时获取
+    "saturation": 0,  # 连续多少页没有新增企业时停止翻页，0表示不启用
+    "point_budget": 0,  # 批量查询最多消耗的积分，0表示不限制
+    "batch_size": 1,  # 批量查询时每个合并查询包含的目标数，1表示不合并
+    "batch_max_length": 1000,  # 合并后查询语句的最大长度
+    "bulk_poll_interval": 5,  # 批量任务模式下首次轮询任务进度的间隔(秒)，之后逐次延长
+    "bulk_timeout": 3600,  # 批量任务最长等待时间(秒)，超时后改为逐个查询
+    "cache": True,    # 是否启用本地响应缓存
+    "cache_path": "结果/hunter_cache.sqlite3",  # 缓存文件路径，两个工具共用
+    "cache_ttl": 7 * 24 * 3600,  # 缓存有效期(秒)
+    "cache_max_entries": 100000,  # 缓存最大条目数，超出后淘汰最久未使用的条目
+    "timeout": 30,    # 单次请求超时时间(秒)
+    "max_retries": 3,  # 网络异常、限流或服务端错误时的最大重试次数
+    "backoff": 1,     # 重试退避的基础时间(秒)，每次重试翻倍并加入随机抖动
+    "breaker_threshold": 3,  # 连续被限流多少次后暂停整个批次
+    "breaker_cooldown": 60,  # 暂停时长(秒)
+    "quiet": False,   # 是否省略逐页的进度输出
+    "reuse": True,    # 批量查询时复用本次运行中已完整获取的结果（如已查询example.com时不再查询其子域名）
+    "normalize": True,  # 批量查询前规范化输入（URL取主机名、域名转小写和punycode）并去重
+    "registrable_domain": False,  # 规范化时将子域名归并到可注册域名（如 a.b.example.com -> example.com）
+    "summary": True,  # 导出本地结果库时生成汇总表（Excel中为附加的工作表，其他格式为单独的CSV文件）
+    "archive_path": "",  # 原始响应归档路径（gzip压缩的JSONL，如 结果/hunter_archive.jsonl.gz），为空时不归档
+    "store_path": "结果/hunter_results.sqlite3",  # 本地结果库路径，两个工具共用
+    "checkpoint_path": "结果/hunter_checkpoint.sqlite3"  # 批量查询的断点日志路径
 }
 
+# 本地结果库中的表名和列，所有列共同构成唯一键
+RESULT_TABLE = "reverse_icp"
+RESULT_COLUMNS = ["查询目标", "查询类型", "企业名称", "备案号", "域名", "IP地址", "网站标题"]
+
+# 所有线程共享的API客户端，统一管理限速器、连接池和本地响应缓存（缓存在main中根据参数创建）
+CLIENT = HunterClient(CONFIG)
+
+# 离线索引，使用--offline时在main中根据本地结果库构建，命中的目标不再请求API
+OFFLINE_INDEX = None
+# 离线索引命中的结果带有此标记，其内容本来就来自本地结果库，不再写回
+OFFLINE_MARK = "离线"
+
+# 本次批量运行的知识表，在process_file中创建，记录所有查询返回的条目，被完整覆盖的目标不再请求API
+KNOWLEDGE = None
 
-def search_by_domain_or_ip(target, is_domain=True):
+
+def search_by_domain_or_ip(target, is_domain=True, checkpoint=None, watermarks=None):
     """
     根据域名或IP地址搜索ICP备案信息，返回企业名称和备案信息
+
+    watermarks不为None时只查询目标上次运行之后更新的资产，查询完成后推进水位线
     """
-    if not CONFIG["api_key"]:
-        print("[错误] 请先在脚本中配置API密钥")
+    if not CLIENT.has_api_key():
+        print("[错误] 请先在脚本中配置API密钥，或通过--keys-file、环境变量HUNTER_API_KEYS提供")
         sys.exit(1)
 
-    results = []
-    # 构建查询字符串
-    if is_domain:
-        query = f'domain="{target}"'
-    else:
-        query = f'ip="{target}"'
-    
-    # 使用Base64编码处理查询参数
-    query_base64 = base64.urlsafe_b64encode(query.encode('utf-8')).decode('utf-8')
+    accumulator = CompanyAccumulator()
+    query = build_query(target, is_domain)
+    knowledge = KNOWLEDGE
+    rows = 0
     
-    for page in range(1, CONFIG["max_page"] + 1):
-        try:
-            # 构建查询参数
-            params = {
-                "api-key": CONFIG["api_key"],
-                "search": query_base64,  # 使用Base64编码后的查询参数
-                "page": str(page),
-                "page_size": str(CONFIG["page_size"]),
-                "is_web": "1"  # 只搜索网站资产
-            }
-            
-            # 打印完整URL以便调试
-            print(f"[调试] 请求URL: {CONFIG['api_url']}?" + "&".join([f"{k}={v}" for k, v in params.items()]))
-
-            print(f"[信息] 正在查询 {target} 的第 {page} 页结果...")
-            # 添加请求头
-            headers = {
-                "Content-Type": "application/x-www-form-urlencoded"
-            }
-            response = requests.get(CONFIG["api_url"], params=params, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-
-            # 检查API返回状态
-            if data.get("code") != 200:
-                print(f"[错误] API请求失败: {data.get('message', '未知错误')}")
-                break
-
-            # 提取企业名称和备案信息
-            for item in data.get("data", {}).get("arr", []):
-                domain = item.get("domain")
-                ip = item.get("ip")
-                # 直接获取网站标题作为辅助信息
-                web_title = item.get("web_title", "")
-                
-                # 尝试多种方式获取ICP信息
-                company_name = None
-                icp_number = None
-                
-                # 方式1：直接从company和number字段获取（API返回的主要格式）
-                if item.get("company"):
-                    company_name = item.get("company")
-                if item.get("number"):
-                    icp_number = item.get("number")
-                
-                # 方式2：从icp字段获取（兼容旧格式）
-                if not company_name and item.get("icp") and isinstance(item.get("icp"), dict):
-                    company_name = item.get("icp", {}).get("name")
-                    icp_number = item.get("icp", {}).get("number")
-                
-                # 方式3：从icp_info字段获取（兼容旧格式）
-                if not company_name and item.get("icp_info") and isinstance(item.get("icp_info"), dict):
-                    company_name = item.get("icp_info", {}).get("name")
-                    icp_number = item.get("icp_info", {}).get("number")
-                
-                # 方式3：如果有企业名称但没有备案号，设置默认值
-                if company_name and not icp_number:
-                    icp_number = "未获取到备案号"
-                
-                # 方式4：如果网站标题中包含学院/大学等关键词，可能是教育机构
-                if not company_name and web_title and ("学院" in web_title or "大学" in web_title or "学校" in web_title):
-                    company_name = web_title
-                    icp_number = "未获取到备案号"
-                
-                # 使用集合记录已添加的企业名称，确保相同企业名称只记录一次
-                # 检查是否已存在该企业
-                company_exists = False
-                if company_name:
-                    for result in results:
-                        if result.get("企业名称") == company_name:
-                            company_exists = True
-                            break
-                
-                if company_name and not company_exists:
-                    results.append({
-                        "企业名称": company_name, 
-                        "备案号": icp_number if icp_number else "未获取到备案号",
-                        "域名": domain if domain else "",
-                        "IP地址": ip if ip else "未获取到IP",
-                        "网站标题": web_title
-                    })
-                # 即使没有企业名称，也记录IP和域名信息，但确保域名不重复
-                elif domain and not any(r.get("域名") == domain for r in results):
-                    results.append({
-                        "企业名称": web_title if web_title else "未获取到企业名称", 
-                        "备案号": "未获取到备案号",
-                        "域名": domain,
-                        "IP地址": ip if ip else "未获取到IP",
-                        "网站标题": web_title
-                    })
-
-            # 检查是否有更多页
-            total = data.get("data", {}).get("total", 0)
-            if page * CONFIG["page_size"] >= total:
-                break
-
-            # 添加延迟，避免请求过快
-            time.sleep(CONFIG["delay"])
-
-        except requests.exceptions.RequestException as e:
-            print(f"[错误] 请求异常: {str(e)}")
-            break
-        except json.JSONDecodeError:
-            print("[错误] 解析API响应失败")
-            break
-        except Exception as e:
-            print(f"[错误] 未知异常: {str(e)}")
-            break
+    def consume(arr):
+        # 一次遍历解析整页数据，通过哈希索引去重，返回本页新增的企业数
+        nonlocal rows
+        before = accumulator.company_count
+        records = parse_page(arr)
+        for record in records:
+            accumulator.add(record)
+        if knowledge is not None:
+            knowledge.observe(records)
+            rows += len(records)
+        return accumulator.company_count - before
+
+    time_range = watermarks.window(target) if watermarks is not None else None
+    completed = CLIENT.run_query(query, consume, target, checkpoint=checkpoint, key=target,
+                                 saturation=CONFIG["saturation"], time_range=time_range)
+    if watermarks is not None and completed:
+        watermarks.advance(target)
+    if knowledge is not None and completed and not CONFIG["saturation"] and time_range is None:
+        knowledge.complete(target, is_domain, rows)
+    return accumulator.to_dicts()
+
+
+def build_query(target, is_domain=True):
+    """
+    构建单个域名或IP地址的查询字符串
+    """
+    if is_domain:
+        return f'domain="{target}"'
+    return f'ip="{target}"'
+
+
+def probe_first_page(query, label, checkpoint=None, time_range=None):
+    """
+    获取查询的第一页（优先从断点日志还原），返回{1: (total, arr)}及日志中已有的其他页，失败时返回None
+    """
+    restored = {}
+    if checkpoint is not None:
+        restored = {page: (total, arr) for page, total, arr in checkpoint.pages(query)}
+    if 1 not in restored:
+        data = CLIENT.fetch_page(CLIENT.encode_query(query), 1, label, time_range)
+        if data is None:
+            return None
+        body = data.get("data") or {}
+        restored[1] = (body.get("total", 0) or 0, body.get("arr") or [])
+        if checkpoint is not None:
+            checkpoint.record_page(query, 1, *restored[1])
+    return restored
+
+
+def search_batch(targets, is_domain=True, checkpoint=None, watermarks=None):
+    """
+    将多个目标合并为一个查询，按结果中的domain/ip字段拆分回各个目标，返回{目标: 企业列表}
+
+    合并查询的结果数超过分页上限时，将目标对半拆分后分别查询，避免结果被截断
+    """
+    if len(targets) == 1:
+        return {targets[0]: search_by_domain_or_ip(targets[0], is_domain, checkpoint, watermarks)}
+    if not CLIENT.has_api_key():
+        print("[错误] 请先在脚本中配置API密钥，或通过--keys-file、环境变量HUNTER_API_KEYS提供")
+        sys.exit(1)
+
+    field = "domain" if is_domain else "ip"
+    query = build_or_query(field, targets)
+    label = f"{targets[0]} 等{len(targets)}个目标"
+
+    # 增量查询时合并查询使用各目标中最早的水位线
+    time_range = watermarks.merged_window(targets) if watermarks is not None else None
+    # 先获取第一页，根据total判断合并查询能否覆盖所有结果
+    restored = probe_first_page(query, label, checkpoint, time_range)
+    if restored is None:
+        return {target: [] for target in targets}
+
+    if restored[1][0] > CONFIG["page_size"] * CONFIG["max_page"]:
+        print(f"[信息] {label} 的结果数超过分页上限，拆分后分别查询")
+        middle = len(targets) // 2
+        results = search_batch(targets[:middle], is_domain, checkpoint, watermarks)
+        results.update(search_batch(targets[middle:], is_domain, checkpoint, watermarks))
+        return results
+
+    demultiplexer = Demultiplexer(field, targets)
+    accumulators = {target: CompanyAccumulator() for target in targets}
 
+    def consume(arr):
+        # 将每条记录分配给对应的目标，返回本页新增的企业数
+        before = sum(accumulator.company_count for accumulator in accumulators.values())
+        for item in parse_page(arr):
+            for target in demultiplexer.match(item):
+                accumulators[target].add(item)
+        return sum(accumulator.company_count for accumulator in accumulators.values()) - before
+
+    completed = CLIENT.run_query(query, consume, label, checkpoint=checkpoint,
+                                 saturation=CONFIG["saturation"], restored=restored, time_range=time_range)
+    # 合并查询完成后，其中的每个目标都视为已完成
+    if completed:
+        for target in targets:
+            if checkpoint is not None:
+                checkpoint.mark_done(target)
+            if watermarks is not None:
+                watermarks.advance(target)
+
+    return {target: accumulator.to_dicts() for target, accumulator in accumulators.items()}
+
+
+def search_range(network, checkpoint=None, time_range=None):
+    """
+    用一个ip="网段"查询获取网段内所有IP的结果，按结果中的ip字段拆分回各个IP，
+    返回({IP: 企业列表}, 是否正常完成)
+
+    结果数超过分页上限时，将网段对半拆分后分别查询，避免结果被截断
+    """
+    if not CLIENT.has_api_key():
+        print("[错误] 请先在脚本中配置API密钥，或通过--keys-file、环境变量HUNTER_API_KEYS提供")
+        sys.exit(1)
+
+    query = build_query(str(network), is_domain=False)
+    label = str(network)
+    restored = probe_first_page(query, label, checkpoint, time_range)
+    if restored is None:
+        return {}, False
+
+    if restored[1][0] > CONFIG["page_size"] * CONFIG["max_page"] and network.num_addresses > 1:
+        print(f"[信息] {label} 的结果数超过分页上限，拆分后分别查询")
+        results = {}
+        completed = True
+        for subnet in split_network(network):
+            subnet_results, subnet_completed = search_range(subnet, checkpoint, time_range)
+            results.update(subnet_results)
+            completed = completed and subnet_completed
+        return results, completed
+
+    accumulators = {}
+    knowledge = KNOWLEDGE
+    rows = 0
+
+    def consume(arr):
+        # 按结果中的IP分组去重，返回本页新增的企业数
+        nonlocal rows
+        added = 0
+        records = parse_page(arr)
+        if knowledge is not None:
+            knowledge.observe(records)
+            rows += len(records)
+        for item in records:
+            if not in_network(item.ip, network):
+                continue
+            accumulator = accumulators.setdefault(item.ip, CompanyAccumulator())
+            before = accumulator.company_count
+            accumulator.add(item)
+            added += accumulator.company_count - before
+        return added
+
+    completed = CLIENT.run_query(query, consume, label, checkpoint=checkpoint,
+                                 saturation=CONFIG["saturation"], restored=restored, time_range=time_range)
+    if knowledge is not None and completed and not CONFIG["saturation"] and time_range is None:
+        knowledge.complete(str(network), False, rows)
+    return {ip: accumulator.to_dicts() for ip, accumulator in accumulators.items()}, completed
+
+
+def process_range(target, checkpoint=None, watermarks=None):
+    """
+    处理CIDR网段或IP范围，返回每个查询到结果的IP的查询结果
+    """
+    print(f"\n[信息] 开始查询IP范围: {target}")
+    time_range = watermarks.window(target) if watermarks is not None else None
+    if time_range is not None:
+        print(f"[信息] 增量查询：只获取 {time_range[0]} 之后更新的资产")
+    results = {}
+    completed = True
+    for network in parse_ip_range(target):
+        network_results, network_completed = search_range(network, checkpoint, time_range)
+        results.update(network_results)
+        completed = completed and network_completed
+    if completed:
+        if checkpoint is not None:
+            checkpoint.mark_done(target)
+        if watermarks is not None:
+            watermarks.advance(target)
+
+    if not results:
+        print(f"[警告] 未找到 {target} 中任何IP的企业信息")
+        return [{"查询目标": target, "查询类型": "IP地址", "企业列表": []}]
+    print(f"[成功] {target} 中共有 {len(results)} 个IP查询到企业信息")
+    return [{"查询目标": ip, "查询类型": "IP地址", "企业列表": results[ip]}
+            for ip in sorted(results, key=ip_sort_key)]
+
+
+def lookup_offline(target, is_domain=True):
+    """
+    从离线索引中查找目标，命中时返回与process_target/process_range相同格式的结果列表（带OFFLINE_MARK标记），
+    未命中或未启用离线索引时返回None
+    """
+    if OFFLINE_INDEX is None:
+        return None
+    target_type = "域名" if is_domain else "IP地址"
+    if not is_domain and is_ip_range(target):
+        accumulators = {}
+        for network in parse_ip_range(target):
+            for record in OFFLINE_INDEX.lookup_network(network):
+                accumulators.setdefault(record.ip, CompanyAccumulator()).add(record)
+        results = [{"查询目标": ip, "查询类型": target_type, "企业列表": accumulators[ip].to_dicts(), OFFLINE_MARK: True}
+                   for ip in sorted(accumulators, key=ip_sort_key)]
+    else:
+        accumulator = CompanyAccumulator()
+        records = OFFLINE_INDEX.lookup_domain(target) if is_domain else OFFLINE_INDEX.lookup_ip(target)
+        for record in records:
+            accumulator.add(record)
+        results = [{"查询目标": target, "查询类型": target_type, "企业列表": accumulator.to_dicts(),
+                    OFFLINE_MARK: True}] if records else []
+    CLIENT.metrics.inc("offline_hits" if results else "offline_misses")
+    if not results:
+        return None
+    if not CONFIG["quiet"]:
+        print(f"[信息] {target} 命中离线索引，共 {sum(len(result['企业列表']) for result in results)} 条记录")
     return results
 
 
-def process_target(target, is_domain=True):
+def process_target(target, is_domain=True, checkpoint=None, watermarks=None):
     """
     处理单个域名或IP地址
     """
     target_type = "域名" if is_domain else "IP地址"
     print(f"\n[信息] 开始查询{target_type}: {target}")
-    results = search_by_domain_or_ip(target, is_domain)
-    
+    if watermarks is not None and watermarks.get(target):
+        print(f"[信息] 增量查询：只获取 {watermarks.get(target)} 之后更新的资产")
+    records = KNOWLEDGE.lookup(target, is_domain) if KNOWLEDGE is not None else None
+    if records is not None:
+        print(f"[信息] {target} 已包含在本次完整获取的查询结果中，不再请求API")
+        CLIENT.metrics.inc("reused_targets")
+        accumulator = CompanyAccumulator()
+        for record in records:
+            accumulator.add(record)
+        return build_target_result(target, is_domain, accumulator.to_dicts())
+    results = search_by_domain_or_ip(target, is_domain, checkpoint, watermarks)
+    return build_target_result(target, is_domain, results)
+
+
+def build_target_result(target, is_domain, results):
+    """
+    生成单个目标的查询结果
+    """
+    target_type = "域名" if is_domain else "IP地址"
     if results:
         print(f"[成功] 找到 {len(results)} 个企业信息")
         return {"查询目标": target, "查询类型": target_type, "企业列表": results}
@@ -173,41 +342,183 @@ def process_target(target, is_domain=True):
         return {"查询目标": target, "查询类型": target_type, "企业列表": []}
 
 
-def process_file(file_path, is_domain=True):
+def open_watermarks(is_domain=True, run_time=None):
     """
-    处理包含多个域名或IP地址的文件
+    打开增量查询的水位线表，与本地结果库保存在同一个文件中
     """
+    return Watermarks(CONFIG["store_path"], f"hunter_ip:{'domain' if is_domain else 'ip'}", run_time)
+
+
+def process_file(file_path, is_domain=True, workers=1, resume=False, batch_size=1, point_budget=0,
+                 since_last_run=False, sink=None, targets=None, bulk=False):
+    """
+    处理包含多个域名或IP地址的文件，workers大于1时并发查询多个目标
+
+    每获取一页都会记录到断点日志，resume为True时跳过已完成的目标，未完成的目标从下一页继续。
+    batch_size大于1时将多个目标合并为一个查询，减少请求次数。
+    point_budget大于0时按积分预算调度，先为所有目标获取第一页，预算不足时停止并保留断点日志。
+    文件中的CIDR网段和IP范围以范围查询的方式处理，结果按IP拆分。
+    since_last_run为True时每个目标只查询上次运行之后更新的资产。
+    sink不为None时每个目标完成后立即将其结果行写入sink（见hunter_core.sinks）
+    targets不为None时查询该列表中的目标而不读取文件，file_path只用于区分断点日志
+    CONFIG["reuse"]为True时，已被本次其他目标完整结果覆盖的目标（如已查询example.com后的子域名）不再请求API
+    bulk为True时将所有单个目标作为一个服务端批量任务提交（见hunter_core.bulk），任务失败的目标逐个查询
+    """
+    global KNOWLEDGE
     if not os.path.exists(file_path):
         print(f"[错误] 文件不存在: {file_path}")
         sys.exit(1)
 
     results = []
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            targets = [line.strip() for line in f if line.strip()]
+        normalizer = InputNormalizer("domain" if is_domain else "ip", CONFIG["registrable_domain"],
+                                     enabled=CONFIG["normalize"])
+        targets = list(normalizer.read(file_path) if targets is None else normalizer.feed(targets))
         
         target_type = "域名" if is_domain else "IP地址"
         print(f"[信息] 从文件中读取到 {len(targets)} 个{target_type}")
-        for target in targets:
-            result = process_target(target, is_domain)
-            results.append(result)
+        if normalizer.enabled:
+            normalizer.report()
+            CLIENT.metrics.inc("duplicate_targets", normalizer.saved)
+        checkpoint = Checkpoint(CONFIG["checkpoint_path"],
+                                f"hunter_ip:{'domain' if is_domain else 'ip'}:{os.path.abspath(file_path)}")
+        if resume:
+            print(f"[信息] 断点续查：已完成 {checkpoint.count_done(set(targets))} 个{target_type}")
+        else:
+            checkpoint.clear()
+        watermarks = None
+        if since_last_run:
+            # 续查时沿用中断前的时间窗口，保证同一批次的所有页来自同一个窗口
+            run_time = checkpoint.get_meta("run_time") or format_time()
+            checkpoint.set_meta("run_time", run_time)
+            watermarks = open_watermarks(is_domain, run_time)
+        CLIENT.set_workers(workers)
+        # 知识表只用于逐个目标的查询：合并查询本身已共享结果，积分预算和增量查询按各自的调度获取
+        if CONFIG["reuse"] and batch_size <= 1 and point_budget <= 0 and watermarks is None and not bulk:
+            KNOWLEDGE = KnowledgeTable(CONFIG["page_size"], CONFIG["max_page"])
+
+        def emit(result):
+            # 目标完成后立即写入流式输出，网段和IP范围的结果为列表
+            if sink is not None:
+                sink.write_rows(build_rows(result if isinstance(result, list) else [result]))
+            return result
+
+        # 网段和IP范围不可能是合法域名，无论-t指定的类型都按范围查询处理
+        # 离线索引命中的目标直接使用索引中的结果，不进入后续的查询流程
+        offline = {}
+        if OFFLINE_INDEX is not None:
+            for target in dict.fromkeys(targets):
+                hit = lookup_offline(target, is_domain and not is_ip_range(target))
+                if hit is not None:
+                    offline[target] = emit(hit)
+            print(f"[信息] 离线索引命中 {len(offline)} 个目标，其余 {len(set(targets)) - len(offline)} 个将请求API")
+        pending = [target for target in targets if target not in offline]
+        range_targets = list(dict.fromkeys(target for target in pending if is_ip_range(target)))
+        if range_targets:
+            print(f"[信息] 其中 {len(range_targets)} 个为网段或IP范围，将以范围查询的方式处理")
+        single_targets = [target for target in pending if target not in set(range_targets)]
+        if batch_size > 1:
+            unique_targets = list(dict.fromkeys(single_targets))
+            groups = pack_targets(unique_targets, "domain" if is_domain else "ip",
+                                  batch_size, CONFIG["batch_max_length"])
+            print(f"[信息] 合并查询：{len(unique_targets)} 个{target_type}合并为 {len(groups)} 个查询")
+            merged = {}
+            for group_results in run_batch(lambda group: search_batch(group, is_domain, checkpoint, watermarks),
+                                           groups, workers):
+                merged.update(group_results)
+            results = emit([build_target_result(target, is_domain, merged[target]) for target in single_targets])
+        elif bulk and single_targets:
+            task = BulkTask(CLIENT, single_targets, "domain" if is_domain else "ip", checkpoint,
+                            CONFIG["bulk_poll_interval"], CONFIG["bulk_timeout"])
+            fallback = set(task.run())
+
+            def finish(target):
+                # 只为批量任务失败的目标请求API，其余目标的结果已由批量任务写入断点日志，直接还原
+                if target in fallback:
+                    return process_target(target, is_domain, checkpoint)
+                return build_target_result(target, is_domain, search_by_domain_or_ip(target, is_domain, checkpoint))
+
+            results = run_batch(lambda target: emit(finish(target)), single_targets, workers)
+        elif point_budget > 0:
+            scheduler = QuotaScheduler(CLIENT, checkpoint, point_budget, workers)
+            time_ranges = {}
+            if watermarks is not None:
+                time_ranges = {target: watermarks.window(target) for target in single_targets}
+            completed = scheduler.run([(target, build_query(target, is_domain), target)
+                                       for target in single_targets], time_ranges)
+            # 所有页都已记录在断点日志中，以下处理不会再发出请求
+            results = run_batch(lambda target: emit(process_target(target, is_domain, checkpoint, watermarks)),
+                                [target for target in single_targets if target in completed], workers)
+            if scheduler.stopped:
+                print(f"[警告] 还有 {len(set(single_targets) - completed)} 个{target_type}未查询完，"
+                      f"已获取的页已记录到断点日志，使用 --resume 参数继续")
+                range_targets = []
+            elif range_targets:
+                print("[警告] 网段和IP范围查询不受积分预算调度")
+        elif KNOWLEDGE is not None:
+            # 网段和IP范围先于单个IP查询，其中已完整获取的IP直接从知识表得到结果
+            range_results = [result for results_list in run_batch(
+                lambda target: emit(process_range(target, checkpoint)), range_targets, workers)
+                for result in results_list]
+            range_targets = []
+            results = process_with_knowledge(single_targets, is_domain, checkpoint, workers, emit) + range_results
+            if KNOWLEDGE.satisfied:
+                print(f"\n[信息] {len(KNOWLEDGE.satisfied)} 个{target_type}已包含在本次其他目标的完整结果中，未请求API")
+        else:
+            results = run_batch(lambda target: emit(process_target(target, is_domain, checkpoint, watermarks)),
+                                single_targets, workers)
+        for range_results in run_batch(lambda target: emit(process_range(target, checkpoint, watermarks)),
+                                       range_targets, workers):
+            results.extend(range_results)
+        for hit in offline.values():
+            results.extend(hit)
+        # 所有目标都已完成时清除断点日志，从知识表得到结果的目标没有断点记录
+        remaining = set(pending) - (KNOWLEDGE.satisfied if KNOWLEDGE is not None else set())
+        if checkpoint.count_done(remaining) == len(remaining):
+            checkpoint.clear()
     except Exception as e:
         print(f"[错误] 读取文件失败: {str(e)}")
         sys.exit(1)
+    finally:
+        KNOWLEDGE = None
 
     return results
 
 
-def export_to_excel(results, output_file="hunter_reverse_results.xlsx"):
+def process_with_knowledge(targets, is_domain, checkpoint, workers, emit):
     """
-    将结果导出到Excel文件
+    按域名层级从上到下分批查询（父域名先于子域名），每个目标查询前先检查知识表，按输入顺序返回结果
+    """
+    levels = {}
+    for target in dict.fromkeys(targets):
+        levels.setdefault(target.count(".") if is_domain else 0, []).append(target)
+    results = {}
+    for level in sorted(levels):
+        level_targets = levels[level]
+        for target, result in zip(level_targets, run_batch(
+                lambda target: emit(process_target(target, is_domain, checkpoint)), level_targets, workers)):
+            results[target] = result
+    return [results[target] for target in targets]
+
+
+def replay_targets(replay, is_domain=True):
+    """
+    从归档的查询语句中提取目标；结果数超过分页上限时拆分出的子网段由其上级网段重放，不单独列出
+    """
+    targets = replay.targets("domain" if is_domain else "ip")
+    if is_domain:
+        return targets
+    networks = [network for target in targets if is_ip_range(target) for network in parse_ip_range(target)]
+    return [target for target in targets
+            if not is_ip_range(target) or not any(
+                network != covered and network.version == covered.version and network.subnet_of(covered)
+                for network in parse_ip_range(target) for covered in networks)]
+
+
+def build_rows(results):
+    """
+    将查询结果展开为表格行
     """
-    # 确保输出目录存在
-    output_dir = os.path.dirname(output_file)
-    if output_dir and not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-        
-    # 准备数据
     data = []
     for result in results:
         target = result["查询目标"]
@@ -234,55 +545,63 @@ def export_to_excel(results, output_file="hunter_reverse_results.xlsx"):
                 "域名": "无" if target_type == "IP地址" else target,
                 "IP地址": target if target_type == "IP地址" else "无"
             })
-    
-    # 创建DataFrame
-    new_df = pd.DataFrame(data)
-    
-    # 检查文件是否存在，如果存在则追加数据而不是覆盖
-    if os.path.exists(output_file):
-        try:
-            # 尝试读取现有文件
-            existing_df = pd.read_excel(output_file)
-            # 合并现有数据和新数据
-            combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-            # 去除可能的重复项
-            combined_df = combined_df.drop_duplicates()
-            df = combined_df
-            print(f"[信息] 已将新数据追加到现有文件 {output_file}")
-        except Exception as e:
-            print(f"[警告] 无法读取现有文件: {str(e)}，将创建新文件")
-            # 如果读取失败，使用时间戳创建新文件
-            file_name, file_ext = os.path.splitext(output_file)
-            output_file = f"{file_name}_{int(time.time())}{file_ext}"
-            df = new_df
-    else:
-        df = new_df
-    
-    try:
-        # 尝试多次保存，以应对文件可能被占用的情况
-        max_attempts = 3
-        for attempt in range(max_attempts):
-            try:
-                df.to_excel(output_file, index=False)
-                print(f"\n[成功] 结果已导出到 {output_file}")
-                return
-            except PermissionError:
-                if attempt < max_attempts - 1:
-                    print(f"[警告] 文件 {output_file} 可能被占用，正在重试...({attempt+1}/{max_attempts})")
-                    time.sleep(2)  # 等待2秒后重试
-                else:
-                    raise
-    except PermissionError:
-        print(f"[错误] 无法写入文件 {output_file}，请确保该文件未被其他程序打开")
-        # 尝试使用不同的文件名
-        alt_output_file = f"hunter_reverse_results_{int(time.time())}.xlsx"
+    return data
+
+
+def open_result_store(store_path=None, output_file="结果/反查ICP.xlsx"):
+    """
+    打开本地结果库；首次使用时导入已有Excel文件中的历史结果
+    """
+    store = ResultStore(store_path or CONFIG["store_path"], RESULT_TABLE, RESULT_COLUMNS)
+    if store.count() == 0 and output_file.lower().endswith(".xlsx") and os.path.exists(output_file):
         try:
-            df.to_excel(alt_output_file, index=False)
-            print(f"[信息] 已将结果保存到备用文件: {alt_output_file}")
+            imported = store.add_rows(read_excel_rows(output_file))
+            print(f"[信息] 已从 {output_file} 导入 {imported} 条历史结果到本地结果库")
         except Exception as e:
-            print(f"[错误] 导出到备用文件也失败: {str(e)}")
-    except Exception as e:
-        print(f"[错误] 导出Excel失败: {str(e)}")
+            print(f"[警告] 无法导入现有文件: {str(e)}")
+    return store
+
+
+def save_results(results, store):
+    """
+    将结果追加到本地结果库，插入时自动去重；离线索引命中的结果本来就在结果库中，不再写入
+    """
+    with CLIENT.metrics.timer("store"):
+        rows = build_rows([result for result in results if not result.get(OFFLINE_MARK)])
+        inserted = store.add_rows(rows)
+    print(f"\n[成功] 本地结果库新增 {inserted} 条结果（重复 {len(rows) - inserted} 条），共 {store.count()} 条")
+    return inserted
+
+
+def save_delta(results, store, delta_file):
+    """
+    增量模式：将新发现的资产合并到本地结果库，并把新增部分单独导出为CSV
+    """
+    with CLIENT.metrics.timer("store"):
+        # 时间窗口内没有更新不代表目标没有资产，不写入“未找到企业信息”的占位行
+        rows = build_rows([result for result in results if result["企业列表"] and not result.get(OFFLINE_MARK)])
+        new_rows = store.insert_new(rows)
+    print(f"\n[成功] 增量查询：新增 {len(new_rows)} 条资产（已存在 {len(rows) - len(new_rows)} 条），"
+          f"本地结果库共 {store.count()} 条")
+    for row in new_rows[:20]:
+        print(f"  [新增] {row['查询目标']}: {row['企业名称']} {row['域名']} {row['IP地址']}")
+    if len(new_rows) > 20:
+        print(f"  ...... 共 {len(new_rows)} 条")
+    if new_rows:
+        write_csv(new_rows, RESULT_COLUMNS, delta_file)
+        print(f"[成功] 新增资产已导出到 {delta_file}")
+    return new_rows
+
+
+def export_to_excel(store, output_file="结果/反查ICP.xlsx", fmt="xlsx", summary=True):
+    """
+    将本地结果库导出到Excel文件，fmt为其他格式（csv、jsonl、parquet）时按该格式导出
+
+    结果库按列式批次读取，summary为True时在同一遍中生成汇总表（见hunter_core.summary）
+    """
+    with CLIENT.metrics.timer("export"):
+        export_batches(store.iter_batches(), RESULT_COLUMNS, output_file, fmt, alt_prefix="hunter_reverse_results",
+                       summarize=summarize_reverse_icp if summary else None)
 
 
 def is_domain(target):
@@ -299,11 +618,17 @@ def is_domain(target):
             if int(group) > 255:
                 return True  # 不是有效IP，当作域名处理
         return False  # 是IP地址
+    # IPv6地址、CIDR网段和IP范围
+    if is_ip_address(target) or parse_ip_range(target):
+        return False
     return True  # 不匹配IP模式，当作域名处理
 
 
 def print_banner():
     """打印ASCII艺术字横幅，使用随机颜色"""
+    # colorama只用于横幅，在此处导入以加快脚本被其他工具调用时的加载速度
+    from colorama import init, Fore, Style
+    init(autoreset=True, convert=True)
     # 定义可用的颜色列表
     colors = [Fore.RED, Fore.GREEN, Fore.BLUE, Fore.YELLOW, Fore.MAGENTA, Fore.CYAN]
     # 随机选择颜色
@@ -335,40 +660,191 @@ def main():
     print_banner()
     
     parser = argparse.ArgumentParser(description="Hunter 域名/IP反查ICP备案企业工具")
-    group = parser.add_mutually_exclusive_group(required=True)
+    group = parser.add_mutually_exclusive_group()
     group.add_argument("-d", "--domain", help="指定单个域名")
-    group.add_argument("-i", "--ip", help="指定单个IP地址")
+    group.add_argument("-i", "--ip", help="指定单个IP地址（支持IPv6）、CIDR网段或IP范围")
     group.add_argument("-f", "--file", help="指定包含域名或IP地址的文本文件路径")
-    group.add_argument("-a", "--auto", help="自动识别输入是域名还是IP地址")
+    group.add_argument("-a", "--auto", help="自动识别输入是域名、IP地址、CIDR网段还是IP范围")
     parser.add_argument("-t", "--type", choices=['domain', 'ip'], default='domain', 
                         help="指定文件中包含的是域名还是IP地址（与-f一起使用）")
-    parser.add_argument("-o", "--output", default="结果/反查ICP.xlsx", help="输出Excel文件路径")
+    parser.add_argument("-o", "--output", default="结果/反查ICP.xlsx", help="输出文件路径（默认为Excel文件）")
+    parser.add_argument("--format", choices=list(SINK_FORMATS),
+                        help="输出格式：xlsx（超过单表行数上限自动分表）、csv、jsonl、parquet（需安装pyarrow）。"
+                             "不使用-e时按目标完成顺序将本次结果流式写入-o，使用-e时导出整个本地结果库")
+    parser.add_argument("-e", "--export", action="store_true",
+                        help="将本地结果库导出到输出文件（可单独使用，也可与查询参数一起使用）")
+    parser.add_argument("--no-summary", dest="summary", action="store_false", default=CONFIG["summary"],
+                        help="使用-e导出时不生成汇总表，只导出明细")
+    parser.add_argument("--store", default=CONFIG["store_path"], help="本地结果库路径")
+    parser.add_argument("--keys-file", default=CONFIG["api_keys_file"],
+                        help="API密钥文件，每行一个密钥，多个密钥时请求分配到剩余积分最多的密钥")
+    parser.add_argument("--saturation", type=int, default=CONFIG["saturation"],
+                        help="连续N页没有新增企业时停止翻页，节省积分（0表示不启用）")
+    parser.add_argument("-b", "--batch-size", type=int, default=CONFIG["batch_size"],
+                        help="将N个目标合并为一个查询，按结果拆分回各个目标（与-f一起使用）")
+    parser.add_argument("--point-budget", type=int, default=CONFIG["point_budget"],
+                        help="批量查询最多消耗的积分，先为所有目标获取第一页，预算不足时停止并可用--resume继续（与-f一起使用）")
+    parser.add_argument("--since-last-run", action="store_true",
+                        help="增量监控：每个目标只查询上次运行之后更新的资产，并单独导出新增部分")
+    parser.add_argument("--bulk", action="store_true",
+                        help="将文件中的所有目标作为一个服务端批量任务提交，完成后下载结果文件，适合数千个目标（与-f一起使用）")
+    parser.add_argument("--resume", action="store_true",
+                        help="从上次中断的位置继续批量查询（与-f一起使用）")
+    parser.add_argument("--no-reuse", dest="reuse", action="store_false", default=CONFIG["reuse"],
+                        help="批量查询时不复用本次已完整获取的结果，每个目标都请求API")
+    parser.add_argument("--registrable", action="store_true", default=CONFIG["registrable_domain"],
+                        help="将域名归并到可注册域名后再去重查询（如 a.b.example.com -> example.com）")
+    parser.add_argument("--no-normalize", dest="normalize", action="store_false", default=CONFIG["normalize"],
+                        help="不规范化输入，按原样查询每个目标")
+    parser.add_argument("--offline", action="store_true",
+                        help="优先从本地结果库构建的离线索引中查找（域名按后缀、IP按网段匹配），未命中时才请求API")
+    parser.add_argument("--archive", default=CONFIG["archive_path"],
+                        help="将获取到的每一页原始响应追加写入该归档文件（gzip压缩的JSONL）")
+    parser.add_argument("--replay", help="从归档文件重放：重新解析、去重和导出，不访问网络；"
+                                         "不指定-d/-i/-f/-a时重放归档中的全部目标（按-t的类型）")
+    parser.add_argument("-w", "--workers", type=int, default=CONFIG["workers"],
+                        help="批量查询时的并发线程数（与-f一起使用），总请求速率仍受rate_limit限制")
+    
+    parser.add_argument("--cache", dest="cache", action="store_true", default=CONFIG["cache"],
+                        help="启用本地响应缓存（默认启用）")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="禁用本地响应缓存")
+    parser.add_argument("--refresh", action="store_true", help="忽略已有缓存重新查询，并用新结果更新缓存")
+    parser.add_argument("-q", "--quiet", action="store_true", default=CONFIG["quiet"], help="省略逐页的进度输出")
+    parser.add_argument("--metrics", help="运行结束后将运行指标写入该文件（.prom结尾为Prometheus格式，否则为JSON）")
     
     args = parser.parse_args()
+    CONFIG["saturation"] = args.saturation
+    CONFIG["quiet"] = args.quiet
+    CONFIG["normalize"] = args.normalize
+    CONFIG["reuse"] = args.reuse
+    CONFIG["registrable_domain"] = args.registrable
+    start_time = time.time()
+    if args.point_budget > 0 and args.batch_size > 1:
+        parser.error("--point-budget 不能与 -b 合并查询同时使用")
+    if not (args.domain or args.ip or args.file or args.auto or args.export or args.replay):
+        parser.error("必须指定 -d/-i/-f/-a 之一，或使用 -e 导出本地结果库")
+    if args.replay and not os.path.exists(args.replay):
+        parser.error(f"归档文件不存在: {args.replay}")
+    if args.replay and (args.archive or args.since_last_run):
+        parser.error("--replay 不能与 --archive、--since-last-run 同时使用")
+    if args.bulk and (args.batch_size > 1 or args.point_budget > 0 or args.since_last_run or args.replay):
+        parser.error("--bulk 不能与 -b、--point-budget、--since-last-run、--replay 同时使用")
+    if args.normalize:
+        # 单个目标同样去掉URL部分并统一写法，-i只有在输入URL时才会改变
+        if args.domain:
+            args.domain = normalize_domain(args.domain, args.registrable) or args.domain
+        for name in ("ip", "auto"):
+            if getattr(args, name):
+                setattr(args, name, normalize_domain(getattr(args, name)) or getattr(args, name))
+    if args.format:
+        args.output = output_path(args.output, args.format)
+    output_format = args.format or format_from_path(args.output)
+    if output_format == "parquet" and not parquet_available():
+        parser.error("导出Parquet需要先安装pyarrow：pip install pyarrow")
+    
+    if args.replay:
+        replay_start = time.time()
+        CLIENT.replay = ReplaySource(args.replay)
+        print(f"[信息] 重放模式：从 {args.replay} 加载 {len(CLIENT.replay)} 页响应，"
+              f"耗时 {time.time() - replay_start:.2f} 秒，不访问网络")
+        # 重放不消耗积分，也不需要断点日志和响应缓存
+        CONFIG["checkpoint_path"] = ":memory:"
+        args.cache = False
+        # 归档中的查询值就是当时实际查询的目标，直接重放不再规范化
+        CONFIG["normalize"] = CONFIG["normalize"] and bool(args.file)
+    elif args.archive:
+        CLIENT.archive = ResponseArchive(args.archive)
+    if args.cache:
+        CLIENT.cache = ResponseCache(CONFIG["cache_path"], ttl=CONFIG["cache_ttl"],
+                                     max_entries=CONFIG["cache_max_entries"], refresh=args.refresh)
     
     # 如果使用默认输出路径，确保结果目录存在
     if args.output == "结果/反查ICP.xlsx":
         os.makedirs("结果", exist_ok=True)
     
+    # 水位线与本地结果库保存在同一个文件中
+    CONFIG["store_path"] = args.store
+    CONFIG["api_keys_file"] = args.keys_file
+
+    def watermarks_for(is_domain_target):
+        return open_watermarks(is_domain_target) if args.since_last_run else None
+
+    # 先打开结果库，避免首次使用时把本次流式写入的输出文件当作历史结果导入
+    store = open_result_store(args.store, args.output)
+    if args.offline:
+        global OFFLINE_INDEX
+        index_start = time.time()
+        OFFLINE_INDEX = EntityIndex.from_store(args.store)
+        print(f"[信息] 已从本地结果库构建离线索引：{len(OFFLINE_INDEX)} 条资产，耗时 {time.time() - index_start:.2f} 秒")
+    sink = None
+    if args.format and not args.export and (args.domain or args.ip or args.file or args.auto or args.replay):
+        sink = open_sink(args.format, args.output, RESULT_COLUMNS, **(
+            {"alt_prefix": "hunter_reverse_results"} if args.format == "xlsx" else {}))
+
     results = []
-    if args.domain:
-        result = process_target(args.domain, is_domain=True)
+    single = args.domain or args.ip or args.auto
+    offline_hit = lookup_offline(single, is_domain(single)) if single else None
+    if offline_hit is not None:
+        results.extend(offline_hit)
+        if not CONFIG["quiet"]:
+            for result in offline_hit:
+                for company in result["企业列表"]:
+                    print(f"  [离线] {result['查询目标']}: {company['企业名称']} {company['备案号']} "
+                          f"{company['域名']} {company['IP地址']}")
+    elif args.domain:
+        result = process_target(args.domain, is_domain=True, watermarks=watermarks_for(True))
         results.append(result)
     elif args.ip:
-        result = process_target(args.ip, is_domain=False)
-        results.append(result)
+        if is_ip_range(args.ip):
+            results.extend(process_range(args.ip, watermarks=watermarks_for(False)))
+        else:
+            results.append(process_target(args.ip, is_domain=False, watermarks=watermarks_for(False)))
     elif args.auto:
         is_domain_target = is_domain(args.auto)
-        target_type = "域名" if is_domain_target else "IP地址"
-        print(f"[信息] 自动识别输入为{target_type}")
-        result = process_target(args.auto, is_domain=is_domain_target)
-        results.append(result)
-    elif args.file:
+        if not is_domain_target and is_ip_range(args.auto):
+            print("[信息] 自动识别输入为IP范围")
+            results.extend(process_range(args.auto, watermarks=watermarks_for(False)))
+        else:
+            target_type = "域名" if is_domain_target else "IP地址"
+            print(f"[信息] 自动识别输入为{target_type}")
+            result = process_target(args.auto, is_domain=is_domain_target,
+                                    watermarks=watermarks_for(is_domain_target))
+            results.append(result)
+    elif args.file or args.replay:
         is_domain_input = args.type == 'domain'
-        results = process_file(args.file, is_domain=is_domain_input)
-    
-    if results:
-        export_to_excel(results, args.output)
+        try:
+            results = process_file(args.file or args.replay, is_domain=is_domain_input, workers=args.workers,
+                                   resume=args.resume, batch_size=args.batch_size,
+                                   point_budget=args.point_budget, since_last_run=args.since_last_run,
+                                   sink=sink, bulk=args.bulk,
+                                   targets=None if args.file else replay_targets(CLIENT.replay, is_domain_input))
+        except KeyboardInterrupt:
+            print("\n[警告] 查询已中断，已获取的结果已记录到断点日志，使用 --resume 参数继续")
+            if sink is not None:
+                sink.close()
+                print(f"[信息] 中断前完成的目标已写入 {sink.path}（{sink.rows} 行）")
+            if CLIENT.archive is not None:
+                CLIENT.archive.close()
+            CLIENT.write_metrics(args.metrics, time.time() - start_time)
+            sys.exit(130)
+
+    if CLIENT.archive is not None:
+        CLIENT.archive.close()
+        print(f"[信息] 本次获取的 {CLIENT.archive.records} 页原始响应已追加到归档 {CLIENT.archive.path}")
+    if sink is not None:
+        if not (args.file or args.replay):
+            sink.write_rows(build_rows(results))
+        sink.close()
+        print(f"\n[成功] 本次结果已写入 {sink.path}（{sink.rows} 行）")
+    if results and args.since_last_run:
+        save_delta(results, store, f"{os.path.splitext(args.output)[0]}_增量_{time.strftime('%Y%m%d_%H%M%S')}.csv")
+    elif results:
+        save_results(results, store)
+    if args.export:
+        export_to_excel(store, args.output, output_format, args.summary)
+    elif results and sink is None:
+        print(f"[信息] 使用 -e 参数可将本地结果库导出到 {args.output}")
+    CLIENT.write_metrics(args.metrics, time.time() - start_time)
 
 
 if __name__ == "__main__":
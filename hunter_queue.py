@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+import hunter_icp
+import hunter_ip
+from hunter_core.cache import ResponseCache
+from hunter_core.checkpoint import Checkpoint
+from hunter_core.engine import run_batch
+from hunter_core.iprange import is_ip_range
+from hunter_core.jobqueue import JobQueue
+from hunter_core.normalize import InputNormalizer
+
+# 配置信息（API密钥、限速等沿用hunter_ip.py中的CONFIG）
+CONFIG = {
+    "queue_path": "结果/hunter_queue.sqlite3",  # 任务库路径，多台主机共用时放在共享目录中
+    "queue": "default",  # 队列名称，同一个任务库中可以有多个互不影响的队列
+    "lease": 600,        # 租约时长(秒)，worker每隔三分之一租约时长续约一次
+    "claim_size": 10,    # worker每次领取的目标数
+    "max_attempts": 3,   # 同一目标最多领取次数，超过后标记为失败
+    "poll_interval": 5,  # 其他worker仍持有租约时，等待多少秒后再尝试领取
+    "workers": 1         # 每个worker进程内并发查询的线程数
+}
+
+# 目标类型及其说明
+KINDS = {"domain": "域名", "ip": "IP地址", "icp": "企业"}
+
+
+def enqueue(queue, file_path, kind):
+    """
+    将文件中的目标写入任务库，每行一个目标
+    """
+    if not os.path.exists(file_path):
+        print(f"[错误] 文件不存在: {file_path}")
+        sys.exit(1)
+    normalizer = InputNormalizer("company" if kind == "icp" else kind, hunter_ip.CONFIG["registrable_domain"],
+                                 enabled=hunter_ip.CONFIG["normalize"])
+    targets = list(normalizer.read(file_path))
+    if normalizer.enabled:
+        normalizer.report()
+    added = queue.enqueue(targets, kind)
+    print(f"[成功] 队列 {queue.queue} 新增 {added} 个{KINDS[kind]}（已在队列中 {len(targets) - added} 个）")
+    return added
+
+
+def process_job(kind, target, checkpoint):
+    """
+    查询单个目标，返回结果列表（网段和IP范围会按IP拆分为多个结果）
+    """
+    if kind == "icp":
+        return [hunter_icp.process_company(target, checkpoint)]
+    if kind == "ip" and is_ip_range(target):
+        return hunter_ip.process_range(target, checkpoint)
+    return [hunter_ip.process_target(target, kind == "domain", checkpoint)]
+
+
+def run_worker(queue, workers=1, lease=600, claim_size=10, max_attempts=3, poll_interval=5):
+    """
+    循环领取并查询目标，直到队列中没有待处理的目标且其他worker也没有持有租约
+
+    每个目标的已获取页记录在本机的断点日志中，只有查询完所有页的目标才写回结果，
+    出错的目标放回队列由其他worker（或本worker稍后）重新领取。
+    """
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    checkpoints = {kind: Checkpoint(hunter_ip.CONFIG["checkpoint_path"], f"hunter_queue:{queue.queue}:{kind}")
+                   for kind in KINDS}
+    # hunter_icp与hunter_ip共用同一个客户端，两类目标的请求使用同一个密钥池
+    hunter_icp.CLIENT = hunter_ip.CLIENT
+    hunter_ip.CLIENT.set_workers(workers)
+    print(f"[信息] worker {worker} 开始处理队列 {queue.queue}")
+
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(lease / 3):
+            queue.renew(worker, lease)
+
+    def handle(job):
+        job_id, kind, target = job
+        try:
+            results = process_job(kind, target, checkpoints[kind])
+        except Exception as e:
+            queue.fail(job_id, str(e), max_attempts)
+            print(f"[错误] 查询 {target} 失败: {str(e)}")
+            return False
+        if checkpoints[kind].is_done(target):
+            queue.complete(job_id, results)
+            return True
+        queue.fail(job_id, "查询未完成", max_attempts)
+        return False
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    done = failed = 0
+    try:
+        while True:
+            jobs = queue.claim(worker, claim_size, lease, max_attempts)
+            if not jobs:
+                stats = queue.stats()
+                if not stats["pending"] and not stats["leased"]:
+                    break
+                time.sleep(poll_interval)
+                continue
+            for completed in run_batch(handle, jobs, workers):
+                if completed:
+                    done += 1
+                else:
+                    failed += 1
+    except KeyboardInterrupt:
+        released = queue.release(worker)
+        print(f"\n[警告] worker已中断，{released} 个未完成的目标已放回队列")
+        raise
+    finally:
+        stop.set()
+
+    # 队列已处理完，本机断点日志中的数据不再需要
+    for checkpoint in checkpoints.values():
+        checkpoint.clear()
+        checkpoint.close()
+    print(f"\n[成功] worker {worker} 完成 {done} 个目标，未完成 {failed} 次")
+    return done
+
+
+def print_status(queue):
+    """
+    输出队列中各状态的目标数量和当前持有租约的worker
+    """
+    stats = queue.stats()
+    print(f"[信息] 队列 {queue.queue}：待处理 {stats['pending']}，处理中 {stats['leased']}，"
+          f"已完成 {stats['done']}，失败 {stats['failed']}")
+    for worker, count in queue.workers():
+        print(f"  [worker] {worker}：持有 {count} 个目标")
+    return stats
+
+
+def export_results(queue, store_path, ip_output, icp_output):
+    """
+    将已完成目标的结果合并到本地结果库，并分别导出hunter_ip和hunter_icp的Excel文件
+    """
+    ip_results, icp_results = [], []
+    for kind, _, results in queue.iter_results():
+        (icp_results if kind == "icp" else ip_results).extend(results)
+    if not ip_results and not icp_results:
+        print(f"[警告] 队列 {queue.queue} 中还没有已完成的目标")
+        return
+    if ip_results:
+        store = hunter_ip.open_result_store(store_path, ip_output)
+        hunter_ip.save_results(ip_results, store)
+        hunter_ip.export_to_excel(store, ip_output)
+        store.close()
+    if icp_results:
+        store = hunter_icp.open_result_store(store_path, icp_output)
+        hunter_icp.save_results(icp_results, store)
+        hunter_icp.export_to_excel(store, icp_output)
+        store.close()
+
+
+def main():
+    # 先打印banner
+    hunter_ip.print_banner()
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", default=CONFIG["queue_path"], help="任务库路径，多台主机共用时放在共享目录中")
+    common.add_argument("--queue", default=CONFIG["queue"], help="队列名称")
+
+    parser = argparse.ArgumentParser(description="Hunter 批量查询任务队列（多进程、多主机共同处理一个批次）")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = commands.add_parser("enqueue", parents=[common], help="将文件中的目标写入任务库")
+    enqueue_parser.add_argument("-f", "--file", required=True, help="包含目标的文本文件，每行一个")
+    enqueue_parser.add_argument("-t", "--type", choices=list(KINDS), default="domain",
+                                help="目标类型：domain域名、ip（IP地址、网段或范围）、icp企业名称")
+    enqueue_parser.add_argument("--registrable", action="store_true", default=hunter_ip.CONFIG["registrable_domain"],
+                                help="将域名归并到可注册域名后再去重入队")
+    enqueue_parser.add_argument("--no-normalize", dest="normalize", action="store_false",
+                                default=hunter_ip.CONFIG["normalize"], help="不规范化输入，按原样入队")
+
+    worker_parser = commands.add_parser("worker", parents=[common], help="领取并查询目标，可同时运行多个")
+    worker_parser.add_argument("-w", "--workers", type=int, default=CONFIG["workers"], help="进程内并发查询的线程数")
+    worker_parser.add_argument("--lease", type=int, default=CONFIG["lease"], help="租约时长(秒)")
+    worker_parser.add_argument("--claim", type=int, default=CONFIG["claim_size"], help="每次领取的目标数")
+    worker_parser.add_argument("--keys-file", default=hunter_ip.CONFIG["api_keys_file"],
+                               help="API密钥文件，每行一个密钥，不同主机可以使用不同的密钥")
+    worker_parser.add_argument("--no-cache", dest="cache", action="store_false", default=hunter_ip.CONFIG["cache"],
+                               help="禁用本地响应缓存")
+    worker_parser.add_argument("-q", "--quiet", action="store_true", help="省略逐页的进度输出")
+    worker_parser.add_argument("--metrics", help="运行结束后将运行指标写入该文件（.prom结尾为Prometheus格式，否则为JSON）")
+
+    commands.add_parser("status", parents=[common], help="查看队列进度")
+    commands.add_parser("retry", parents=[common], help="将失败的目标重新放回队列")
+
+    export_parser = commands.add_parser("export", parents=[common], help="将已完成的结果合并到本地结果库并导出Excel")
+    export_parser.add_argument("--store", default=hunter_ip.CONFIG["store_path"], help="本地结果库路径")
+    export_parser.add_argument("-o", "--output", default="结果/反查ICP.xlsx", help="域名/IP结果的输出Excel文件路径")
+    export_parser.add_argument("--icp-output", default="结果/反查域名.xlsx", help="企业结果的输出Excel文件路径")
+
+    args = parser.parse_args()
+    queue = JobQueue(args.db, args.queue)
+
+    if args.command == "enqueue":
+        hunter_ip.CONFIG["normalize"] = args.normalize
+        hunter_ip.CONFIG["registrable_domain"] = args.registrable
+        enqueue(queue, args.file, args.type)
+        print_status(queue)
+    elif args.command == "worker":
+        hunter_ip.CONFIG["quiet"] = args.quiet
+        hunter_ip.CONFIG["api_keys_file"] = args.keys_file
+        if not hunter_ip.CLIENT.has_api_key():
+            print("[错误] 请先在脚本中配置API密钥，或通过--keys-file、环境变量HUNTER_API_KEYS提供")
+            sys.exit(1)
+        if args.cache:
+            hunter_ip.CLIENT.cache = ResponseCache(hunter_ip.CONFIG["cache_path"], ttl=hunter_ip.CONFIG["cache_ttl"],
+                                                   max_entries=hunter_ip.CONFIG["cache_max_entries"])
+        start_time = time.time()
+        try:
+            run_worker(queue, args.workers, args.lease, args.claim, CONFIG["max_attempts"], CONFIG["poll_interval"])
+        except KeyboardInterrupt:
+            hunter_ip.CLIENT.write_metrics(args.metrics, time.time() - start_time)
+            sys.exit(130)
+        print_status(queue)
+        hunter_ip.CLIENT.write_metrics(args.metrics, time.time() - start_time)
+    elif args.command == "status":
+        print_status(queue)
+    elif args.command == "retry":
+        print(f"[信息] {queue.retry_failed()} 个失败的目标已放回队列")
+    elif args.command == "export":
+        export_results(queue, args.store, args.output, args.icp_output)
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import hunter_icp
+import hunter_ip
+from hunter_core.cache import ResponseCache
+from hunter_core.client import IncompleteQueryError
+from hunter_core.coalesce import Coalescer
+from hunter_core.iprange import is_ip_range
+from hunter_core.normalize import normalize_company, normalize_domain
+
+# 配置信息（API密钥、限速等沿用hunter_ip.py中的CONFIG）
+CONFIG = {
+    "host": "127.0.0.1",  # HTTP服务监听地址，只建议监听本机
+    "port": 18090,        # HTTP服务端口
+    "workers": 16         # 同时处理的查询数（JSONL模式下的并发数，也决定连接池大小）
+}
+
+# 查询类型：auto自动识别域名、IP地址和IP范围，icp为企业名称
+LOOKUP_TYPES = ("auto", "domain", "ip", "icp")
+
+
+class LookupService:
+    """
+    常驻的查询服务：API客户端、连接池、响应缓存和本地结果库在多次查询之间保持打开
+
+    相同目标的并发查询合并为一次API查询，查询结果写入本地结果库并以表格行的形式返回。
+    有页未能获取的查询作为错误返回，不写入结果库，避免把部分结果当作完整结果。
+    """
+
+    def __init__(self, store_path, workers=16):
+        # hunter_icp与hunter_ip共用同一个客户端，两类查询使用同一个密钥池和连接池
+        hunter_icp.CLIENT = hunter_ip.CLIENT
+        self.client = hunter_ip.CLIENT
+        self.client.set_workers(workers)
+        self.client.raise_incomplete = True
+        self.ip_store = hunter_ip.open_result_store(store_path, "")
+        self.icp_store = hunter_icp.open_result_store(store_path, "")
+        self.coalescer = Coalescer()
+        self.started = time.time()
+
+    def resolve(self, target, kind="auto"):
+        """
+        规范化目标并确定查询类型，返回(目标, 类型)
+        """
+        target = (target or "").strip()
+        if kind not in LOOKUP_TYPES:
+            raise ValueError(f"不支持的查询类型: {kind}")
+        if not target:
+            raise ValueError("缺少查询目标")
+        if kind == "icp":
+            return normalize_company(target) or target, kind
+        target = normalize_domain(target, kind == "domain" and hunter_ip.CONFIG["registrable_domain"]) or target
+        if kind == "auto":
+            kind = "domain" if hunter_ip.is_domain(target) else "ip"
+        return target, kind
+
+    def _query(self, target, kind):
+        # 真正发起查询并写入结果库，返回表格行
+        if kind == "icp":
+            rows = hunter_icp.build_rows([hunter_icp.process_company(target)])
+            self.icp_store.add_rows(rows)
+            return rows
+        if kind == "ip" and is_ip_range(target):
+            results = hunter_ip.process_range(target)
+        else:
+            results = [hunter_ip.process_target(target, kind == "domain")]
+        rows = hunter_ip.build_rows(results)
+        self.ip_store.add_rows(rows)
+        return rows
+
+    def lookup(self, target, kind="auto"):
+        """
+        查询单个目标，返回可直接序列化为JSON的结果字典
+        """
+        start = time.time()
+        target, kind = self.resolve(target, kind)
+        rows, coalesced = self.coalescer.run((kind, target), lambda: self._query(target, kind))
+        self.client.metrics.inc("lookups")
+        if coalesced:
+            self.client.metrics.inc("coalesced_lookups")
+        return {"target": target, "type": kind, "rows": rows, "coalesced": coalesced,
+                "elapsed": round(time.time() - start, 4)}
+
+    def respond(self, request):
+        """
+        处理一个请求字典{"target": ..., "type": ..., "id": ...}，返回(HTTP状态码, 结果字典)
+
+        出错时结果字典带error：请求不合法为400，上游查询未完成为502，其他内部错误为500；id原样返回
+        """
+        if not isinstance(request, dict):
+            return 400, {"error": "请求必须是JSON对象"}
+        try:
+            status, response = 200, self.lookup(request.get("target"), request.get("type") or "auto")
+        except ValueError as e:
+            status, response = 400, {"target": request.get("target"), "error": str(e)}
+        except IncompleteQueryError as e:
+            status, response = 502, {"target": request.get("target"), "error": f"上游查询失败: {str(e)}"}
+        except Exception as e:
+            status, response = 500, {"target": request.get("target"), "error": f"查询失败: {str(e)}"}
+        if "id" in request:
+            response["id"] = request["id"]
+        return status, response
+
+    def handle(self, request):
+        """
+        处理一个请求字典，只返回结果字典（见respond）
+        """
+        return self.respond(request)[1]
+
+    def status(self):
+        counters = self.client.metrics.counters
+        return {
+            "uptime": round(time.time() - self.started, 1),
+            "lookups": counters.get("lookups", 0),
+            "coalesced": counters.get("coalesced_lookups", 0),
+            "in_flight": self.coalescer.in_flight(),
+            "requests": counters.get("requests", 0),
+            "cache_hits": counters.get("cache_hits", 0),
+            "points_remaining": self.client.metrics.gauges.get("points_remaining")
+        }
+
+    def close(self):
+        self.ip_store.close()
+        self.icp_store.close()
+
+
+def serve_jsonl(service, reader, writer, workers):
+    """
+    JSONL协议：每行一个请求，每个结果完成后立即写回一行，多个请求并发处理，
+    返回顺序与请求顺序不一定相同，请用id对应
+    """
+    lock = threading.Lock()
+
+    def respond(line):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            # 非JSON的行视为自动识别类型的目标
+            request = {"target": line.strip()}
+        payload = json.dumps(service.handle(request), ensure_ascii=False) + "\n"
+        with lock:
+            writer.write(payload)
+            writer.flush()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for line in reader:
+            if line.strip():
+                pool.submit(respond, line)
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status, body):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/status":
+            self._send(200, self.server.service.status())
+        elif url.path == "/lookup":
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            self._send(*self.server.service.respond(params))
+        else:
+            self._send(404, {"error": "接口不存在"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/lookup":
+            self._send(404, {"error": "接口不存在"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        except ValueError:
+            self._send(400, {"error": "请求体不是有效的JSON"})
+            return
+        if isinstance(request, list):
+            # 一次提交多个目标时并发查询，按请求顺序返回
+            with ThreadPoolExecutor(max_workers=max(1, min(len(request), self.server.workers))) as pool:
+                self._send(200, list(pool.map(self.server.service.handle, request)))
+        else:
+            self._send(*self.server.service.respond(request))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _UnixHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        reader = io.TextIOWrapper(self.rfile, encoding="utf-8")
+        writer = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+        serve_jsonl(self.server.service, reader, writer, self.server.workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hunter 常驻查询服务（保持客户端、连接池、缓存和结果库常驻，合并相同目标的并发查询）")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--port", type=int, default=CONFIG["port"], help="HTTP服务端口（默认模式）")
+    mode.add_argument("--socket", help="改为监听该Unix socket，使用JSONL协议")
+    mode.add_argument("--stdin", action="store_true", help="从标准输入逐行读取JSONL请求，结果写到标准输出")
+    parser.add_argument("--host", default=CONFIG["host"], help="HTTP服务监听地址")
+    parser.add_argument("--store", default=hunter_ip.CONFIG["store_path"], help="本地结果库路径")
+    parser.add_argument("--keys-file", default=hunter_ip.CONFIG["api_keys_file"],
+                        help="API密钥文件，每行一个密钥")
+    parser.add_argument("-w", "--workers", type=int, default=CONFIG["workers"], help="同时处理的查询数")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", default=hunter_ip.CONFIG["cache"],
+                        help="禁用本地响应缓存")
+    parser.add_argument("--metrics", help="服务停止时将运行指标写入该文件（.prom结尾为Prometheus格式，否则为JSON）")
+    args = parser.parse_args()
+
+    # JSONL模式下标准输出只用于返回结果，日志全部写到标准错误
+    output = sys.stdout
+    log = sys.stderr if args.stdin else sys.stdout
+    with contextlib.redirect_stdout(log):
+        hunter_ip.print_banner()
+        hunter_ip.CONFIG["quiet"] = hunter_icp.CONFIG["quiet"] = True
+        hunter_ip.CONFIG["api_keys_file"] = args.keys_file
+        if not hunter_ip.CLIENT.has_api_key():
+            print("[错误] 请先在脚本中配置API密钥，或通过--keys-file、环境变量HUNTER_API_KEYS提供")
+            sys.exit(1)
+        if args.cache:
+            hunter_ip.CLIENT.cache = ResponseCache(hunter_ip.CONFIG["cache_path"], ttl=hunter_ip.CONFIG["cache_ttl"],
+                                                   max_entries=hunter_ip.CONFIG["cache_max_entries"])
+        service = LookupService(args.store, args.workers)
+        start_time = time.time()
+        try:
+            if args.stdin:
+                print("[信息] 从标准输入读取JSONL请求，每行如 {\"target\": \"example.com\", \"type\": \"auto\"}")
+                serve_jsonl(service, sys.stdin, output, args.workers)
+            elif args.socket:
+                if os.path.exists(args.socket):
+                    os.remove(args.socket)
+                server = socketserver.ThreadingUnixStreamServer(args.socket, _UnixHandler)
+                server.daemon_threads = True
+                server.service, server.workers = service, args.workers
+                print(f"[信息] 查询服务已启动: unix:{args.socket}（JSONL协议）")
+                server.serve_forever()
+            else:
+                server = _HTTPServer((args.host, args.port), _HTTPHandler)
+                server.service, server.workers = service, args.workers
+                print(f"[信息] 查询服务已启动: http://{args.host}:{args.port}/lookup?target=example.com")
+                server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n[信息] 查询服务已停止")
+        finally:
+            service.close()
+            if args.socket and os.path.exists(args.socket):
+                os.remove(args.socket)
+        status = service.status()
+        print(f"[信息] 共处理 {status['lookups']} 个查询，其中 {status['coalesced']} 个与进行中的相同查询合并")
+        hunter_ip.CLIENT.write_metrics(args.metrics, time.time() - start_time)
+
+
+if __name__ == "__main__":
+    main()